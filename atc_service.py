@@ -0,0 +1,340 @@
+"""
+SERVICE ATC - SKYHUB PROJECT
+Le contrôleur du Vertiport (can_accept_drone, add_to_approach, dispatch_mission) servi en direct
+à un émulateur de trafic, sur une socket TCP locale (asyncio, une requête JSON par ligne).
+
+  {"id": "emu-1", "op": "land", "drone": "AF123", "battery": 32, "priority": 2}
+      -> {"id": "emu-1", "ok": true, "accepted": true, "minute": 418}
+  {"id": "emu-2", "op": "dispatch", "mission": "Taxi", "priority": 0}
+      -> {"id": "emu-2", "ok": true, "drone": "AF077", "battery": 88.0, "minute": 418}
+  {"id": "emu-3", "op": "status"}
+      -> {"id": "emu-3", "ok": true, "minute": 418, "queue": 3, "pads": 6, "garage": 41, "crashes": 0}
+
+Les requêtes reçues pendant une minute simulée (un tick de ATC_TICK_SECONDS) forment un lot,
+appliqué d'un bloc à la fin du tick dans un ordre déterministe qui ne dépend que de leur contenu,
+comme dans la boucle de simulation : atterrissages (priorité, puis batterie la plus faible, puis
+identifiant du drone), puis missions (priorité, puis identifiant de requête), puis update_simulation.
+Deux émulateurs qui envoient les mêmes requêtes dans les mêmes ticks obtiennent donc les mêmes
+réponses, quel que soit l'ordre d'arrivée des paquets. Les identifiants de requête doivent être
+uniques (ATCClient les préfixe du nom du client).
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import traceback
+import config
+from evtol import EVTOL
+from vertiport import Vertiport
+from scenario import default_scenario
+
+class ATCService:
+    """ Hub partagé par toutes les connexions ; l'horloge applique les lots et fait avancer la simulation """
+    def __init__(self, num_pads: int, num_garage: int, scenario=None, tick_seconds: float = None):
+        self.scenario = default_scenario() if scenario is None else scenario
+        self.hub = Vertiport("SkyHub ATC", num_pads, num_garage, verbose=False, scenario=self.scenario)
+        self.tick_seconds = config.ATC_TICK_SECONDS if tick_seconds is None else tick_seconds
+        self.minute = 0
+        self.pending = []           # (requête, writer) du tick en cours
+        self.connections = {}       # writer -> tâche de la connexion
+        self.requests = 0
+        self.batches = 0
+        self.server = None
+        self.clock = None
+
+    # --- Réseau ---
+
+    async def start(self, host: str = None, port: int = None):
+        """ Ouvre la socket et lance l'horloge ; port 0 : port libre choisi par le système (self.port) """
+        host = config.ATC_HOST if host is None else host
+        port = config.ATC_PORT if port is None else port
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.clock = asyncio.ensure_future(self.run_clock())
+        return self
+
+    async def stop(self):
+        """ Arrête l'horloge et ferme les connexions ouvertes (leurs tâches se terminent d'elles-mêmes) """
+        self.clock.cancel()
+        self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await asyncio.gather(*self.connections.values(), return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        """ Une connexion : chaque ligne reçue rejoint le lot du tick en cours (réponse à la fin du tick) """
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                raw = None
+                try:
+                    raw = json.loads(line)
+                    request = parse_request(raw, self.scenario)
+                except (KeyError, TypeError, ValueError) as error:
+                    # Refusée tout de suite : une requête invalide n'entre jamais dans un lot
+                    ident = raw.get("id") if isinstance(raw, dict) else None
+                    writer.write(encode({"id": ident, "ok": False, "error": f"requête invalide : {error!r}"}))
+                    continue
+                self.pending.append((request, writer))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self.connections[writer]
+            writer.close()
+
+    # --- Horloge et lots ---
+
+    async def run_clock(self):
+        """ Un tick par minute simulée, sur une échéance absolue (un tick lent ne décale pas les suivants) """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            deadline += self.tick_seconds
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+            batch, self.pending = self.pending, []
+            try:
+                self.tick(batch)
+            except Exception as error:
+                # L'horloge survit à un lot fautif : il est refusé en bloc, les suivants sont servis
+                print(f"⚠️ ATC : échec du tick à la minute {self.minute} ({len(batch)} requêtes) : {error!r}",
+                      file=sys.stderr)
+                traceback.print_exc()
+                self.send(batch, [{"id": request["id"], "ok": False, "error": f"erreur du service : {error!r}"}
+                                  for request, _ in batch])
+
+    def tick(self, batch: list):
+        """ Applique le lot du tick et avance d'une minute, puis envoie les réponses (une écriture par connexion) """
+        replies = self.apply_batch([request for request, _ in batch]) if batch else []
+        self.hub.update_simulation()
+        self.minute += 1
+        if batch:
+            self.send(batch, replies)
+            self.requests += len(batch)
+            self.batches += 1
+
+    def send(self, batch: list, replies: list):
+        """ Réponses d'un lot, regroupées par connexion (les connexions fermées entre-temps sont ignorées) """
+        lines = {}
+        for (request, writer), reply in zip(batch, replies):
+            lines.setdefault(writer, []).append(encode(reply))
+        for writer, chunk in lines.items():
+            if not writer.is_closing():
+                writer.write(b"".join(chunk))
+
+    def apply_batch(self, requests: list) -> list:
+        """ Réponses aux requêtes d'un lot (dans l'ordre reçu), décidées dans l'ordre déterministe du module """
+        replies = [None] * len(requests)
+        landings, dispatches = [], []
+        for k, request in enumerate(requests):
+            op = request["op"]
+            if op == "land": landings.append(k)
+            elif op == "dispatch": dispatches.append(k)
+            else: replies[k] = self.status()
+
+        landings.sort(key=lambda k: (-requests[k]["priority"], requests[k]["battery"], requests[k]["drone"]))
+        dispatches.sort(key=lambda k: (-requests[k]["priority"], requests[k]["id"]))
+        for k in landings:
+            replies[k] = self.land(requests[k])
+        for k in dispatches:
+            replies[k] = self.dispatch(requests[k])
+
+        for k, request in enumerate(requests):
+            replies[k] = {"id": request["id"], "minute": self.minute, **replies[k]}
+        return replies
+
+    # --- Décisions ---
+
+    def land(self, request: dict) -> dict:
+        drone = EVTOL(request["drone"], self.scenario)
+        drone.current_battery = request["battery"]
+        drone.mission_priority = request["priority"]
+        accepted = self.hub.can_accept_drone(drone)
+        if accepted:
+            self.hub.add_to_approach(drone)
+        return {"ok": True, "accepted": accepted}
+
+    def dispatch(self, request: dict) -> dict:
+        drone = self.hub.dispatch_mission(request["mission"], request["priority"])
+        if drone is None:
+            return {"ok": True, "drone": None}
+        return {"ok": True, "drone": drone.drone_id, "battery": drone.current_battery}
+
+    def status(self) -> dict:
+        hub = self.hub
+        return {"ok": True, "queue": len(hub.approach_queue), "pads": hub.occupied_pads,
+                "garage": hub.occupied_spots, "crashes": hub.crashes}
+
+def parse_priority(request: dict) -> int:
+    """ Priorité de mission : 0, 1 ou 2 (un booléen JSON est refusé) """
+    priority = request.get("priority", 0)
+    if isinstance(priority, bool) or priority not in (0, 1, 2):
+        raise ValueError(f"priorité hors de {{0, 1, 2}} : {priority!r}")
+    return int(priority)
+
+def parse_request(request, scenario=None) -> dict:
+    """
+    Requête normalisée (types et bornes vérifiés) ; KeyError, TypeError ou ValueError si elle est
+    invalide. Batterie d'atterrissage : nombre fini dans ]0, scenario.battery_max].
+    """
+    if not isinstance(request, dict):
+        raise TypeError("objet JSON attendu")
+    scenario = default_scenario() if scenario is None else scenario
+    op = request.get("op")
+    parsed = {"id": str(request.get("id")), "op": op}
+    if op == "land":
+        battery = float(request["battery"])
+        if not 0.0 < battery <= scenario.battery_max:      # NaN et ±inf échouent aussi
+            raise ValueError(f"batterie hors de ]0, {scenario.battery_max:g}] : {request['battery']!r}")
+        parsed.update(drone=str(request["drone"]), battery=battery, priority=parse_priority(request))
+    elif op == "dispatch":
+        parsed.update(mission=str(request.get("mission", "Taxi")), priority=parse_priority(request))
+    elif op != "status":
+        raise ValueError(f"opération inconnue : {op}")
+    return parsed
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+class ATCClient:
+    """ Client de référence (émulateur, tests) : requêtes en pipeline, réponses rapprochées par identifiant """
+    def __init__(self, name: str = "client"):
+        self.name = name
+        self.count = 0
+        self.waiting = {}
+        self.reader = self.writer = self.listener = None
+
+    async def connect(self, host: str = None, port: int = None):
+        host = config.ATC_HOST if host is None else host
+        port = config.ATC_PORT if port is None else port
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.listener = asyncio.ensure_future(self.listen())
+        return self
+
+    async def listen(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            future = self.waiting.pop(reply.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(reply)
+        for future in self.waiting.values():
+            future.set_exception(ConnectionError("service ATC déconnecté"))
+
+    async def request(self, op: str, **fields) -> dict:
+        self.count += 1
+        ident = f"{self.name}-{self.count}"
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[ident] = future
+        self.writer.write(encode({"id": ident, "op": op, **fields}))
+        return await future
+
+    async def land(self, drone: str, battery: float, priority: int = 0) -> dict:
+        return await self.request("land", drone=drone, battery=battery, priority=priority)
+
+    async def dispatch(self, mission: str = "Taxi", priority: int = 0) -> dict:
+        return await self.request("dispatch", mission=mission, priority=priority)
+
+    async def status(self) -> dict:
+        return await self.request("status")
+
+    async def close(self):
+        self.writer.close()
+        self.listener.cancel()
+
+def percentile(sorted_values: list, share: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(share * len(sorted_values)))]
+
+async def run_load(port: int, clients: int, window: int, duration: float, seed: int, scenario=None) -> dict:
+    """
+    Générateur de charge : 'clients' connexions gardent chacune 'window' requêtes en vol pendant
+    'duration' secondes (moitié atterrissages, moitié missions) ; latences mesurées côté client.
+    """
+    scenario = default_scenario() if scenario is None else scenario
+    latencies = []
+    stop_at = time.perf_counter() + duration
+
+    async def worker(client: ATCClient, rng: random.Random):
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            if rng.random() < 0.5:
+                await client.land(f"{client.name}-D{client.count}",
+                                  rng.randint(scenario.battery_start_min, scenario.battery_start_max),
+                                  2 if rng.random() < 0.2 else 0)
+            else:
+                await client.dispatch()
+            latencies.append(time.perf_counter() - start)
+
+    connections = [await ATCClient(f"emu{c}").connect(config.ATC_HOST, port) for c in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(client, random.Random(seed * 1000 + c * window + w))
+                           for c, client in enumerate(connections) for w in range(window)))
+    elapsed = time.perf_counter() - start
+    for client in connections:
+        await client.close()
+
+    latencies.sort()
+    return {"requests": len(latencies), "throughput": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 0.50) * 1000, "p99_ms": percentile(latencies, 0.99) * 1000}
+
+async def benchmark(num_pads: int, num_garage: int, clients: int, window: int, duration: float, seed: int):
+    """ Service et générateur de charge dans le même processus (port libre) """
+    service = await ATCService(num_pads, num_garage).start(port=0)
+    try:
+        # Contrôle : mêmes requêtes dans un ordre d'arrivée différent -> mêmes décisions
+        rng = random.Random(seed)
+        probe = [parse_request({"id": f"p{k}", "op": "land", "drone": f"P{k}", "battery": rng.randint(15, 45),
+                                "priority": rng.choice([0, 0, 2])}) for k in range(40)]
+        probe += [parse_request({"id": f"q{k}", "op": "dispatch"}) for k in range(4)]
+        shuffled = probe[:]
+        rng.shuffle(shuffled)
+        replies = ATCService(num_pads, num_garage).apply_batch(probe)
+        by_id = {reply["id"]: reply for reply in ATCService(num_pads, num_garage).apply_batch(shuffled)}
+        same = all(reply == by_id[reply["id"]] for reply in replies)
+
+        result = await run_load(service.port, clients, window, duration, seed)
+        print(f"--- 📡 SERVICE ATC | Pads={num_pads} Garage={num_garage} | tick {service.tick_seconds * 1000:g} ms "
+              f"| {clients} clients x {window} requêtes en vol | {duration:g}s ---")
+        print(f"Requêtes : {result['requests']:,} | débit {result['throughput']:,.0f} req/s | "
+              f"latence p50 {result['p50_ms']:.1f} ms | p99 {result['p99_ms']:.1f} ms")
+        print(f"Lots : {service.batches:,} (moyenne {service.requests / max(service.batches, 1):.1f} requêtes) | "
+              f"minute simulée {service.minute} | file {len(service.hub.approach_queue)} | crashs {service.hub.crashes}")
+        print(f"Ordre d'application indépendant de l'ordre d'arrivée : {'✅' if same else '❌'}")
+        return result
+    finally:
+        await service.stop()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="SkyHub - Service ATC (asyncio, TCP local)")
+    parser.add_argument("--pads", type=int, default=8)
+    parser.add_argument("--garage", type=int, default=57)
+    parser.add_argument("--port", type=int, default=None, help="Port d'écoute (défaut : config.ATC_PORT)")
+    parser.add_argument("--tick", type=float, default=None, help="Secondes réelles par minute simulée (défaut : config.ATC_TICK_SECONDS)")
+    parser.add_argument("--bench", action="store_true", help="Générateur de charge contre un service lancé dans le processus")
+    parser.add_argument("--clients", type=int, default=config.ATC_BENCH_CLIENTS)
+    parser.add_argument("--window", type=int, default=config.ATC_BENCH_WINDOW, help="Requêtes en vol par client")
+    parser.add_argument("--duration", type=float, default=config.ATC_BENCH_SECONDS)
+    args = parser.parse_args()
+
+    if args.tick is not None:
+        config.ATC_TICK_SECONDS = args.tick
+    if args.bench:
+        asyncio.run(benchmark(args.pads, args.garage, args.clients, args.window, args.duration, config.OPTIMIZER_SEED))
+    else:
+        async def serve():
+            service = await ATCService(args.pads, args.garage).start(port=args.port)
+            print(f"📡 Service ATC sur {config.ATC_HOST}:{service.port} | Pads={args.pads} Garage={args.garage} | "
+                  f"tick {service.tick_seconds * 1000:g} ms (Ctrl+C : arrêt)")
+            await asyncio.Event().wait()
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
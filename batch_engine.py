@@ -0,0 +1,342 @@
+"""
+MOTEUR VECTORISÉ - SKYHUB PROJECT
+Fait avancer R réplications indépendantes d'un même Vertiport en parallèle (NumPy).
+Mêmes règles que le moteur objet (Vertiport + EVTOL), appliquées minute par minute
+à toutes les réplications d'un coup.
+"""
+import math
+import numpy as np
+from evtol import EVTOL
+from vertiport import (Vertiport, battery_level, VALET_JAM_PERCENT, VALET_IDLE_PERCENT, EMERGENCY_PERCENT,
+                       DISPATCH_PERCENT, DISPATCH_URGENT_PERCENT)
+from economics import month_economics
+from scenario import default_scenario
+
+MINUTES_PER_DAY = 1440
+
+def draw_day(generators: list, day: int, scenario):
+    """
+    Demande d'une journée pour chaque réplication (un générateur par réplication), minute par minute :
+    (arrivées bool, batteries, priorités, départs bool), chacun de forme (1440, R).
+    Chaque réplication ne dépend que de sa graine, pas de la taille du lot.
+    """
+    prof_arr, prof_dep = scenario.day_profiles(day)
+    prob_arrival = np.repeat(prof_arr, 60)[:, None]
+    prob_departure = np.repeat(prof_dep, 60)[:, None]
+
+    u = np.stack([g.random((MINUTES_PER_DAY, 3)) for g in generators], axis=1)
+    batteries = np.stack([g.integers(scenario.battery_start_min, scenario.battery_start_max + 1, MINUTES_PER_DAY)
+                          for g in generators], axis=1)
+    priorities = np.where(u[:, :, 1] < 0.2, 2, 0).astype(np.int8)
+    return u[:, :, 0] < prob_arrival, batteries, priorities, u[:, :, 2] < prob_departure
+
+def stream_day(streams: list, day: int):
+    """ Même format que draw_day, lu depuis des flux pré-générés (demand.DemandStream) """
+    flags = [stream.minute_flags(day) for stream in streams]
+    return tuple(np.stack(parts, axis=1) for parts in zip(*flags))
+
+def first_free(occupied: np.ndarray):
+    """ Premier index libre de chaque ligne : (existe, index) """
+    if occupied.shape[1] == 0:
+        return np.zeros(len(occupied), dtype=bool), np.zeros(len(occupied), dtype=np.int64)
+    free = ~occupied
+    return free.any(axis=1), free.argmax(axis=1)
+
+def best_index(values: np.ndarray, candidates: np.ndarray, largest: bool):
+    """ Index du premier meilleur candidat de chaque ligne (max ou min) : (existe, index) """
+    if values.shape[1] == 0:
+        return np.zeros(len(values), dtype=bool), np.zeros(len(values), dtype=np.int64)
+    if largest:
+        idx = np.where(candidates, values, -np.inf).argmax(axis=1)
+    else:
+        idx = np.where(candidates, values, np.inf).argmin(axis=1)
+    return candidates.any(axis=1), idx
+
+class BatchVertiport:
+    """
+    État de R Vertiports identiques sous forme de tableaux.
+    Emplacements : colonnes [0, P) = pads, [P, P+G) = garage (statut implicite).
+    File d'approche : batterie, priorité et ordre d'arrivée par emplacement.
+    """
+    def __init__(self, num_replications: int, num_charging_pads: int, num_parking_spots: int, scenario=None):
+        self.scenario = default_scenario() if scenario is None else scenario
+        self.num_replications = num_replications
+        self.num_charging_pads = num_charging_pads
+        self.num_parking_spots = num_parking_spots
+
+        R = num_replications
+        S = num_charging_pads + num_parking_spots
+        self.rows = np.arange(R)
+
+        self.slot_battery = np.zeros((R, S))
+        self.slot_occupied = np.zeros((R, S), dtype=bool)
+
+        # Taille max de la file : bornée par la capacité, et par la règle d'autonomie
+        # (attente estimée <= autonomie max à l'arrivée - marge), bien plus serrée en pratique
+        scenario = self.scenario
+        max_wait = scenario.battery_start_max / scenario.consumption_per_min - scenario.safety_buffer_min
+        queue_bound = math.floor(max(max_wait, 0) * num_charging_pads / scenario.avg_cycle_time) + 2
+        Q = max(min(S, queue_bound), 1)
+        self.queue_battery = np.zeros((R, Q))
+        self.queue_priority = np.zeros((R, Q), dtype=np.int8)
+        self.queue_seq = np.zeros((R, Q), dtype=np.int64)
+        self.queue_occupied = np.zeros((R, Q), dtype=bool)
+
+        self.crashes = np.zeros(R, dtype=np.int64)
+
+        # Seuils du contrôleur dans les unités du scénario (mêmes valeurs que Vertiport)
+        self.valet_levels = np.array([battery_level(scenario, VALET_IDLE_PERCENT),      # File vide
+                                      battery_level(scenario, VALET_JAM_PERCENT)])      # File en attente
+        self.emergency_level = battery_level(scenario, EMERGENCY_PERCENT)
+        self.dispatch_level = battery_level(scenario, DISPATCH_PERCENT)
+        self.dispatch_urgent_level = battery_level(scenario, DISPATCH_URGENT_PERCENT)
+
+    @property
+    def pads_occupied(self) -> np.ndarray:
+        return self.slot_occupied[:, :self.num_charging_pads]
+
+    @property
+    def garage_occupied(self) -> np.ndarray:
+        return self.slot_occupied[:, self.num_charging_pads:]
+
+    def can_accept_drones(self, batteries: np.ndarray) -> np.ndarray:
+        """ Version vectorisée de Vertiport.can_accept_drone (capacité + autonomie) """
+        queue_size = self.queue_occupied.sum(axis=1)
+        occupants_total = queue_size + self.slot_occupied.sum(axis=1)
+        capacity_total = self.num_charging_pads + self.num_parking_spots
+        capacity_ok = occupants_total < (capacity_total - 1)
+
+        scenario = self.scenario
+        flight_time_remaining = batteries / scenario.consumption_per_min
+        throughput_per_min = self.num_charging_pads / scenario.avg_cycle_time
+        if throughput_per_min > 0:
+            estimated_wait_time = queue_size / throughput_per_min
+        else:
+            estimated_wait_time = np.full(self.num_replications, 999.0)
+
+        time_ok = ~(estimated_wait_time > (flight_time_remaining - scenario.safety_buffer_min))
+        return capacity_ok & time_ok
+
+    def add_to_approach(self, mask: np.ndarray, batteries: np.ndarray, priorities: np.ndarray, seq: int):
+        """ Ajoute un drone dans la file des réplications sélectionnées (ordre d'arrivée = seq) """
+        rows = self.rows[mask]
+        if rows.size == 0:
+            return
+        exists, idx = first_free(self.queue_occupied[rows])
+        if not exists.all():
+            # Une file pleine écraserait l'emplacement 0 : la borne Q ne couvre plus les règles d'admission
+            raise RuntimeError(f"file d'approche pleine ({self.queue_occupied.shape[1]} places) : "
+                               "borne Q sous-estimée")
+        self.queue_battery[rows, idx] = batteries[rows]
+        self.queue_priority[rows, idx] = priorities[rows]
+        self.queue_seq[rows, idx] = seq
+        self.queue_occupied[rows, idx] = True
+
+    def dispatch_missions(self, mask: np.ndarray, priority: int = 0) -> np.ndarray:
+        """ Fait décoller le drone le plus chargé (pads puis garage) ; renvoie les décollages réussis """
+        min_bat_req = self.dispatch_urgent_level if priority == 2 else self.dispatch_level
+
+        eligible = self.slot_occupied & (self.slot_battery >= min_bat_req)
+        # Premier maximum : même départage que le parcours pads -> garage
+        found, best = best_index(self.slot_battery, eligible, largest=True)
+        launched = mask & found
+
+        rows = self.rows[launched]
+        self.slot_occupied[rows, best[rows]] = False
+        return launched
+
+    def update_drones(self):
+        """ Batteries (vol / recharge) puis audit des crashs dans la file """
+        scenario = self.scenario
+        np.maximum(self.queue_battery - scenario.consumption_per_min, 0, out=self.queue_battery)
+
+        pads = self.slot_battery[:, :self.num_charging_pads]
+        np.minimum(pads + scenario.charge_rate_per_min, scenario.battery_max, out=pads)
+
+        crashed = self.queue_occupied & (self.queue_battery <= 0)
+        self.crashes += crashed.sum(axis=1)
+        self.queue_occupied &= ~crashed
+
+    def optimize_fleet_position(self):
+        """ Version vectorisée du 'Valet' : délestage Pad -> Garage, sinon recharge Garage -> Pad """
+        P = self.num_charging_pads
+        pad_battery = self.slot_battery[:, :P]
+        garage_battery = self.slot_battery[:, P:]
+
+        # A. Pad -> Garage (le plus chargé au-dessus du seuil)
+        has_garage, garage_idx = first_free(self.garage_occupied)
+        threshold = self.valet_levels[self.queue_occupied.any(axis=1).astype(np.intp)]
+        candidates = self.pads_occupied & (pad_battery >= threshold[:, None])
+        found, pad_idx = best_index(pad_battery, candidates, largest=True)
+        move_a = has_garage & found
+
+        rows = self.rows[move_a]
+        self.slot_battery[rows, P + garage_idx[rows]] = pad_battery[rows, pad_idx[rows]]
+        self.slot_occupied[rows, P + garage_idx[rows]] = True
+        self.slot_occupied[rows, pad_idx[rows]] = False
+
+        # B. Garage -> Pad (le moins chargé), seulement si A n'a rien déplacé
+        has_pad, free_pad_idx = first_free(self.pads_occupied)
+        candidates = self.garage_occupied & (garage_battery < self.scenario.battery_max)
+        found, src_idx = best_index(garage_battery, candidates, largest=False)
+        move_b = ~move_a & has_pad & found
+
+        rows = self.rows[move_b]
+        self.slot_battery[rows, free_pad_idx[rows]] = garage_battery[rows, src_idx[rows]]
+        self.slot_occupied[rows, free_pad_idx[rows]] = True
+        self.slot_occupied[rows, P + src_idx[rows]] = False
+
+    def run_landing_logic(self):
+        """
+        Atterrissage de la tête de file : priorité max, puis batterie min, puis ordre d'arrivée
+        (c'est l'ordre que produit le tri stable de Vertiport.run_landing_logic).
+        """
+        occupied = self.queue_occupied
+        has_queue = occupied.any(axis=1)
+        if not has_queue.any():
+            return
+
+        top_priority = np.where(occupied, self.queue_priority, -1).max(axis=1)
+        heads = occupied & (self.queue_priority == top_priority[:, None])
+        min_battery = np.where(heads, self.queue_battery, np.inf).min(axis=1)
+        heads &= self.queue_battery == min_battery[:, None]
+        head = np.where(heads, self.queue_seq, np.iinfo(np.int64).max).argmin(axis=1)
+
+        head_battery = self.queue_battery[self.rows, head]
+        head_priority = self.queue_priority[self.rows, head]
+
+        # 1. Essai Pad
+        has_pad, pad_idx = first_free(self.pads_occupied)
+        to_pad = has_queue & has_pad
+
+        # 2. Essai Garage (Si urgence ou passagers)
+        has_garage, garage_idx = first_free(self.garage_occupied)
+        to_garage = has_queue & ~has_pad & has_garage & ((head_priority > 0) | (head_battery < self.emergency_level))
+
+        slot_idx = np.where(to_pad, pad_idx, self.num_charging_pads + garage_idx)
+        rows = self.rows[to_pad | to_garage]
+        self.slot_battery[rows, slot_idx[rows]] = head_battery[rows]
+        self.slot_occupied[rows, slot_idx[rows]] = True
+        self.queue_occupied[rows, head[rows]] = False
+
+    def update_simulation(self):
+        """ Mise à jour d'un tick de simulation pour toutes les réplications """
+        self.update_drones()
+        self.optimize_fleet_position()
+        self.run_landing_logic()
+
+def run_batch_month_simulation(num_pads: int, num_garage: int, seeds: list = None, demand: list = None,
+                               scenario=None) -> list:
+    """
+    Simule une réplication par graine (ou par flux de demande pré-généré), toutes en parallèle.
+    Renvoie la liste des (profit, vols, refus, crashs), dans l'ordre des graines / flux.
+    """
+    scenario = default_scenario() if scenario is None else scenario
+    if demand is not None:
+        replications = len(demand)
+        days = demand[0].days
+        next_day = lambda day: stream_day(demand, day)
+    else:
+        replications = len(seeds)
+        days = scenario.sim_duration_days
+        generators = [np.random.default_rng(seed) for seed in seeds]
+        next_day = lambda day: draw_day(generators, day, scenario)
+
+    hub = BatchVertiport(replications, num_pads, num_garage, scenario)
+    flights = np.zeros(replications, dtype=np.int64)
+    refusals = np.zeros(replications, dtype=np.int64)
+
+    for day in range(days):
+        arrivals, batteries, priorities, departures = next_day(day)
+
+        for m in range(MINUTES_PER_DAY):
+            # 1. GESTION DES ARRIVÉES
+            if arrivals[m].any():
+                accepted = arrivals[m] & hub.can_accept_drones(batteries[m])
+                refusals += arrivals[m] & ~accepted
+                hub.add_to_approach(accepted, batteries[m], priorities[m], day * MINUTES_PER_DAY + m)
+
+            # 2. GESTION DES DÉPARTS
+            if departures[m].any():
+                flights += hub.dispatch_missions(departures[m], 0)
+
+            # 3. MISE À JOUR
+            hub.update_simulation()
+
+    return [(month_economics(num_pads, num_garage, int(f), int(c), days, scenario), int(f), int(r), int(c))
+            for f, r, c in zip(flights, refusals, hub.crashes)]
+
+def run_reference_simulation(num_pads: int, num_garage: int, seed: int, scenario=None) -> tuple:
+    """
+    Moteur objet (Vertiport + EVTOL) alimenté par les MÊMES tirages qu'une réplication
+    de run_batch_month_simulation : sert de référence pour le test de conformité.
+    """
+    scenario = default_scenario() if scenario is None else scenario
+    generators = [np.random.default_rng(seed)]
+    hub = Vertiport("ParisHub", num_pads, num_garage, verbose=False, scenario=scenario)
+    drone_counter = 1
+    flights = 0
+    refusals = 0
+
+    for day in range(scenario.sim_duration_days):
+        arrivals, batteries, priorities, departures = draw_day(generators, day, scenario)
+
+        for m in range(MINUTES_PER_DAY):
+            if arrivals[m, 0]:
+                battery = int(batteries[m, 0])
+
+                if hub.can_accept_battery(battery):
+                    temp_drone = EVTOL(drone_counter, scenario)
+                    temp_drone.current_battery = battery
+                    temp_drone.mission_priority = int(priorities[m, 0])
+                    hub.add_to_approach(temp_drone)
+                    drone_counter += 1
+                else:
+                    refusals += 1
+
+            if departures[m, 0]:
+                if hub.dispatch_mission("Taxi", 0):
+                    flights += 1
+
+            hub.update_simulation()
+
+    return month_economics(num_pads, num_garage, flights, hub.crashes, scenario=scenario), flights, refusals, hub.crashes
+
+def check_conformance(configurations, replications: int = 4, seed: int = 0, scenario=None) -> bool:
+    """ Compare, réplication par réplication, le moteur vectorisé au moteur objet """
+    conform = True
+    for pads, garage in configurations:
+        seeds = [seed + rep for rep in range(replications)]
+        batch = run_batch_month_simulation(pads, garage, seeds, scenario=scenario)
+        for s, batch_result in zip(seeds, batch):
+            reference = run_reference_simulation(pads, garage, s, scenario)
+            ok = reference == batch_result
+            conform &= ok
+            print(f"Pads={pads} Garage={garage:<2} graine={s:<3} | objet={reference} | vectorisé={batch_result} | {'OK' if ok else '❌ ÉCART'}")
+    return conform
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    # Test de conformité court (configurations saturées, confortables et sans garage)
+    week = default_scenario().replace(sim_duration_days=7)
+    conform = check_conformance([(1, 3), (2, 6), (4, 12), (8, 57), (3, 0)], scenario=week)
+    # Le scénario de référence ne crashe jamais : drones gourmands sans marge de sécurité pour auditer les crashs
+    crash_scenario = week.replace(consumption_per_min=10.0, safety_buffer_min=0.0)
+    conform &= check_conformance([(4, 12), (6, 40)], scenario=crash_scenario)
+    print(f"--- CONFORMITÉ : {'OK' if conform else 'ÉCHEC'} ---")
+
+    # Débit comparé (drone-minutes simulées : une minute de Vertiport par réplication)
+    short = default_scenario().replace(sim_duration_days=2)
+    replications = 256
+    start = time.perf_counter()
+    run_batch_month_simulation(8, 57, list(range(replications)), scenario=short)
+    batch_rate = replications * short.sim_duration_days * MINUTES_PER_DAY / (time.perf_counter() - start)
+    start = time.perf_counter()
+    run_reference_simulation(8, 57, 0, short)
+    reference_rate = short.sim_duration_days * MINUTES_PER_DAY / (time.perf_counter() - start)
+    print(f"Moteur objet : {reference_rate:,.0f} min/s | Vectorisé (R={replications}) : {batch_rate:,.0f} min/s "
+          f"(x{batch_rate / reference_rate:.1f})")
+
+    sys.exit(0 if conform else 1)
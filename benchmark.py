@@ -0,0 +1,354 @@
+"""
+BENCHMARKS - SKYHUB PROJECT
+Suite de référence (graines fixes) : débit du moteur objet (minutes simulées et mises à jour de
+drones par seconde) selon la taille du hub et le multiplicateur de trafic, coût d'une cellule
+(run_month_simulation) et durée complète de la grille. Les résultats sont écrits en JSON et
+comparés à une référence enregistrée : un écart au-delà de la tolérance est une régression.
+Démarrage (--startup) : surcoût d'import de skyhub.py et de ses sous-commandes de calcul, puis
+modules lourds chargés par une courte simulation réelle (simulate ; optimize n'est vérifié qu'au chargement).
+Micro-benchmarks (--micro) : coût des opérations du Vertiport selon la taille de l'infrastructure.
+"""
+import os
+import io
+import sys
+import json
+import time
+import timeit
+import platform
+import tempfile
+import contextlib
+import subprocess
+import tracemalloc
+import config
+from evtol import EVTOL, EN_RECHARGE, AU_REPOS
+from vertiport import Vertiport
+from scenario import default_scenario
+
+SCALING_SIZES = [(4, 20), (40, 200), (400, 2000), (2000, 10000)]
+SUITE_HUBS = [("petit", 2, 10), ("paris", 8, 57), ("geant", 400, 2000)]
+SUITE_SCALES = [0.5, 1.0, 2.0, 4.0]
+STARTUP_COMMANDS = ("optimize", "simulate")     # Sous-commandes de calcul (skyhub.py) dont le démarrage est mesuré
+STARTUP_HEAVY = ("pygame", "numpy", "concurrent.futures", "sqlite3")   # Interdits au démarrage du chemin de calcul
+# Courtes exécutions réelles (arguments de skyhub.py) : les imports paresseux ne doivent pas non plus
+# charger de module lourd une fois la commande lancée. optimize n'y figure pas (une grille entière).
+STARTUP_RUNS = {"simulate-1j": ["simulate", "--days", "1", "--pads", "2", "--garage", "6"]}
+
+def filled_vertiport(num_pads: int, num_garage: int) -> Vertiport:
+    """ Vertiport presque plein : seule la dernière place de chaque zone est libre (pire cas d'un balayage) """
+    hub = Vertiport("Bench", num_pads, num_garage, verbose=False)
+    for slots in (hub.charging_pads, hub.parking_spots):
+        for i in range(len(slots) - 1):
+            drone = EVTOL(f"B{i}", hub.scenario)
+            drone.current_battery = float(20 + (i * 7) % 80)
+            drone.status = EN_RECHARGE if slots is hub.charging_pads else AU_REPOS
+            hub.occupy_slot(slots, i, drone)
+    return hub
+
+def scan_occupants(hub: Vertiport) -> int:
+    """ Comptage par balayage, tel que le faisait can_accept_drone avant les compteurs """
+    return len(hub.approach_queue) + \
+           len([d for d in hub.charging_pads if d]) + \
+           len([d for d in hub.parking_spots if d])
+
+def scan_free_index(location_list: list) -> int:
+    """ Recherche linéaire de la première place libre (ancienne find_free_index) """
+    for i in range(len(location_list)):
+        if location_list[i] is None:
+            return i
+    return -1
+
+def scan_fullest(hub: Vertiport):
+    """ Drone le plus chargé par balayage des pads puis du garage (ancienne dispatch_mission) """
+    best = None
+    for current_list in [hub.charging_pads, hub.parking_spots]:
+        for d in current_list:
+            if d and (best is None or d.current_battery > best.current_battery):
+                best = d
+    return best
+
+def per_call_us(stmt, number: int) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=3)) / number * 1e6
+
+def bench_vertiport_scaling(sizes=SCALING_SIZES):
+    """ Temps par appel (µs) des opérations d'admission, de placement et d'un tick complet """
+    print(f"{'PADS':>6} {'GARAGE':>7} | {'ADMISSION':>10} {'(balayage)':>11} | {'PLACE LIBRE':>11} {'(balayage)':>11} | "
+          f"{'OCCUPER+LIBÉRER':>15} | {'PLUS CHARGÉ':>11} {'(balayage)':>11} | {'TICK COMPLET':>12}")
+    for num_pads, num_garage in sizes:
+        hub = filled_vertiport(num_pads, num_garage)
+        incoming = EVTOL("IN", hub.scenario)
+        incoming.current_battery = 40.0
+        drone = EVTOL("X", hub.scenario)
+
+        def place_and_release():
+            idx = hub.find_free_index(hub.parking_spots)
+            hub.occupy_slot(hub.parking_spots, idx, drone)
+            hub.release_slot(hub.parking_spots, idx)
+
+        admission = per_call_us(lambda: hub.can_accept_drone(incoming), 20000)
+        admission_scan = per_call_us(lambda: scan_occupants(hub), 200)
+        free_index = per_call_us(lambda: hub.find_free_index(hub.parking_spots), 20000)
+        free_index_scan = per_call_us(lambda: scan_free_index(hub.parking_spots), 200)
+        occupy = per_call_us(place_and_release, 20000)
+        fullest = per_call_us(lambda: (hub.fullest_pad(), hub.fullest_spot(), hub.emptiest_spot()), 20000)
+        fullest_scan = per_call_us(lambda: scan_fullest(hub), 200)
+        tick = per_call_us(hub.update_simulation, 20)
+
+        print(f"{num_pads:>6} {num_garage:>7} | {admission:>10.2f} {admission_scan:>11.1f} | "
+              f"{free_index:>11.2f} {free_index_scan:>11.1f} | {occupy:>15.2f} | "
+              f"{fullest:>11.2f} {fullest_scan:>11.1f} | {tick:>12.0f}")
+
+def bytes_per_drone(count: int = 10000, scenario=None) -> float:
+    """ Empreinte mémoire moyenne d'un drone (tracemalloc), scénario partagé par toute la flotte """
+    scenario = default_scenario() if scenario is None else scenario
+    tracemalloc.start()
+    fleet = [EVTOL(i, scenario) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(fleet)
+
+def bench_arrivals():
+    """ Coût d'une arrivée refusée : drone construit avant le contrôle (ancien) ou contrôle sur la batterie seule """
+    hub = filled_vertiport(4, 20)
+    counter = iter(range(10 ** 9))
+
+    def eager():
+        drone = EVTOL(f"D{next(counter)}", hub.scenario)
+        drone.current_battery = 40
+        return hub.can_accept_drone(drone)
+
+    print(f"Arrivée refusée : {per_call_us(eager, 100000):.2f} µs (drone construit) | "
+          f"{per_call_us(lambda: hub.can_accept_battery(40), 100000):.2f} µs (batterie seule)")
+    print(f"Empreinte d'un drone : {bytes_per_drone(scenario=hub.scenario):.0f} octets")
+
+# --- Suite de référence ---
+
+class DroneCounter:
+    """ Observateur (hub.metrics) qui compte les drones mis à jour à chaque minute """
+    def __init__(self):
+        self.updates = 0
+
+    def record_minute(self, hub):
+        self.updates += len(hub.approach_queue) + hub.occupied_pads + hub.occupied_spots
+
+    def record_landing(self, drone): pass
+    def record_refusal(self): pass
+    def record_crash(self): pass
+
+def best_time(function, repeat: int) -> float:
+    """ Meilleure durée (s) sur 'repeat' exécutions """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def measure(value: float, unit: str, higher_is_better: bool) -> dict:
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+def bench_engine_throughput(scenario, seed: int, repeat: int, hubs=SUITE_HUBS, scales=SUITE_SCALES) -> dict:
+    """
+    Débit de Vertiport.update_simulation (moteur objet, demande rejouée : le tirage aléatoire
+    n'est pas mesuré). Une première exécution, non chronométrée, compte les mises à jour de drones.
+    """
+    from demand import generate_demand_stream
+    from optimizer import derive_seed, replay_month_simulation
+    results = {}
+    print(f"{'HUB':<7} {'PADS':>5} {'GARAGE':>6} {'TRAFIC':>7} | {'MIN/S':>9} | {'DRONES/S':>11}")
+    for scale in scales:
+        stream = generate_demand_stream(derive_seed(seed, "benchmark", scale), scale=scale, scenario=scenario)
+        for name, pads, garage in hubs:
+            counter = DroneCounter()
+            replay_month_simulation(pads, garage, stream, scenario, counter)
+            elapsed = best_time(lambda: replay_month_simulation(pads, garage, stream, scenario), repeat)
+
+            minutes_per_s = stream.duration / elapsed
+            updates_per_s = counter.updates / elapsed
+            key = f"debit/{name}/x{scale:g}"
+            results[f"{key}/minutes_par_s"] = measure(minutes_per_s, "min/s", True)
+            results[f"{key}/drones_par_s"] = measure(updates_per_s, "drones/s", True)
+            print(f"{name:<7} {pads:>5} {garage:>6} {scale:>6g}x | {minutes_per_s:>9,.0f} | {updates_per_s:>11,.0f}")
+    return results
+
+def bench_cell_cost(scenario, seed: int, repeat: int) -> dict:
+    """ Coût d'une cellule (run_month_simulation, graine dérivée comme dans l'optimiseur) """
+    from optimizer import derive_seed, run_month_simulation
+    grid = scenario.grid()
+    cells = sorted({grid[0], (8, 57), grid[-1]})
+    results = {}
+    for pads, garage in cells:
+        cell_seed = derive_seed(seed, pads, garage)
+        elapsed = best_time(lambda: run_month_simulation(pads, garage, cell_seed, scenario), repeat)
+        results[f"cellule/{pads}x{garage}/s"] = measure(elapsed, "s", False)
+        print(f"Cellule Pads={pads} Garage={garage} : {elapsed * 1000:.0f} ms")
+    return results
+
+def bench_grid(scenario, seed: int, workers: int) -> dict:
+    """ Durée de bout en bout de la grille (main_grid, sortie console et best_params écartés) """
+    from optimizer import main_grid
+    cells = len(scenario.grid())
+    with tempfile.TemporaryDirectory(prefix="skyhub_bench_") as tmp, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        main_grid(workers, seed, "object", scenario=scenario, params_path=os.path.join(tmp, "best_params.json"))
+        elapsed = time.perf_counter() - start
+    print(f"Grille complète : {cells} cellules en {elapsed:.1f}s ({workers} worker(s))")
+    return {f"grille/{workers}w/s": measure(elapsed, "s", False)}
+
+def bench_startup(repeat: int = None) -> tuple:
+    """
+    Démarrage à froid (nouveau processus, meilleure de 'repeat' mesures) : surcoût d'import de
+    « skyhub.py --help » et de chaque sous-commande de calcul par rapport à l'interpréteur seul.
+    Chaque STARTUP_RUNS est ensuite exécutée une fois pour de bon (sortie masquée, non chronométrée).
+    Renvoie (mesures, {sous-commande ou exécution: modules lourds chargés}).
+    """
+    repeat = config.BENCHMARK_STARTUP_REPEAT if repeat is None else repeat
+    here = os.path.dirname(os.path.abspath(__file__))
+    def run(code):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True, check=True).stdout
+        return time.perf_counter() - start, out.strip()
+
+    interpreter = min(run("pass")[0] for _ in range(repeat))
+    print(f"Interpréteur seul : {interpreter * 1000:.0f} ms")
+    results, heavy = {}, {}
+    for name in ("aide",) + STARTUP_COMMANDS:
+        load = "" if name == "aide" else f"skyhub.load({name!r}); "
+        code = f"import sys, skyhub; {load}print(','.join(m for m in {STARTUP_HEAVY!r} if m in sys.modules))"
+        runs = [run(code) for _ in range(repeat)]
+        overhead = (min(elapsed for elapsed, _ in runs) - interpreter) * 1000
+        loaded = runs[0][1]
+        results[f"demarrage/{name}/ms"] = measure(overhead, "ms", False)
+        print(f"skyhub {name:<9} : +{overhead:.0f} ms | modules lourds : {loaded or 'aucun'}")
+        if loaded:
+            heavy[name] = loaded
+    for name, argv in STARTUP_RUNS.items():
+        code = (f"import sys, io, contextlib, skyhub\n"
+                f"with contextlib.redirect_stdout(io.StringIO()): skyhub.main({argv!r})\n"
+                f"print(','.join(m for m in {STARTUP_HEAVY!r} if m in sys.modules))")
+        loaded = run(code)[1]
+        print(f"skyhub {' '.join(argv)} (exécution) : modules lourds : {loaded or 'aucun'}")
+        if loaded:
+            heavy[name] = loaded
+    return results, heavy
+
+def environment(days: int, seed: int, repeat: int, workers: int) -> dict:
+    """ Contexte de la mesure : deux résultats ne se comparent qu'à contexte égal """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"date": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": commit, "python": platform.python_version(),
+            "machine": platform.machine(), "processeur": platform.processor(), "cpus": os.cpu_count(),
+            "jours": days, "graine": seed, "repetitions": repeat, "workers": workers}
+
+def run_suite(days: int = None, seed: int = None, repeat: int = None, workers: int = 1, grid: bool = True) -> dict:
+    """ Suite complète ; renvoie {"environnement": ..., "mesures": {nom: mesure}} """
+    days = config.BENCHMARK_DAYS if days is None else days
+    seed = config.OPTIMIZER_SEED if seed is None else seed
+    repeat = config.BENCHMARK_REPEAT if repeat is None else repeat
+    scenario = default_scenario().replace(sim_duration_days=days)
+
+    print(f"--- DÉBIT DU MOTEUR ({days} jours simulés, meilleure de {repeat} exécutions) ---")
+    results = bench_engine_throughput(scenario, seed, repeat)
+    print("--- COÛT PAR CELLULE ---")
+    results.update(bench_cell_cost(scenario, seed, repeat))
+    if grid:
+        print("--- GRILLE DE BOUT EN BOUT ---")
+        results.update(bench_grid(scenario, seed, workers))
+    print("--- DÉMARRAGE DES COMMANDES ---")
+    results.update(bench_startup()[0])
+    return {"environnement": environment(days, seed, repeat, workers), "mesures": results}
+
+def compare(report: dict, baseline: dict, tolerance: float = None) -> list:
+    """ Affiche l'écart de chaque mesure à la référence ; renvoie les noms des régressions (None : non comparable) """
+    tolerance = config.BENCHMARK_TOLERANCE if tolerance is None else tolerance
+    def differs(field):
+        return report["environnement"].get(field) != baseline["environnement"].get(field)
+
+    # Autre charge de travail : les durées ne sont pas comparables
+    for field in ("jours", "graine", "workers"):
+        if differs(field):
+            print(f"⚠️ Comparaison impossible : référence mesurée avec {field} = "
+                  f"{baseline['environnement'].get(field)} (actuel : {report['environnement'].get(field)})")
+            return None
+    # Autre machine : comparable, mais à lire avec prudence
+    for field in ("machine", "processeur", "cpus", "python"):
+        if differs(field):
+            print(f"⚠️ Référence mesurée dans un autre contexte ({field} : "
+                  f"{baseline['environnement'].get(field)} -> {report['environnement'].get(field)})")
+
+    regressions = []
+    print(f"{'MESURE':<32} | {'RÉFÉRENCE':>12} | {'ACTUEL':>12} | {'ÉCART':>7} |")
+    for name, current in report["mesures"].items():
+        reference = baseline["mesures"].get(name)
+        if reference is None or not reference["value"]:
+            print(f"{name:<32} | {'-':>12} | {current['value']:>12,.3f} | {'':>7} | nouvelle")
+            continue
+        change = current["value"] / reference["value"] - 1
+        # Écart orienté : négatif = plus lent, quelle que soit l'unité
+        gain = change if current["higher_is_better"] else -change
+        status = ""
+        if gain < -tolerance:
+            status = "⚠️ RÉGRESSION"
+            regressions.append(name)
+        elif gain > tolerance:
+            status = "🚀 AMÉLIORATION"
+        print(f"{name:<32} | {reference['value']:>12,.3f} | {current['value']:>12,.3f} | {change:>+7.1%} | {status}")
+    return regressions
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="SkyHub - Benchmarks")
+    parser.add_argument("--micro", action="store_true", help="Micro-benchmarks des opérations du Vertiport (pas de JSON)")
+    parser.add_argument("--startup", action="store_true", help="Démarrage des commandes seul (code 1 si un module lourd est chargé) : "
+                        "imports au chargement de chaque commande, plus une courte exécution réelle de simulate "
+                        "(optimize n'est vérifié qu'au chargement)")
+    parser.add_argument("--days", type=int, default=None, help="Jours simulés par mesure (défaut : config.BENCHMARK_DAYS)")
+    parser.add_argument("--seed", type=int, default=None, help="Graine (défaut : config.OPTIMIZER_SEED)")
+    parser.add_argument("--repeat", type=int, default=None, help="Répétitions par mesure (défaut : config.BENCHMARK_REPEAT)")
+    parser.add_argument("--workers", type=int, default=1, help="Processus de la grille de bout en bout")
+    parser.add_argument("--no-grid", action="store_true", help="Saute la grille de bout en bout")
+    parser.add_argument("--output", default="benchmark_results.json", help="Résultats JSON")
+    parser.add_argument("--baseline", default=config.BENCHMARK_BASELINE_PATH, help="Référence à comparer")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistre ces résultats comme nouvelle référence")
+    parser.add_argument("--tolerance", type=float, default=None, help="Écart relatif toléré (défaut : config.BENCHMARK_TOLERANCE)")
+    args = parser.parse_args()
+
+    if args.micro:
+        print("--- ARRIVÉES ET EMPREINTE DE LA FLOTTE ---")
+        bench_arrivals()
+
+        print("--- SCALABILITÉ DU VERTIPORT (µs par appel) ---")
+        bench_vertiport_scaling()
+        sys.exit(0)
+
+    if args.startup:
+        print(f"--- DÉMARRAGE DES COMMANDES (meilleure de {config.BENCHMARK_STARTUP_REPEAT} mesures) ---")
+        _, heavy = bench_startup()
+        for name, modules in heavy.items():
+            print(f"⚠️ skyhub {name} importe au démarrage : {modules}")
+        sys.exit(1 if heavy else 0)
+
+    report = run_suite(args.days, args.seed, args.repeat, args.workers, grid=not args.no_grid)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Résultats sauvegardés dans {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Nouvelle référence : {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"--- COMPARAISON À LA RÉFÉRENCE ({baseline['environnement'].get('commit')}, "
+              f"{baseline['environnement'].get('date')}) ---")
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} régression(s) au-delà de la tolérance")
+            sys.exit(1)
+        if regressions is not None:
+            print("✅ Aucune régression")
+    else:
+        print(f"ℹ️ Pas de référence ({args.baseline}) : --save-baseline pour en enregistrer une")
@@ -0,0 +1,146 @@
+"""
+ANALYSE DE CAPACITÉ - SKYHUB PROJECT
+Pour chaque configuration (pads, garage), cherche par bisection le plus grand multiplicateur de
+trafic (appliqué aux profils horaires d'arrivée et de départ) qui reste sans crash et sous le
+budget de refus. Les bisections de toutes les cellules avancent ensemble : chaque manche lance
+une sonde par cellule, en parallèle. Résultat : la frontière capacité / coût.
+
+Toutes les cellules et toutes les échelles rejouent les mêmes graines de demande (demand.py) :
+à graine égale, le trafic d'une petite échelle est inclus dans celui d'une plus grande.
+La bisection suppose qu'un trafic soutenable le reste à plus faible échelle ; ce n'est vrai qu'en
+tendance (les départs croissent avec les arrivées), d'où un résultat à lire à la tolérance près.
+"""
+import math
+import config
+from economics import monthly_capex
+from optimizer import derive_seed, run_tasks, replay_month_simulation
+from scenario import default_scenario
+
+def evaluate_scaled(task):
+    """ Point d'entrée d'un worker : (clé, (résultat, arrivées)) pour un flux tiré à l'échelle demandée """
+    from demand import generate_demand_stream
+    key, pads, garage, seed, scale, engine, scenario = task
+    stream = generate_demand_stream(seed, scale=scale, scenario=scenario)
+    if engine == "event":
+        from event_engine import run_event_month_simulation
+        result = run_event_month_simulation(pads, garage, demand=stream, scenario=scenario)
+    elif engine == "batch":
+        from batch_engine import run_batch_month_simulation
+        result = run_batch_month_simulation(pads, garage, demand=[stream], scenario=scenario)[0]
+    else:
+        result = replay_month_simulation(pads, garage, stream, scenario)
+    return key, (result, len(stream.arrival_minutes))
+
+def failure_reason(outcomes) -> str:
+    """ None si le trafic est soutenable sur toutes les réplications, sinon la limite atteinte """
+    if any(result[3] > 0 for result, _ in outcomes):
+        return "crash"
+    refusals = sum(result[2] for result, _ in outcomes)
+    arrivals = sum(arrivals for _, arrivals in outcomes)
+    if arrivals and refusals / arrivals > config.CAPACITY_REFUSAL_BUDGET:
+        return "refus"
+    return None
+
+class CapacityBracket:
+    """ Encadrement du multiplicateur maximal d'une cellule : lo soutenable, hi non soutenable """
+    def __init__(self, lo: float, hi: float):
+        self.lo = lo
+        self.hi = hi
+        self.reason = None      # Limite atteinte à hi ("crash" ou "refus")
+        self.below_range = False
+
+    @property
+    def capacity(self) -> float:
+        return 0.0 if self.below_range else self.lo
+
+    def done(self, tolerance: float) -> bool:
+        return self.below_range or self.reason is None or self.hi - self.lo <= tolerance
+
+def probe(scales: dict, master_seed: int, replications: int, workers, engine: str, scenario=None) -> dict:
+    """ Une manche : {cellule: échelle} -> {cellule: raison d'échec ou None}, toutes cellules en parallèle """
+    scenario = default_scenario() if scenario is None else scenario
+    seeds = [derive_seed(master_seed, "demand", rep) for rep in range(replications)]
+    tasks = [((cell, rep), cell[0], cell[1], seeds[rep], scale, engine, scenario)
+             for cell, scale in scales.items() for rep in range(replications)]
+    outcomes = dict(run_tasks(tasks, workers, evaluate_scaled))
+    return {cell: failure_reason([outcomes[(cell, rep)] for rep in range(replications)]) for cell in scales}
+
+def find_capacities(cells, master_seed: int, replications: int = 1, workers=1, engine: str = "object",
+                    scenario=None):
+    """ Bisection simultanée sur toutes les cellules ; renvoie ({cellule: CapacityBracket}, simulations) """
+    lo, hi = config.CAPACITY_SCALE_MIN, config.CAPACITY_SCALE_MAX
+    brackets = {cell: CapacityBracket(lo, hi) for cell in cells}
+
+    # Manche 0 : les deux bornes de l'intervalle
+    at_lo = probe({cell: lo for cell in cells}, master_seed, replications, workers, engine, scenario)
+    at_hi = probe({cell: hi for cell in cells}, master_seed, replications, workers, engine, scenario)
+    simulations = 2 * len(cells) * replications
+    for cell, bracket in brackets.items():
+        bracket.reason = at_hi[cell]
+        if bracket.reason is None:
+            bracket.lo = hi
+        if at_lo[cell] is not None:
+            bracket.below_range, bracket.reason = True, at_lo[cell]
+
+    rounds = 0
+    while True:
+        active = [cell for cell, b in brackets.items() if not b.done(config.CAPACITY_TOLERANCE)]
+        if not active:
+            break
+        rounds += 1
+        print(f"🔁 Manche {rounds} : {len(active)} cellules en cours", flush=True)
+
+        middles = {cell: (brackets[cell].lo + brackets[cell].hi) / 2 for cell in active}
+        reasons = probe(middles, master_seed, replications, workers, engine, scenario)
+        simulations += len(active) * replications
+        for cell in active:
+            if reasons[cell] is None:
+                brackets[cell].lo = middles[cell]
+            else:
+                brackets[cell].hi, brackets[cell].reason = middles[cell], reasons[cell]
+
+    return brackets, simulations
+
+def capacity_frontier(brackets: dict, scenario=None) -> list:
+    """ Cellules non dominées : aucune cellule moins chère n'absorbe autant de trafic """
+    frontier = []
+    best = -math.inf
+    for cell in sorted(brackets, key=lambda c: (monthly_capex(*c, scenario), -brackets[c].capacity)):
+        if brackets[cell].capacity > best:
+            frontier.append(cell)
+            best = brackets[cell].capacity
+    return frontier
+
+def main_capacity(workers, seed: int, replications: int, engine: str, scenario=None):
+    """ Multiplicateur de trafic maximal de chaque cellule de la grille et frontière capacité / coût """
+    scenario = default_scenario() if scenario is None else scenario
+    print(f"--- 📈 SKYHUB CAPACITÉ (croissance du trafic) | Scénario : {scenario.name} ---")
+    print(f"Simulation sur {scenario.sim_duration_days} jours | {replications} réplication(s)/sonde | "
+          f"Multiplicateur dans [{config.CAPACITY_SCALE_MIN}, {config.CAPACITY_SCALE_MAX}] à ±{config.CAPACITY_TOLERANCE}")
+    print(f"Critères : aucun crash, refus ≤ {config.CAPACITY_REFUSAL_BUDGET:.0%} des arrivées | "
+          f"Graine maître : {seed} | Workers : {workers} | Moteur : {engine}")
+
+    cells = scenario.grid()
+    brackets, simulations = find_capacities(cells, seed, replications, workers, engine, scenario)
+    frontier = set(capacity_frontier(brackets, scenario))
+
+    print("-" * 80)
+    print(f"{'CONFIG':<18} | {'CAPEX / MOIS':<13} | {'TRAFIC MAX':<11} | {'LIMITE':<7} | {'FRONTIÈRE'}")
+    print("-" * 80)
+    for cell in sorted(cells, key=lambda c: monthly_capex(*c, scenario)):
+        b = brackets[cell]
+        if b.below_range:
+            capacity = f"< x{config.CAPACITY_SCALE_MIN:.2f}"
+        elif b.reason is None:
+            capacity = f"≥ x{b.lo:.2f}"
+        else:
+            capacity = f"x{b.lo:.2f}"
+        print(f"Pads={cell[0]} Garage={cell[1]:<2} | {monthly_capex(*cell, scenario):>11,.0f}€ | {capacity:<11} | "
+              f"{b.reason or '—':<7} | {'⭐' if cell in frontier else ''}")
+
+    # Une grille complète par niveau de trafic, à la même précision, aurait coûté :
+    levels = math.ceil((config.CAPACITY_SCALE_MAX - config.CAPACITY_SCALE_MIN) / config.CAPACITY_TOLERANCE) + 1
+    print("-" * 80)
+    print(f"🎲 Simulations : {simulations} (une grille par niveau de trafic à ±{config.CAPACITY_TOLERANCE} : "
+          f"{levels * len(cells) * replications})")
+    return sorted(frontier, key=lambda c: monthly_capex(*c, scenario))
@@ -3,7 +3,6 @@ CONFIGURATION GLOBALE - SKYHUB PROJECT (Mode Pendulaire)
 Profils distincts pour les arrivées (Matin) et les départs (Soir).
 """
 import math
-import statistics
 
 # --- 1. PARAMÈTRES DU DRONE (EVTOL) ---
 BATTERY_MAX = 100.0             
@@ -28,7 +27,74 @@ COST_CRASH_PENALTY = 500000.0
 # --- 4. PARAMÈTRES DE SIMULATION ---
 SIM_DURATION_DAYS = 28          
 
-# --- 5. PROFILS DE TRAFIC (ARRIVÉES vs DÉPARTS) ---
+# --- 5. PARAMÈTRES DE L'OPTIMISEUR ---
+OPTIMIZER_SEED = 42             # Graine maître (chaque cellule en dérive la sienne)
+OPTIMIZER_WORKERS = 1           # Nombre de processus (1 = exécution en série)
+REPLICATIONS = 1                # Réplications Monte Carlo par configuration
+CONFIDENCE_LEVEL = 0.95         # Niveau des intervalles de confiance
+RACE_MIN_REPLICATIONS = 5       # Réplications avant la première élimination (mode course)
+RACE_BATCH_REPLICATIONS = 2     # Réplications ajoutées à chaque manche de la course
+OPTIMIZER_ENGINE = "object"     # "object" (pas fixe), "batch" (NumPy, réplications en lot) ou "event" (événements discrets)
+COMMON_RANDOM_NUMBERS = False   # True = toutes les configs rejouent le même flux de demande
+OPTIMIZER_SEARCH = "grid"       # "grid" (toutes les cellules) ou "structured" (bisection + section dorée, voir search.py)
+CAPACITY_SCALE_MIN = 0.5        # Bornes de la bisection sur le multiplicateur de trafic (mode capacité)
+CAPACITY_SCALE_MAX = 5.0
+CAPACITY_TOLERANCE = 0.05       # Précision du multiplicateur maximal soutenable
+CAPACITY_REFUSAL_BUDGET = 0.20  # Part maximale d'arrivées refusées pour qu'un trafic soit jugé soutenable
+RESULT_CACHE = False            # True = réutilise les résultats physiques déjà simulés (re-chiffrage seul)
+RESULT_CACHE_PATH = "skyhub_results.sqlite"
+RESULT_CACHE_MAX_ENTRIES = 200000   # Au-delà, éviction des entrées les moins récemment utilisées
+METRICS_QUEUE_BINS = 32         # Classes de l'histogramme de file d'approche (la dernière : au-delà)
+METRICS_WAIT_BINS = 60          # Classes d'une minute du temps d'attente en approche
+METRICS_MARGIN_BINS = 60        # Classes d'une minute de la marge avant crash à l'atterrissage
+VISUALIZER_FPS = 30             # Images par seconde du Control Center (simulation.py)
+VISUALIZER_WARP = 20.0          # Minutes simulées par seconde réelle (Haut / Bas : x2 / ÷2)
+VISUALIZER_DAYS = 1             # Durée par défaut de la démonstration (--days pour plus)
+VISUALIZER_LOG_MAX_WARP = 60.0  # Au-delà, le journal console est coupé (il deviendrait le goulot)
+TRACE_KEYFRAME_INTERVAL = 60    # Minutes entre deux images clés d'une trace (traces.py) : borne le coût d'un saut
+BENCHMARK_DAYS = 7              # Durée simulée par mesure de la suite de benchmarks (benchmark.py)
+BENCHMARK_REPEAT = 3            # Répétitions par mesure : on garde la meilleure (la moins bruitée)
+BENCHMARK_TOLERANCE = 0.10      # Écart relatif au-delà duquel une mesure est signalée comme régression
+BENCHMARK_BASELINE_PATH = "benchmark_baseline.json"
+BENCHMARK_STARTUP_REPEAT = 10    # Démarrages à froid mesurés par commande (benchmark.py --startup)
+PRESCREEN = False               # True = élagage analytique (modèle fluide) avant simulation (prescreen.py)
+PRESCREEN_MARGIN = 0.05         # Incertitude relative du modèle fluide sur les vols
+PRESCREEN_AUDIT_SHARE = 0.10    # Part des cellules élaguées simulées quand même pour mesurer les désaccords
+ADAPTIVE_HORIZON = False        # True = chaque cellule simulée jusqu'à convergence de ses moyennes hebdomadaires (horizon.py)
+HORIZON_WARMUP_DAYS = 2         # Jours de chauffe non mesurés (hub vide au départ)
+HORIZON_MIN_WEEKS = 2           # Semaines mesurées avant de tester la convergence
+HORIZON_TOLERANCE = 0.02        # Variation relative maximale des moyennes hebdomadaires d'une semaine à l'autre
+HORIZON_MARGIN_MIN = 3.0        # Autonomie minimale à l'atterrissage (min) en dessous de laquelle la cellule est prolongée
+HORIZON_MAX_DAYS = 56           # Horizon maximal des cellules proches de la frontière de crash
+ATC_HOST = "127.0.0.1"          # Service ATC (atc_service.py) : socket TCP locale
+ATC_PORT = 8765
+ATC_TICK_SECONDS = 0.01         # Secondes réelles par minute simulée (les requêtes d'un tick forment un lot)
+ATC_BENCH_CLIENTS = 32          # Générateur de charge : connexions simultanées
+ATC_BENCH_WINDOW = 8            # Requêtes en vol par connexion
+ATC_BENCH_SECONDS = 5.0
+DEMAND_LOG_CHUNK = 100000       # Mouvements lus / écrits par bloc (journaux de demande, demand_log.py) : borne la mémoire
+SURROGATE = False               # Grille estimée par le modèle de substitution (surrogate.py), simulations ciblées
+SURROGATE_RECORD = False        # True (ou --record-samples) : chaque simulation alimente la base d'échantillons (samples.py)
+SURROGATE_SAMPLES_PATH = "skyhub_samples.sqlite"
+SURROGATE_MIN_SAMPLES = 50      # En dessous, pas de modèle : toute la grille est simulée
+SURROGATE_MAX_POINTS = 1500     # Points distincts retenus pour l'ajustement (tirés parmi les plus récents)
+SURROGATE_TOLERANCE = 0.05      # Incertitude relative (1 écart-type) sur les vols au-delà de laquelle on simule
+SURROGATE_CRASH_RISK = 0.05     # Probabilité de crash prédite au-delà de laquelle une config est simulée (frontière)
+SURROGATE_ROUNDS = 3            # Manches simulation -> ré-ajustement avant la vérification finale
+WORKQUEUE_CLAIM = 2              # Tâches réclamées d'un coup par processus de calcul (workqueue.py, --run-dir)
+WORKQUEUE_LEASE_SECONDS = 900    # Réclamation plus ancienne : tâche considérée abandonnée et redistribuée
+NETWORK_HUBS = 50               # Taille du réseau urbain généré (network.py)
+NETWORK_RADIUS_KM = 12.0        # Rayon de la ville générée
+NETWORK_CENTRE_SHARE = 0.2      # Part des hubs de centre (pic de départs le soir) ; les autres : périphérie (le matin)
+NETWORK_CRUISE_KM_PER_MIN = 2.5 # Vitesse de croisière (150 km/h)
+NETWORK_TURN_MIN = 2.0          # Décollage + approche, ajoutés à chaque vol
+NETWORK_MAX_FLIGHT_MIN = 12     # Vol le plus long proposé aux passagers (autonomie au départ : 50 %)
+NETWORK_FLEET_PER_DEMAND = 40   # Drones basés dans un hub par unité de demande
+NETWORK_SIZING_ROUNDS = 10      # Manches du dimensionnement conjoint (une simulation du réseau chacune)
+NETWORK_REFUSAL_TOLERANCE = 0.01    # Part d'atterrissages refusés tolérée avant d'agrandir un hub
+NETWORK_GARAGE_STEP = 5         # Pas du garage lors du dimensionnement
+
+# --- 6. PROFILS DE TRAFIC (ARRIVÉES vs DÉPARTS) ---
 
 # ARRIVÉES (Semaine) : Gros pic le matin (07h-09h), calme le soir
 PROFILE_ARRIVAL_WEEKDAY = [
@@ -53,15 +119,20 @@ PROFILE_WEEKEND_FLAT = [0.2] * 24
 #  CALCUL AUTOMATIQUE DE L'ESPACE DE RECHERCHE
 # =============================================================================
 
-def calculate_search_space():
+def calculate_search_space(arrival_profile=None, avg_cycle_time=None):
     """
     Dimensionne l'infra en se basant sur le pire cas d'ARRIVÉE (car c'est ça qui bouche les pads).
+    Par défaut sur les valeurs de ce module ; un scénario (scenario.py) passe les siennes.
     """
+    import statistics
+    arrival_profile = PROFILE_ARRIVAL_WEEKDAY if arrival_profile is None else arrival_profile
+    avg_cycle_time = AVG_CYCLE_TIME if avg_cycle_time is None else avg_cycle_time
+
     # On dimensionne les pads sur le pic d'arrivée
-    avg_prob = statistics.mean(PROFILE_ARRIVAL_WEEKDAY)
-    max_prob = max(PROFILE_ARRIVAL_WEEKDAY)
+    avg_prob = statistics.mean(arrival_profile)
+    max_prob = max(arrival_profile)
     
-    pad_capacity = 1.0 / AVG_CYCLE_TIME
+    pad_capacity = 1.0 / avg_cycle_time
     pads_for_avg = avg_prob / pad_capacity  
     
     min_pads_search = math.floor(pads_for_avg * 0.8) 
@@ -78,10 +149,16 @@ def calculate_search_space():
     
     return pads_range, garage_range
 
-SEARCH_PADS, SEARCH_GARAGE = calculate_search_space()
+def __getattr__(name):
+    """ SEARCH_PADS / SEARCH_GARAGE calculés au premier accès, pas à l'import (démarrage des commandes courtes) """
+    if name in ("SEARCH_PADS", "SEARCH_GARAGE"):
+        globals()["SEARCH_PADS"], globals()["SEARCH_GARAGE"] = calculate_search_space()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
+    pads_range, garage_range = calculate_search_space()
     print(f"--- CONFIG AUTO-DÉTECTÉE (ASYMÉTRIQUE) ---")
     print(f"Pic Arrivée: {max(PROFILE_ARRIVAL_WEEKDAY):.2f} | Pic Départ: {max(PROFILE_DEPARTURE_WEEKDAY):.2f}")
-    print(f"Recherche Pads:   {list(SEARCH_PADS)}")
-    print(f"Recherche Garage: {list(SEARCH_GARAGE)}")
\ No newline at end of file
+    print(f"Recherche Pads:   {list(pads_range)}")
+    print(f"Recherche Garage: {list(garage_range)}")
\ No newline at end of file
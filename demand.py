@@ -0,0 +1,180 @@
+"""
+FLUX DE DEMANDE PRÉ-GÉNÉRÉS - SKYHUB PROJECT
+Tire en une fois (NumPy) un mois complet d'arrivées (minute, batterie, priorité) et de
+demandes de départ à partir des profils horaires du scénario (config.py par défaut).
+
+Toutes les configurations (pads, garage) rejouent le même flux : nombres aléatoires
+communs, donc les écarts entre cellules reflètent l'infrastructure et non le bruit.
+Le flux est stocké en tableaux typés (.npy) et relu en mémoire partagée (mmap) par les workers.
+"""
+import os
+import functools
+import numpy as np
+import config
+from scenario import default_scenario
+
+MINUTES_PER_DAY = 1440
+URGENT_PROBABILITY = 0.2    # Même proportion d'urgences que optimizer.run_month_simulation
+STREAM_VERSION = 2          # À incrémenter dès que le tirage des flux change (source du cache de résultats)
+
+FIELDS = ("arrival_minutes", "arrival_battery", "arrival_priority", "departure_minutes")
+
+class DemandStream:
+    """
+    Un mois de demande sous forme de tableaux triés par minute :
+    arrival_minutes (int32), arrival_battery (int16), arrival_priority (int8), departure_minutes (int32).
+    """
+    def __init__(self, arrival_minutes, arrival_battery, arrival_priority, departure_minutes, days: int):
+        self.arrival_minutes = arrival_minutes
+        self.arrival_battery = arrival_battery
+        self.arrival_priority = arrival_priority
+        self.departure_minutes = departure_minutes
+        self.days = days
+
+    @property
+    def duration(self) -> int:
+        return self.days * MINUTES_PER_DAY
+
+    def save(self, directory: str):
+        """ Écrit un .npy par tableau (relisible en mmap) """
+        os.makedirs(directory, exist_ok=True)
+        for field in FIELDS:
+            np.save(os.path.join(directory, f"{field}.npy"), getattr(self, field))
+        np.save(os.path.join(directory, "days.npy"), np.array(self.days, dtype=np.int32))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "DemandStream":
+        mode = "r" if mmap else None
+        arrays = [np.load(os.path.join(directory, f"{field}.npy"), mmap_mode=mode) for field in FIELDS]
+        days = int(np.load(os.path.join(directory, "days.npy")))
+        return cls(*arrays, days=days)
+
+    def iter_arrivals(self, chunk: int = None):
+        """ (minute, batterie, priorité) dans l'ordre, lus par blocs : mémoire constante même sur un gros flux mmap """
+        chunk = config.DEMAND_LOG_CHUNK if chunk is None else chunk
+        for start in range(0, len(self.arrival_minutes), chunk):
+            end = start + chunk
+            yield from zip(self.arrival_minutes[start:end].tolist(), self.arrival_battery[start:end].tolist(),
+                           self.arrival_priority[start:end].tolist())
+
+    def iter_departures(self, chunk: int = None):
+        """ Minutes des demandes de départ dans l'ordre, lues par blocs """
+        chunk = config.DEMAND_LOG_CHUNK if chunk is None else chunk
+        for start in range(0, len(self.departure_minutes), chunk):
+            yield from self.departure_minutes[start:start + chunk].tolist()
+
+    def minute_flags(self, day: int):
+        """
+        Demande d'une journée sous forme minute par minute (pour le moteur vectorisé) :
+        (arrivées bool, batteries, priorités, départs bool), chacun de longueur 1440.
+        """
+        start, end = day * MINUTES_PER_DAY, (day + 1) * MINUTES_PER_DAY
+        arrivals = np.zeros(MINUTES_PER_DAY, dtype=bool)
+        batteries = np.zeros(MINUTES_PER_DAY, dtype=np.int64)
+        priorities = np.zeros(MINUTES_PER_DAY, dtype=np.int8)
+        departures = np.zeros(MINUTES_PER_DAY, dtype=bool)
+
+        lo, hi = np.searchsorted(self.arrival_minutes, [start, end])
+        idx = self.arrival_minutes[lo:hi] - start
+        arrivals[idx] = True
+        batteries[idx] = self.arrival_battery[lo:hi]
+        priorities[idx] = self.arrival_priority[lo:hi]
+
+        lo, hi = np.searchsorted(self.departure_minutes, [start, end])
+        departures[self.departure_minutes[lo:hi] - start] = True
+        return arrivals, batteries, priorities, departures
+
+def minute_profiles(days: int, scenario=None):
+    """ Probabilités d'arrivée et de départ de chaque minute du mois (profils semaine / week-end) """
+    scenario = default_scenario() if scenario is None else scenario
+    hourly_arrival = []
+    hourly_departure = []
+    for day in range(days):
+        prof_arr, prof_dep = scenario.day_profiles(day)
+        hourly_arrival.extend(prof_arr)
+        hourly_departure.extend(prof_dep)
+    return np.repeat(hourly_arrival, 60), np.repeat(hourly_departure, 60)
+
+def generate_demand_stream(seed: int, days: int = None, scale: float = 1.0, scenario=None) -> DemandStream:
+    """
+    Tire un mois de demande d'un bloc avec un générateur NumPy graine.
+    scale multiplie les profils horaires (croissance du trafic, probabilités bornées à 1) : à graine
+    égale, les minutes d'arrivée et de départ d'un trafic plus faible sont incluses dans celles d'un plus fort,
+    et chaque arrivée garde sa batterie et sa priorité (tirées pour toutes les minutes avant le seuil).
+    """
+    scenario = default_scenario() if scenario is None else scenario
+    days = scenario.sim_duration_days if days is None else days
+    rng = np.random.default_rng(seed)
+    prob_arrival, prob_departure = minute_profiles(days, scenario)
+    if scale != 1.0:
+        prob_arrival = np.minimum(prob_arrival * scale, 1.0)
+        prob_departure = np.minimum(prob_departure * scale, 1.0)
+
+    minutes = days * MINUTES_PER_DAY
+    u = rng.random((2, minutes))
+    battery = rng.integers(scenario.battery_start_min, scenario.battery_start_max + 1, minutes)
+    urgent = rng.random(minutes) < URGENT_PROBABILITY
+    arrival_minutes = np.flatnonzero(u[0] < prob_arrival).astype(np.int32)
+    departure_minutes = np.flatnonzero(u[1] < prob_departure).astype(np.int32)
+
+    arrival_battery = battery[arrival_minutes].astype(np.int16)
+    arrival_priority = np.where(urgent[arrival_minutes], 2, 0).astype(np.int8)
+
+    return DemandStream(arrival_minutes, arrival_battery, arrival_priority, departure_minutes, days)
+
+@functools.lru_cache(maxsize=64)
+def load_demand(directory: str) -> DemandStream:
+    """ Flux partagé d'un worker : chargé une seule fois par processus, en mmap """
+    return DemandStream.load(directory, mmap=True)
+
+@functools.lru_cache(maxsize=64)
+def demand_source(directory: str) -> str:
+    """ Identité du hasard d'un flux pour le cache de résultats : None pour un flux tiré, l'empreinte du journal sinon """
+    from demand_log import log_fingerprint
+    return log_fingerprint(directory)
+
+if __name__ == "__main__":
+    import time
+    import statistics
+    import tempfile
+    from optimizer import run_month_simulation, replay_month_simulation
+    from event_engine import EventSimulation
+    from batch_engine import run_batch_month_simulation
+
+    config.SIM_DURATION_DAYS = 7
+    replications = 20
+
+    start = time.perf_counter()
+    streams = [generate_demand_stream(1000 + r) for r in range(replications)]
+    print(f"--- {replications} flux de {config.SIM_DURATION_DAYS} jours générés en {time.perf_counter() - start:.3f}s "
+          f"({len(streams[0].arrival_minutes)} arrivées, {len(streams[0].departure_minutes)} départs dans le 1er) ---")
+
+    # 1. Un même flux donne le même résultat quel que soit le moteur (et après passage par le disque)
+    with tempfile.TemporaryDirectory() as tmp:
+        streams[0].save(tmp)
+        stream = load_demand(tmp)
+        identical = True
+        for pads, garage in [(1, 3), (2, 6), (4, 12), (8, 57)]:
+            results = [replay_month_simulation(pads, garage, stream),
+                       EventSimulation(pads, garage, demand=stream).run(),
+                       run_batch_month_simulation(pads, garage, demand=[stream])[0]]
+            identical &= results.count(results[0]) == len(results)
+            print(f"Pads={pads} Garage={garage:<2} | objet / événements / vectorisé : {results}")
+    print(f"--- REJEU MULTI-MOTEURS : {'IDENTIQUE' if identical else '❌ ÉCART'} ---")
+
+    # 2. Réduction de variance : écart de profit entre deux configurations voisines
+    def profit_gap_stdev(paired: bool) -> float:
+        gaps = []
+        for r in range(replications):
+            if paired:
+                a = replay_month_simulation(3, 9, streams[r])[0]
+                b = replay_month_simulation(4, 9, streams[r])[0]
+            else:
+                a = run_month_simulation(3, 9, 2 * r)[0]
+                b = run_month_simulation(4, 9, 2 * r + 1)[0]
+            gaps.append(b - a)
+        return statistics.stdev(gaps)
+
+    independent, common = profit_gap_stdev(False), profit_gap_stdev(True)
+    print(f"Écart-type de profit(4,9) - profit(3,9) : indépendant {independent:,.0f}€ | flux commun {common:,.0f}€ "
+          f"(variance ÷{(independent / common) ** 2:.1f})")
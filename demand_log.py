@@ -0,0 +1,311 @@
+"""
+JOURNAUX DE DEMANDE - SKYHUB PROJECT
+Rejoue des mouvements enregistrés (exploitations comparables) au lieu des profils horaires :
+un journal CSV ou JSONL (éventuellement .gz), une ligne par mouvement, dans l'ordre chronologique.
+
+  CSV   : time,type,battery,priority
+          2025-03-03T07:41:00,arrival,32,2
+          2025-03-03T07:42:10,departure,,
+  JSONL : {"time": "2025-03-03T07:41:00", "type": "arrival", "battery": 32, "priority": 2}
+
+'time' est un horodatage ISO 8601 (la minute 0 est le minuit du premier mouvement) ou un nombre
+de minutes depuis le début du journal ; 'type' vaut arrival ou departure ; 'priority' vaut 0 par
+défaut. Plusieurs mouvements peuvent partager la même minute.
+
+Le texte n'est lu qu'une fois : le journal est converti, par blocs de DEMAND_LOG_CHUNK mouvements
+(mémoire constante quelle que soit la taille du fichier), au format colonnes binaires de
+demand.DemandStream (un .npy par colonne), dans un dossier <journal>.skydemand relu ensuite en
+mmap par tous les moteurs et tous les workers. La conversion est refaite si le journal change.
+"""
+import os
+import csv
+import gzip
+import json
+import shutil
+import hashlib
+import datetime
+import numpy as np
+import config
+from demand import FIELDS, MINUTES_PER_DAY, load_demand
+
+SUFFIX = ".skydemand"
+META_FILE = "log.json"
+DTYPES = {"arrival_minutes": np.int32, "arrival_battery": np.int16, "arrival_priority": np.int8,
+          "departure_minutes": np.int32}
+ARRIVAL_TYPES = ("arrival", "arrivee", "arrivée")
+DEPARTURE_TYPES = ("departure", "depart", "départ")
+
+def open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+def iter_records(path: str):
+    """ (numéro de ligne, time, type, battery, priority) bruts, lus ligne à ligne """
+    name = path[:-3] if path.endswith(".gz") else path
+    with open_text(path) as f:
+        if name.endswith((".jsonl", ".ndjson")):
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    record = json.loads(line)
+                    yield line_no, record.get("time"), record.get("type"), record.get("battery"), record.get("priority")
+        else:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record.get("time"), record.get("type"), record.get("battery"), record.get("priority")
+
+class ColumnWriter:
+    """ Colonnes accumulées par blocs dans des fichiers bruts, puis écrites en .npy (relisibles en mmap) """
+    def __init__(self, directory: str, chunk: int):
+        self.directory = directory
+        self.chunk = chunk
+        self.buffers = {field: [] for field in FIELDS}
+        self.files = {field: open(os.path.join(directory, f"{field}.bin"), "wb") for field in FIELDS}
+        self.counts = dict.fromkeys(FIELDS, 0)
+        self.digests = {field: hashlib.sha256() for field in FIELDS}     # Un flux par colonne : indépendant des blocs
+
+    def flush(self):
+        for field in FIELDS:
+            values = np.asarray(self.buffers[field], dtype=DTYPES[field])
+            values.tofile(self.files[field])
+            self.digests[field].update(values.tobytes())
+            self.counts[field] += len(values)
+            self.buffers[field] = []
+
+    def fingerprint(self) -> str:
+        """ Empreinte du contenu des colonnes, quelle que soit la taille des blocs (DEMAND_LOG_CHUNK) """
+        digest = hashlib.sha256()
+        for field in FIELDS:
+            digest.update(f"{field}:{self.digests[field].hexdigest()}\n".encode())
+        return f"log:{digest.hexdigest()[:32]}"
+
+    def arrival(self, minute: int, battery: int, priority: int):
+        self.buffers["arrival_minutes"].append(minute)
+        self.buffers["arrival_battery"].append(battery)
+        self.buffers["arrival_priority"].append(priority)
+        if len(self.buffers["arrival_minutes"]) >= self.chunk:
+            self.flush()
+
+    def departure(self, minute: int):
+        self.buffers["departure_minutes"].append(minute)
+        if len(self.buffers["departure_minutes"]) >= self.chunk:
+            self.flush()
+
+    def close(self):
+        """ Fichiers bruts -> .npy, recopiés par blocs """
+        self.flush()
+        for field in FIELDS:
+            self.files[field].close()
+            raw_path = os.path.join(self.directory, f"{field}.bin")
+            count, dtype = self.counts[field], DTYPES[field]
+            out = np.lib.format.open_memmap(os.path.join(self.directory, f"{field}.npy"), mode="w+",
+                                            dtype=dtype, shape=(count,))
+            if count:
+                raw = np.memmap(raw_path, dtype=dtype, mode="r", shape=(count,))
+                for start in range(0, count, self.chunk):
+                    out[start:start + self.chunk] = raw[start:start + self.chunk]
+                del raw
+            out.flush()
+            del out
+            os.remove(raw_path)
+
+def convert_log(path: str, directory: str = None, chunk: int = None) -> str:
+    """
+    Convertit un journal texte au format colonnes (voir l'en-tête) et renvoie le dossier.
+    ValueError (avec le numéro de ligne) si un mouvement est illisible ou hors de l'ordre chronologique.
+    """
+    directory = path + SUFFIX if directory is None else directory
+    chunk = config.DEMAND_LOG_CHUNK if chunk is None else chunk
+    stat = os.stat(path)
+
+    # Écriture dans un dossier temporaire renommé à la fin : jamais de conversion à moitié faite
+    tmp = f"{directory}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    try:
+        writer = ColumnWriter(tmp, chunk)
+        origin = None
+        last_arrival = last_departure = 0
+        last_minute = -1
+        for line_no, time, kind, battery, priority in iter_records(path):
+            try:
+                if isinstance(time, (int, float)) or (isinstance(time, str) and time.strip().isdigit()):
+                    minute = int(time)
+                else:
+                    stamp = datetime.datetime.fromisoformat(str(time).strip())
+                    if origin is None:
+                        origin = stamp.replace(hour=0, minute=0, second=0, microsecond=0)
+                    minute = int((stamp - origin).total_seconds() // 60)
+                if minute < 0:
+                    raise ValueError("mouvement antérieur au début du journal")
+                kind = str(kind).strip().lower()
+                if kind in ARRIVAL_TYPES:
+                    if minute < last_arrival:
+                        raise ValueError("arrivée hors de l'ordre chronologique")
+                    writer.arrival(minute, int(round(float(battery))), int(priority or 0))
+                    last_arrival = minute
+                elif kind in DEPARTURE_TYPES:
+                    if minute < last_departure:
+                        raise ValueError("départ hors de l'ordre chronologique")
+                    writer.departure(minute)
+                    last_departure = minute
+                else:
+                    raise ValueError(f"type inconnu : {kind}")
+            except (TypeError, ValueError) as error:
+                raise ValueError(f"{path}:{line_no} : {error}") from None
+            last_minute = max(last_minute, minute)
+        writer.close()
+
+        days = last_minute // MINUTES_PER_DAY + 1 if last_minute >= 0 else 0
+        np.save(os.path.join(tmp, "days.npy"), np.array(days, dtype=np.int32))
+        meta = {"source": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime,
+                "fingerprint": writer.fingerprint(),
+                "origin": origin.isoformat() if origin is not None else None,
+                "arrivals": writer.counts["arrival_minutes"], "departures": writer.counts["departure_minutes"],
+                "days": days}
+        with open(os.path.join(tmp, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        if os.path.isdir(directory):
+            if not os.path.exists(os.path.join(directory, META_FILE)):
+                raise FileExistsError(f"{directory} existe et n'est pas un journal converti")
+            shutil.rmtree(directory)
+        os.replace(tmp, directory)
+    finally:
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp)
+    return directory
+
+def read_meta(directory: str) -> dict:
+    """ Métadonnées d'un journal converti (None pour un flux généré) """
+    path = os.path.join(directory, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def log_fingerprint(directory: str) -> str:
+    """ Empreinte du contenu converti (clé du cache de résultats), None pour un flux généré """
+    meta = read_meta(directory)
+    return meta["fingerprint"] if meta else None
+
+def demand_directory(path: str) -> str:
+    """ Dossier colonnes d'un journal : converti une seule fois, puis à nouveau seulement si le journal a changé """
+    if os.path.isdir(path):
+        return path
+    directory = path + SUFFIX
+    meta = read_meta(directory) if os.path.isdir(directory) else None
+    stat = os.stat(path)
+    if meta is None or meta["size"] != stat.st_size or meta["mtime"] != stat.st_mtime:
+        convert_log(path, directory)
+    return directory
+
+def open_demand(path: str):
+    """ Journal (texte ou dossier converti) -> demand.DemandStream en mmap, prêt pour run_month_simulation """
+    return load_demand(demand_directory(path))
+
+def write_log(stream, path: str, origin: datetime.datetime = None, chunk: int = None):
+    """ Écrit un flux (demand.DemandStream) comme journal CSV ou JSONL, horodaté depuis 'origin' (ou en minutes) """
+    chunk = config.DEMAND_LOG_CHUNK if chunk is None else chunk
+    arrivals, departures = stream.iter_arrivals(chunk), stream.iter_departures(chunk)
+    jsonl = path.endswith(".jsonl")
+
+    def stamp(minute: int):
+        return minute if origin is None else (origin + datetime.timedelta(minutes=minute)).isoformat()
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = None if jsonl else csv.writer(f)
+        if writer:
+            writer.writerow(["time", "type", "battery", "priority"])
+        arrival, departure = next(arrivals, None), next(departures, None)
+        while arrival is not None or departure is not None:
+            if departure is None or (arrival is not None and arrival[0] <= departure):
+                row = (stamp(arrival[0]), "arrival", arrival[1], arrival[2])
+                arrival = next(arrivals, None)
+            else:
+                row = (stamp(departure), "departure", "", "")
+                departure = next(departures, None)
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(dict(zip(("time", "type", "battery", "priority"), row))) + "\n")
+
+if __name__ == "__main__":
+    import time
+    import tempfile
+    import argparse
+    import tracemalloc
+    from demand import generate_demand_stream, DemandStream
+    from optimizer import run_month_simulation, replay_month_simulation
+    parser = argparse.ArgumentParser(description="SkyHub - Journaux de demande : conversion et rejeu")
+    parser.add_argument("log", nargs="?", default=None, help="Journal à convertir (sinon : contrôle sur journaux générés)")
+    parser.add_argument("--months", type=int, default=6, help="Contrôle : mois du grand journal généré")
+    parser.add_argument("--scale", type=float, default=4.0, help="Contrôle : multiplicateur de trafic du grand journal")
+    args = parser.parse_args()
+
+    if args.log:
+        start = time.perf_counter()
+        directory = convert_log(args.log)
+        meta = read_meta(directory)
+        print(f"💾 {directory} : {meta['arrivals']:,} arrivées, {meta['departures']:,} départs, {meta['days']} jours "
+              f"| converti en {time.perf_counter() - start:.1f}s")
+        raise SystemExit
+
+    with tempfile.TemporaryDirectory(prefix="skyhub_log_") as tmp:
+        # 1. Journal CSV horodaté et JSONL en minutes : même rejeu que le flux d'origine
+        stream = generate_demand_stream(7)
+        origin = datetime.datetime(2025, 3, 3)      # Un lundi, comme le jour 0 des profils
+        same = True
+        for name in ("mois.csv", "mois.jsonl"):
+            path = os.path.join(tmp, name)
+            write_log(stream, path, origin if name.endswith(".csv") else None)
+            replayed = open_demand(path)
+            for pads, garage in [(2, 6), (8, 57)]:
+                same &= replay_month_simulation(pads, garage, stream) == run_month_simulation(pads, garage,
+                                                                                             demand=replayed)
+        verdict = "✅ identique au flux d'origine" if same else "❌ ÉCART"
+        print(f"Journal CSV / JSONL -> colonnes -> rejeu : {verdict}")
+        fingerprints = {read_meta(convert_log(path, os.path.join(tmp, f"blocs_{chunk}" + SUFFIX), chunk))["fingerprint"]
+                        for chunk in (7, 1000, config.DEMAND_LOG_CHUNK)}
+        print(f"Empreinte indépendante de la taille des blocs : {'✅' if len(fingerprints) == 1 else '❌'}")
+
+        # 2. Grand journal (plusieurs mouvements par minute) : mémoire Python constante, conversion unique
+        big = os.path.join(tmp, "grand.csv")
+        days = 28 * args.months
+        parts = [generate_demand_stream(100 + k, days=days, scale=args.scale) for k in range(2)]
+        arrivals = np.concatenate([part.arrival_minutes for part in parts])
+        order = np.argsort(arrivals, kind="stable")
+        merged = DemandStream(arrivals[order], np.concatenate([part.arrival_battery for part in parts])[order],
+                              np.concatenate([part.arrival_priority for part in parts])[order],
+                              np.sort(np.concatenate([part.departure_minutes for part in parts])), days)
+        write_log(merged, big, origin)
+        del parts, arrivals, order, merged
+
+        size = os.path.getsize(big)
+        start = time.perf_counter()
+        directory = demand_directory(big)
+        convert_time = time.perf_counter() - start
+        start = time.perf_counter()
+        demand = open_demand(big)
+        reload_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = run_month_simulation(8, 57, demand=demand)
+        replay_time = time.perf_counter() - start
+
+        # Mémoire mesurée à part (tracemalloc ralentit fortement l'interpréteur)
+        tracemalloc.start()
+        convert_log(big, os.path.join(tmp, "mesure" + SUFFIX))
+        convert_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        run_month_simulation(8, 57, demand=demand)
+        replay_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        meta = read_meta(directory)
+        binary = sum(os.path.getsize(os.path.join(directory, f"{field}.npy")) for field in FIELDS)
+        print(f"Journal {size / 2**20:,.0f} Mo ({meta['arrivals'] + meta['departures']:,} mouvements, {meta['days']} jours) "
+              f"-> colonnes {binary / 2**20:,.1f} Mo")
+        print(f"⏱️ Conversion (une fois) {convert_time:.1f}s | réouverture {reload_time * 1000:.1f} ms | "
+              f"rejeu Pads=8 Garage=57 {replay_time:.1f}s -> profit {result[0]:,.0f}€, {result[1]:,} vols, "
+              f"{result[3]} crashs")
+        print(f"Mémoire Python maximale : conversion {convert_peak / 2**20:.1f} Mo | rejeu {replay_peak / 2**20:.1f} Mo "
+              f"(blocs de {config.DEMAND_LOG_CHUNK:,} mouvements)")
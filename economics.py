@@ -0,0 +1,29 @@
+"""
+BILAN ÉCONOMIQUE - SKYHUB PROJECT
+Le profit ne dépend que des résultats physiques d'une simulation (vols, crashs) et des
+constantes économiques du scénario : on peut re-chiffrer une configuration sans la re-simuler.
+"""
+from scenario import default_scenario
+
+def monthly_capex(num_pads: int, num_garage: int, scenario=None) -> float:
+    """ Coût de construction amorti, par mois """
+    scenario = default_scenario() if scenario is None else scenario
+    total_capex = (num_pads * scenario.cost_pad_build) + (num_garage * scenario.cost_garage_build)
+    return total_capex / scenario.amortization_months
+
+def month_economics(num_pads: int, num_garage: int, flights: int, crashes: int, days: int = None,
+                    scenario=None) -> float:
+    """ Profit net d'une réplication : recettes - coûts variables - amortissement - pénalités de crash """
+    scenario = default_scenario() if scenario is None else scenario
+    days = scenario.sim_duration_days if days is None else days
+    sim_fixed_cost = monthly_capex(num_pads, num_garage, scenario) * (days / 30)
+
+    revenue = flights * scenario.revenue_per_flight
+    var_cost = flights * scenario.cost_per_flight
+    crash_cost = crashes * scenario.cost_crash_penalty
+    return revenue - var_cost - sim_fixed_cost - crash_cost
+
+def rescore(num_pads: int, num_garage: int, outcome: tuple, days: int = None, scenario=None) -> tuple:
+    """ (vols, refus, crashs) -> (profit, vols, refus, crashs) aux prix courants """
+    flights, refusals, crashes = outcome
+    return month_economics(num_pads, num_garage, flights, crashes, days, scenario), flights, refusals, crashes
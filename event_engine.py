@@ -0,0 +1,325 @@
+"""
+MOTEUR À ÉVÉNEMENTS DISCRETS - SKYHUB PROJECT
+Au lieu d'appeler update() sur chaque drone à chaque minute, on saute directement
+à la prochaine minute où quelque chose peut se passer : arrivée, demande de départ,
+fin de charge (seuil du Valet), épuisement de batterie dans la file, atterrissage ou
+déplacement du Valet. Les batteries sont calculées analytiquement entre deux événements.
+
+Les décisions restent celles de Vertiport (admission, Valet, atterrissage, décollage).
+
+Le gain suit la part de minutes inactives : x3 à x5 au trafic nocturne (x0.1), mais au trafic
+nominal 57 à 70 % des minutes portent un événement et un instant coûte plus cher qu'un tick de
+la boucle à pas fixe (x0.6 à x1.3 selon le hub) : le moteur object reste le défaut.
+"""
+import math
+import heapq
+import random
+import config
+from evtol import EVTOL, EN_VOL, EN_RECHARGE
+from vertiport import Vertiport
+from economics import month_economics
+from scenario import default_scenario
+
+MINUTES_PER_DAY = 1440
+
+class SimClock:
+    """ Horloge partagée entre le moteur et les drones (en minutes de simulation) """
+    def __init__(self):
+        self.now = 0
+
+class TimedEVTOL(EVTOL):
+    """
+    EVTOL dont la batterie est une fonction affine du temps, recalée à chaque changement
+    d'état : b(t) = b_ref + pente * (t - t_ref), bornée à [0, BATTERY_MAX].
+    current_battery reste un attribut simple (lu par Vertiport) : le moteur le recalcule
+    via sync() pour les seuls drones dont la batterie bouge (file et pads).
+    """
+    __slots__ = ("clock", "_status", "_battery_ref", "_time_ref", "_slope")
+
+    def __init__(self, drone_id, clock: SimClock, scenario=None):
+        self.clock = clock
+        self.scenario = default_scenario() if scenario is None else scenario
+        self.current_battery = self.scenario.battery_max
+        super().__init__(drone_id, self.scenario)
+
+    @property
+    def status(self) -> int:
+        return self._status
+
+    @status.setter
+    def status(self, value: int):
+        # On fige la batterie acquise sous l'ancien état avant de changer de pente
+        self._battery_ref = self.current_battery
+        self._time_ref = self.clock.now
+        self._status = value
+        if value == EN_VOL:
+            self._slope = -self.scenario.consumption_per_min
+        elif value == EN_RECHARGE:
+            self._slope = self.scenario.charge_rate_per_min
+        else:
+            self._slope = 0.0
+
+    def sync(self):
+        """ Recalcule la batterie à l'instant courant de l'horloge """
+        battery = self._battery_ref + self._slope * (self.clock.now - self._time_ref)
+        if battery < 0: battery = 0
+        if battery > self.max_battery: battery = self.max_battery
+        self.current_battery = battery
+
+    def time_at_or_above(self, level: float) -> float:
+        """ Première minute où la batterie (en charge) atteint level ; inf si jamais """
+        if self._battery_ref >= level:
+            return self._time_ref
+        if self._status != EN_RECHARGE or level > self.max_battery:
+            return math.inf
+        return self._time_ref + math.ceil((level - self._battery_ref) / self.scenario.charge_rate_per_min)
+
+    def time_below(self, level: float) -> float:
+        """ Première minute où la batterie (en vol) passe strictement sous level ; inf si jamais """
+        if self._battery_ref < level:
+            return self._time_ref
+        if self._status != EN_VOL:
+            return math.inf
+        return self._time_ref + math.floor((self._battery_ref - level) / self.scenario.consumption_per_min) + 1
+
+    def time_at_or_below(self, level: float) -> float:
+        """ Première minute où la batterie (en vol) descend à level ou moins (échéance de crash pour 0) """
+        if self._battery_ref <= level:
+            return self._time_ref
+        if self._status != EN_VOL:
+            return math.inf
+        return self._time_ref + math.ceil((self._battery_ref - level) / self.scenario.consumption_per_min)
+
+    def update(self):
+        """ Rien à faire : la batterie est calculée à la demande """
+        pass
+
+class EventSimulation:
+    """
+    Simulation d'un Vertiport pilotée par une file d'événements ordonnée dans le temps.
+
+    Une minute t se déroule comme dans la boucle à pas fixe : d'abord la gestion issue de la
+    mise à jour de la minute précédente (audit des crashs, Valet, atterrissage), puis les
+    arrivées et départs de la minute t. Les minutes où la gestion ne peut rien changer sont sautées.
+    """
+    def __init__(self, num_pads: int, num_garage: int, seed: int = None, verbose: bool = False,
+                 skip_idle: bool = True, demand=None, scenario=None):
+        self.rng = random.Random(seed)
+        self.demand = demand  # demand.DemandStream à rejouer (sinon tirages à la volée)
+        self.scenario = default_scenario() if scenario is None else scenario
+        self.clock = SimClock()
+        self.hub = Vertiport("ParisHub", num_pads, num_garage, verbose=verbose, scenario=self.scenario)
+        self.skip_idle = skip_idle  # False = une gestion par minute (contrôle de conformité)
+
+        self.days = self.scenario.sim_duration_days if demand is None else demand.days
+        self.duration = self.days * MINUTES_PER_DAY
+        self.hourly_arrival = []
+        self.hourly_departure = []
+        for day in range(self.days):
+            prof_arr, prof_dep = self.scenario.day_profiles(day)
+            self.hourly_arrival.extend(prof_arr)
+            self.hourly_departure.extend(prof_dep)
+
+        self.drone_counter = 1
+        self.flights = 0
+        self.refusals = 0
+        self.events = 0  # Nombre d'instants réellement traités
+
+        if demand is not None:
+            self.stream_arrivals = list(zip(demand.arrival_minutes.tolist(), demand.arrival_battery.tolist(),
+                                            demand.arrival_priority.tolist()))
+            self.stream_departures = demand.departure_minutes.tolist()
+            self.arrival_index = 0
+            self.departure_index = 0
+
+        # File d'événements exogènes : (minute, ordre, type)
+        self.event_queue = []
+        self.schedule("ARRIVEE", self.next_arrival_time(0))
+        self.schedule("DEPART", self.next_departure_time(0))
+
+    def schedule(self, kind: str, time: float):
+        if time < self.duration:
+            order = 0 if kind == "ARRIVEE" else 1  # Même minute : arrivée avant départ
+            heapq.heappush(self.event_queue, (time, order, kind))
+
+    def next_bernoulli_time(self, start: int, hourly_probs: list) -> float:
+        """
+        Prochaine minute >= start où un tirage de Bernoulli (proba horaire) réussit.
+        Loi géométrique par tranche horaire : même loi que le tirage minute par minute.
+        """
+        t = start
+        while t < self.duration:
+            hour_end = (t // 60 + 1) * 60
+            p = hourly_probs[t // 60]
+            if p >= 1:
+                return t
+            if p > 0:
+                gap = math.floor(math.log(1.0 - self.rng.random()) / math.log(1.0 - p))
+                if t + gap < hour_end:
+                    return t + gap
+            t = hour_end
+        return math.inf
+
+    def next_arrival_time(self, start: int) -> float:
+        if self.demand is None:
+            return self.next_bernoulli_time(start, self.hourly_arrival)
+        if self.arrival_index < len(self.stream_arrivals):
+            return self.stream_arrivals[self.arrival_index][0]
+        return math.inf
+
+    def next_departure_time(self, start: int) -> float:
+        if self.demand is None:
+            return self.next_bernoulli_time(start, self.hourly_departure)
+        if self.departure_index < len(self.stream_departures):
+            return self.stream_departures[self.departure_index]
+        return math.inf
+
+    def handle_arrival(self, t: int):
+        if self.demand is None:
+            battery = self.rng.randint(self.scenario.battery_start_min, self.scenario.battery_start_max)
+        else:
+            _, battery, priority = self.stream_arrivals[self.arrival_index]
+            self.arrival_index += 1
+
+        if self.hub.can_accept_battery(battery):
+            drone = TimedEVTOL(self.drone_counter, self.clock, self.scenario)
+            drone.current_battery = battery
+            if self.demand is None:
+                priority = 2 if self.rng.random() < 0.2 else 0
+            drone.mission_priority = priority
+            self.hub.add_to_approach(drone)
+            self.drone_counter += 1
+        else:
+            self.refusals += 1
+        self.schedule("ARRIVEE", self.next_arrival_time(t + 1))
+
+    def handle_departure(self, t: int):
+        if self.demand is not None:
+            self.departure_index += 1
+        if self.hub.dispatch_mission("Taxi", 0):
+            self.flights += 1
+        self.schedule("DEPART", self.next_departure_time(t + 1))
+
+    def sync_batteries(self):
+        """ Met à jour les batteries qui évoluent (file d'approche et pads) ; le garage est figé """
+        for d in self.hub.approach_queue:
+            d.sync()
+        for d in self.hub.charging_pads:
+            if d: d.sync()
+
+    def manage(self):
+        """ Gestion de fin de minute (identique à Vertiport.update_simulation, sans update() des drones) """
+        self.hub.audit_crashes()
+        self.hub.optimize_fleet_position()
+        self.hub.run_landing_logic()
+
+    def next_management_time(self, t: int) -> float:
+        """
+        Première minute > t où la gestion peut modifier l'état, en l'absence d'arrivée/départ :
+        atterrissage, Valet (immédiat ou au passage d'un seuil de charge), crash, ou tête de
+        file passant sous EMERGENCY_PERCENT (atterrissage de sécurité au garage).
+        """
+        hub = self.hub
+        queue = hub.approach_queue
+        free_pad = bool(hub.free_pads)
+        free_garage = bool(hub.free_spots)
+
+        # Valet B (Garage -> Pad) ou atterrissage sur pad : dès la minute suivante
+        if free_pad and (queue or hub.emptiest_spot() != -1):
+            return t + 1
+
+        horizon = math.inf
+        if queue:
+            horizon = min(d.time_at_or_below(0) for d in queue)
+            if free_garage:
+                if any(d.mission_priority > 0 for d in queue):
+                    return t + 1
+                horizon = min(horizon, min(d.time_below(hub.emergency_level) for d in queue))
+
+        # Valet A (Pad -> Garage) : quand le drone le plus chargé atteint le seuil de délestage
+        fullest = hub.fullest_pad()
+        if free_garage and fullest != -1:
+            threshold = hub.valet_jam_level if queue else hub.valet_idle_level
+            horizon = min(horizon, hub.charging_pads[fullest].time_at_or_above(threshold))
+
+        return max(horizon, t + 1)
+
+    def run(self):
+        """ Déroule la simulation et renvoie (profit, vols, refus, crashs) comme run_month_simulation """
+        t = 0
+        while True:
+            self.clock.now = t
+            self.hub.ticks = t
+            self.events += 1
+            self.sync_batteries()
+            if t > 0:
+                self.manage()
+            if t >= self.duration:
+                break
+
+            while self.event_queue and self.event_queue[0][0] == t:
+                _, _, kind = heapq.heappop(self.event_queue)
+                if kind == "ARRIVEE":
+                    self.handle_arrival(t)
+                else:
+                    self.handle_departure(t)
+
+            next_event = self.event_queue[0][0] if self.event_queue else math.inf
+            next_management = self.next_management_time(t) if self.skip_idle else t + 1
+            t = int(min(next_event, next_management, self.duration))
+
+        return self.result()
+
+    def result(self) -> tuple:
+        profit = month_economics(self.hub.num_charging_pads, self.hub.num_parking_spots,
+                                 self.flights, self.hub.crashes, self.days, self.scenario)
+        return profit, self.flights, self.refusals, self.hub.crashes
+
+def run_event_month_simulation(num_pads: int, num_garage: int, seed: int = None, demand=None, scenario=None):
+    """ Équivalent à événements discrets de optimizer.run_month_simulation (ou replay_month_simulation) """
+    return EventSimulation(num_pads, num_garage, seed, demand=demand, scenario=scenario).run()
+
+if __name__ == "__main__":
+    import time
+    import statistics
+    from optimizer import run_month_simulation
+
+    config.SIM_DURATION_DAYS = 7
+    configurations = [(1, 3), (2, 6), (4, 12), (8, 57)]
+    replications = 20
+
+    # 1. Le saut des minutes inactives ne change rien : mêmes tirages, même résultat
+    exact = all(EventSimulation(p, g, s).run() == EventSimulation(p, g, s, skip_idle=False).run()
+                for p, g in configurations for s in range(5))
+    print(f"--- SAUT DES MINUTES INACTIVES : {'IDENTIQUE' if exact else '❌ ÉCART'} ---")
+
+    # 2. Équivalence statistique avec la boucle à pas fixe, au trafic nominal puis nocturne (x0.1) :
+    #    le coût suit le nombre d'instants traités, pas le nombre de minutes
+    nominal = {name: getattr(config, name) for name in
+               ("PROFILE_ARRIVAL_WEEKDAY", "PROFILE_DEPARTURE_WEEKDAY", "PROFILE_WEEKEND_FLAT")}
+    def mean(results, i):
+        return statistics.fmean(r[i] for r in results)
+
+    for scale in (1.0, 0.1):
+        for name, profile in nominal.items():
+            setattr(config, name, [p * scale for p in profile])
+
+        print(f"--- TRAFIC x{scale} ---")
+        print(f"{'CONFIG':<18} | {'VOLS (pas fixe / évén.)':<26} | {'REFUS':<20} | {'CRASHS':<12} | {'INSTANTS':<8} | ACCÉL.")
+        for pads, garage in configurations:
+            tick, event, instants = [], [], []
+            tick_time = event_time = 0.0
+            for s in range(replications):
+                start = time.perf_counter()
+                tick.append(run_month_simulation(pads, garage, s))
+                tick_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                sim = EventSimulation(pads, garage, 10_000 + s)
+                event.append(sim.run())
+                event_time += time.perf_counter() - start
+                instants.append(sim.events)
+
+            print(f"Pads={pads} Garage={garage:<2} | {mean(tick, 1):>9.1f} / {mean(event, 1):<14.1f} | "
+                  f"{mean(tick, 2):>7.1f} / {mean(event, 2):<10.1f} | {mean(tick, 3):.2f} / {mean(event, 3):<5.2f} | "
+                  f"{statistics.fmean(instants) / (config.SIM_DURATION_DAYS * MINUTES_PER_DAY):>7.0%} | x{tick_time / event_time:.1f}")
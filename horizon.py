@@ -0,0 +1,202 @@
+"""
+HORIZON ADAPTATIF - SKYHUB PROJECT
+Les profils de demande se répètent chaque semaine : au lieu de simuler chaque cellule exactement
+SIM_DURATION_DAYS jours, on la simule semaine après semaine jusqu'à ce que ses moyennes
+hebdomadaires se stabilisent.
+
+  - chauffe : les HORIZON_WARMUP_DAYS premiers jours (hub vide au départ) ne sont pas mesurés ;
+  - convergence : après HORIZON_MIN_WEEKS semaines mesurées, arrêt dès que les moyennes
+    hebdomadaires des vols, du profit et du taux de refus bougent de moins de HORIZON_TOLERANCE
+    d'une semaine à l'autre ;
+  - crash : arrêt immédiat (la configuration est disqualifiée quelle que soit la suite) ;
+  - frontière de crash : une cellule dont un drone s'est posé avec moins de HORIZON_MARGIN_MIN
+    minutes d'autonomie n'est pas arrêtée à la convergence mais prolongée jusqu'à HORIZON_MAX_DAYS
+    jours, pour laisser aux crashs rares le temps d'apparaître.
+
+Les résultats sont ramenés à SIM_DURATION_DAYS jours (moyennes hebdomadaires après chauffe) pour
+rester comparables d'une cellule à l'autre et au mode à horizon fixe.
+"""
+import config
+from economics import month_economics
+from optimizer import MonthSimulation, derive_seed, run_tasks, save_best_params
+from scenario import default_scenario
+
+class LandingMargin:
+    """ Observateur minimal (interface de metrics.VertiportMetrics) : plus petite autonomie à l'atterrissage """
+    def __init__(self, consumption_per_min: float):
+        self.consumption_per_min = consumption_per_min
+        self.min_margin = float("inf")      # Minutes de vol restantes
+
+    def record_minute(self, hub):
+        pass
+
+    def record_landing(self, drone):
+        margin = drone.current_battery / self.consumption_per_min
+        if margin < self.min_margin:
+            self.min_margin = margin
+
+    def record_refusal(self):
+        pass
+
+    def record_crash(self):
+        pass
+
+def converged(previous: tuple, current: tuple, tolerance: float) -> bool:
+    """ Moyennes hebdomadaires (vols, profit, taux de refus) stables d'une semaine à l'autre """
+    flights, profit, refusal_rate = current
+    last_flights, last_profit, last_refusal_rate = previous
+    scale = max(flights, 1.0)
+    return (abs(flights - last_flights) <= tolerance * scale
+            and abs(profit - last_profit) <= tolerance * max(abs(profit), abs(last_profit), 1.0)
+            and abs(refusal_rate - last_refusal_rate) <= tolerance)
+
+def run_adaptive_simulation(num_pads: int, num_garage: int, seed: int = None, scenario=None) -> tuple:
+    """
+    Simule une cellule semaine par semaine jusqu'à convergence (voir l'en-tête du module).
+    Renvoie ((profit, vols, refus, crashs) ramenés à SIM_DURATION_DAYS jours, jours simulés, raison de l'arrêt).
+    """
+    scenario = default_scenario() if scenario is None else scenario
+    reference_days = scenario.sim_duration_days
+    warmup = config.HORIZON_WARMUP_DAYS * 1440
+    week = 7 * 1440
+    max_days = max(config.HORIZON_MAX_DAYS, reference_days)
+
+    watch = LandingMargin(scenario.consumption_per_min)
+    simulation = MonthSimulation(num_pads, num_garage, seed, scenario.replace(sim_duration_days=max_days), watch)
+    simulation.run(warmup)
+    start = (simulation.flights, simulation.refusals, simulation.drone_counter)
+
+    weeks = 0
+    previous = None
+    reason = "prolongé"    # Frontière de crash : jusqu'à HORIZON_MAX_DAYS
+    reference_end = reference_days * 1440
+    while simulation.minute < simulation.duration:
+        # Hors frontière de crash, jamais au-delà de l'horizon fixe : la dernière tranche est écourtée
+        end = simulation.minute + week
+        if watch.min_margin >= config.HORIZON_MARGIN_MIN and simulation.minute < reference_end:
+            end = min(end, reference_end)
+        simulation.run(end)
+        weeks += 1
+        if simulation.hub.crashes:
+            reason = "crash"
+            break
+
+        # Moyennes ramenées à 7 jours mesurés (la dernière tranche peut être plus courte)
+        measured_weeks = (simulation.minute - warmup) / week
+        flights = (simulation.flights - start[0]) / measured_weeks
+        refusals = (simulation.refusals - start[1]) / measured_weeks
+        admitted = (simulation.drone_counter - start[2]) / measured_weeks
+        profit = month_economics(num_pads, num_garage, flights, 0, 7, scenario)
+        current = (flights, profit, refusals / (refusals + admitted) if refusals + admitted else 0.0)
+
+        borderline = watch.min_margin < config.HORIZON_MARGIN_MIN
+        if (weeks >= config.HORIZON_MIN_WEEKS and previous is not None and not borderline
+                and converged(previous, current, config.HORIZON_TOLERANCE)):
+            reason = "convergé"
+            break
+        if not borderline and simulation.minute >= reference_end:
+            reason = "horizon fixe"
+            break
+        previous = current
+
+    # Ramené au mois de référence : moyennes hebdomadaires mesurées (chauffe exclue) ; crashs tels quels
+    measured_days = max(simulation.minute - warmup, 1) / 1440
+    flights = round((simulation.flights - start[0]) * reference_days / measured_days)
+    refusals = round((simulation.refusals - start[1]) * reference_days / measured_days)
+    crashes = simulation.hub.crashes
+    profit = month_economics(num_pads, num_garage, flights, crashes, reference_days, scenario)
+    return (profit, flights, refusals, crashes), simulation.minute / 1440, reason
+
+def evaluate_adaptive(task):
+    """ Point d'entrée d'un worker : (clé, (résultat, jours simulés, raison)) """
+    key, pads, garage, seed, scenario = task
+    return key, run_adaptive_simulation(pads, garage, seed, scenario)
+
+def main_horizon(workers, seed: int, scenario=None, params_path: str = "best_params.json"):
+    """ Grille complète à horizon adaptatif ; affiche les jours simulés par cellule et le total économisé """
+    scenario = default_scenario() if scenario is None else scenario
+    reference_days = scenario.sim_duration_days
+    print(f"--- 🛡️ SKYHUB OPTIMIZER (Horizon adaptatif) | Scénario : {scenario.name} ---")
+    print(f"Chauffe {config.HORIZON_WARMUP_DAYS} j | convergence à {config.HORIZON_TOLERANCE:.0%} après "
+          f"{config.HORIZON_MIN_WEEKS} semaines | frontière de crash (marge < {config.HORIZON_MARGIN_MIN:g} min) "
+          f"prolongée à {config.HORIZON_MAX_DAYS} j | résultats ramenés à {reference_days} jours")
+    print(f"Graine maître : {seed} | Workers : {workers}")
+    print("-" * 100)
+    print(f"{'CONFIG':<18} | {'PROFIT NET':<12} | {'REFUS':<8} | {'CRASHS':<8} | {'JOURS':<15} | {'ANALYSE'}")
+    print("-" * 100)
+
+    cells = scenario.grid()
+    tasks = [(cell, cell[0], cell[1], derive_seed(seed, *cell), scenario) for cell in cells]
+    results = dict(run_tasks(tasks, workers, evaluate_adaptive))
+
+    best_config = None
+    best_profit = -float('inf')
+    simulated_days = 0.0
+    extended = 0
+    for cell in cells:
+        (profit, flights, refused, crashes), days, reason = results[cell]
+        simulated_days += days
+        extended += reason == "prolongé"
+
+        status = ""
+        if crashes > 0: status = "💀 ÉCHEC SÉCU"
+        elif profit > best_profit:
+            best_profit = profit
+            best_config = cell
+            status = "⭐ RECORD"
+        elif refused > 6000: status = "⚠️ SATURATION"
+
+        if profit > 0 or status != "":
+            print(f"Pads={cell[0]} Garage={cell[1]:<2} | {profit:<10,.0f}€ | {refused:<8} | {crashes:<8} | "
+                  f"{days:>4.0f} {reason:<10} | {status}")
+
+    fixed_days = reference_days * len(cells)
+    print("-" * 100)
+    print(f"📉 Jours simulés : {simulated_days:,.0f} / {fixed_days:,} (horizon fixe) | "
+          f"{fixed_days - simulated_days:,.0f} jours économisés ({1 - simulated_days / fixed_days:.0%}) | "
+          f"{extended} cellule(s) prolongée(s) près de la frontière de crash")
+    if best_config:
+        print(f"🏆 INFRASTRUCTURE OPTIMALE : {best_config[0]} Pads + {best_config[1]} Garage")
+        save_best_params(best_config, params_path)
+    else:
+        print("❌ Aucune configuration rentable.")
+    return best_config
+
+if __name__ == "__main__":
+    import time
+    import argparse
+    from optimizer import evaluate_cell
+    parser = argparse.ArgumentParser(description="SkyHub - Horizon adaptatif contre horizon fixe")
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut : config.OPTIMIZER_WORKERS)")
+    args = parser.parse_args()
+
+    scenario = default_scenario()
+    seed = config.OPTIMIZER_SEED
+    workers = config.OPTIMIZER_WORKERS if args.workers is None else args.workers
+    cells = scenario.grid()
+
+    start = time.perf_counter()
+    adaptive = dict(run_tasks([(cell, cell[0], cell[1], derive_seed(seed, *cell), scenario) for cell in cells],
+                              workers, evaluate_adaptive))
+    adaptive_time = time.perf_counter() - start
+    start = time.perf_counter()
+    fixed = dict(run_tasks([(cell, cell[0], cell[1], derive_seed(seed, *cell), None, scenario) for cell in cells],
+                           workers, evaluate_cell))
+    fixed_time = time.perf_counter() - start
+
+    def best(results):
+        safe = [cell for cell in cells if results[cell][3] == 0]
+        return max(safe, key=lambda cell: results[cell][0]) if safe else None
+
+    errors = [abs(adaptive[cell][0][0] - fixed[cell][0]) / abs(fixed[cell][0]) for cell in cells if fixed[cell][0]]
+    crash_disagreements = sum(1 for cell in cells if (adaptive[cell][0][3] > 0) != (fixed[cell][3] > 0))
+    days = sum(adaptive[cell][1] for cell in cells)
+    reasons = {}
+    for cell in cells:
+        reasons[adaptive[cell][2]] = reasons.get(adaptive[cell][2], 0) + 1
+
+    print(f"Cellules : {len(cells)} | arrêts : " + ", ".join(f"{reason} {count}" for reason, count in reasons.items()))
+    print(f"📉 Jours simulés : {days:,.0f} au lieu de {scenario.sim_duration_days * len(cells):,} | "
+          f"⏱️ {adaptive_time:.1f}s au lieu de {fixed_time:.1f}s")
+    print(f"Écart de profit moyen : {sum(errors) / len(errors):.1%} | désaccords sur le crash : {crash_disagreements}")
+    print(f"🏆 Optimum adaptatif {best({cell: adaptive[cell][0] for cell in cells})} | optimum fixe {best(fixed)}")
@@ -0,0 +1,151 @@
+"""
+MÉTRIQUES DE SIMULATION - SKYHUB PROJECT
+Instrumentation légère d'un Vertiport : au lieu des journaux (print), des compteurs alloués
+une fois pour toute la durée simulée, incrémentés en quelques opérations par minute.
+
+Par heure simulée : histogramme de la longueur de la file d'approche, occupation des pads et
+du garage, refus, crashs, atterrissages et marge minimale avant crash (autonomie restante
+à l'atterrissage, en minutes de vol). Sur toute la simulation : distributions du temps
+d'attente en approche et de la marge à l'atterrissage.
+
+Les métriques de plusieurs réplications se fusionnent (merge) et s'exportent en tableaux
+NumPy compacts (to_arrays, save) pour comprendre pourquoi une configuration échoue.
+"""
+import math
+import config
+
+# Champs par heure (longueur : nombre d'heures simulées)
+HOURLY_FIELDS = ("pad_busy", "garage_busy", "refusals", "crashes", "landings", "wait_total")
+
+class VertiportMetrics:
+    """ Compteurs d'une ou plusieurs simulations de même durée et de même configuration """
+    def __init__(self, days: int, num_pads: int, num_garage: int, consumption_per_min: float):
+        self.hours = days * 24
+        self.num_pads = num_pads
+        self.num_garage = num_garage
+        self.consumption_per_min = consumption_per_min
+        self.runs = 1
+        self.minute = 0         # Minute courante de la simulation en cours
+
+        self.queue_bins = config.METRICS_QUEUE_BINS
+        self.wait_bins = config.METRICS_WAIT_BINS
+        self.margin_bins = config.METRICS_MARGIN_BINS
+
+        # Histogramme (heure, longueur de file) à plat : queue_hist[heure * queue_bins + longueur]
+        # (la dernière classe regroupe les longueurs au-delà)
+        self.queue_hist = [0] * (self.hours * self.queue_bins)
+        self.pad_busy = [0] * self.hours        # Somme sur l'heure des pads occupés (pads x minutes)
+        self.garage_busy = [0] * self.hours
+        self.refusals = [0] * self.hours
+        self.crashes = [0] * self.hours
+        self.landings = [0] * self.hours
+        self.wait_total = [0] * self.hours      # Minutes d'attente en approche des drones posés
+        self.min_margin = [math.inf] * self.hours
+
+        self.wait_hist = [0] * self.wait_bins       # Attente en approche (minutes)
+        self.margin_hist = [0] * self.margin_bins   # Marge à l'atterrissage (minutes de vol)
+
+    # --- Enregistrement (chemin chaud) ---
+
+    def record_minute(self, hub):
+        """ Fin d'une minute de simulation : file d'approche et occupation """
+        hour = self.minute // 60
+        queue = len(hub.approach_queue)
+        bins = self.queue_bins
+        self.queue_hist[hour * bins + (queue if queue < bins else bins - 1)] += 1
+        self.pad_busy[hour] += hub.occupied_pads
+        self.garage_busy[hour] += hub.occupied_spots
+        self.minute += 1
+
+    def record_landing(self, drone):
+        """ Atterrissage : temps passé en approche et autonomie restante """
+        hour = self.minute // 60
+        wait = drone.waiting_time
+        self.landings[hour] += 1
+        self.wait_total[hour] += wait
+        self.wait_hist[wait if wait < self.wait_bins else self.wait_bins - 1] += 1
+
+        margin = drone.current_battery / self.consumption_per_min
+        if margin < self.min_margin[hour]:
+            self.min_margin[hour] = margin
+        bucket = int(margin)
+        self.margin_hist[bucket if bucket < self.margin_bins else self.margin_bins - 1] += 1
+
+    def record_refusal(self):
+        self.refusals[self.minute // 60] += 1
+
+    def record_crash(self):
+        self.crashes[self.minute // 60] += 1
+
+    # --- Agrégation ---
+
+    def merge(self, other: "VertiportMetrics") -> "VertiportMetrics":
+        """ Ajoute les compteurs d'une autre réplication (même durée, mêmes classes) """
+        if (other.hours, other.queue_bins, other.wait_bins, other.margin_bins) != \
+                (self.hours, self.queue_bins, self.wait_bins, self.margin_bins):
+            raise ValueError("Métriques incompatibles : durée ou classes d'histogramme différentes")
+        for name in ("queue_hist", "wait_hist", "margin_hist") + HOURLY_FIELDS:
+            mine = getattr(self, name)
+            for i, value in enumerate(getattr(other, name)):
+                mine[i] += value
+        self.min_margin = [min(a, b) for a, b in zip(self.min_margin, other.min_margin)]
+        self.runs += other.runs
+        return self
+
+    def to_arrays(self) -> dict:
+        """ Tableaux NumPy compacts (entiers 32 bits, histogramme de file en 2D heure x longueur) """
+        import numpy as np
+        arrays = {name: np.array(getattr(self, name), dtype=np.int32) for name in HOURLY_FIELDS}
+        arrays["queue_hist"] = np.array(self.queue_hist, dtype=np.int32).reshape(self.hours, self.queue_bins)
+        arrays["wait_hist"] = np.array(self.wait_hist, dtype=np.int32)
+        arrays["margin_hist"] = np.array(self.margin_hist, dtype=np.int32)
+        arrays["min_margin"] = np.array(self.min_margin, dtype=np.float32)
+        arrays["shape"] = np.array([self.runs, self.num_pads, self.num_garage], dtype=np.int32)
+        return arrays
+
+    def save(self, path: str):
+        """ Archive .npz (une entrée par tableau de to_arrays) """
+        import numpy as np
+        np.savez_compressed(path, **self.to_arrays())
+
+    # --- Lecture ---
+
+    def hour_of_day(self) -> list:
+        """
+        Profil moyen par heure de la journée (toutes réplications et tous jours confondus) :
+        [(heure, file moyenne, file p95, occupation pads, occupation garage, refus/jour,
+          crashs, attente moyenne, marge minimale)]
+        """
+        days = self.hours // 24
+        rows = []
+        for h in range(24):
+            hours = range(h, self.hours, 24)
+            hist = [sum(self.queue_hist[hour * self.queue_bins + b] for hour in hours) for b in range(self.queue_bins)]
+            minutes = sum(hist)
+            mean_queue = sum(b * n for b, n in enumerate(hist)) / minutes if minutes else 0.0
+            p95, seen = 0, 0
+            for b, n in enumerate(hist):
+                seen += n
+                if seen >= 0.95 * minutes:
+                    p95 = b
+                    break
+            pad_use = sum(self.pad_busy[hour] for hour in hours) / (minutes * self.num_pads) if minutes and self.num_pads else 0.0
+            garage_use = sum(self.garage_busy[hour] for hour in hours) / (minutes * self.num_garage) if minutes and self.num_garage else 0.0
+            landings = sum(self.landings[hour] for hour in hours)
+            mean_wait = sum(self.wait_total[hour] for hour in hours) / landings if landings else 0.0
+            rows.append((h, mean_queue, p95, pad_use, garage_use,
+                         sum(self.refusals[hour] for hour in hours) / (days * self.runs),
+                         sum(self.crashes[hour] for hour in hours), mean_wait,
+                         min(self.min_margin[hour] for hour in hours)))
+        return rows
+
+    def report(self) -> str:
+        """ Tableau par heure de la journée, lisible en console """
+        lines = [f"{'HEURE':<6} | {'FILE (moy / p95)':<16} | {'PADS':<5} | {'GARAGE':<6} | {'REFUS/J':<8} | "
+                 f"{'CRASHS':<6} | {'ATTENTE':<8} | {'MARGE MIN'}"]
+        for h, mean_queue, p95, pad_use, garage_use, refusals, crashes, mean_wait, margin in self.hour_of_day():
+            p95_str = f"{p95}+" if p95 == self.queue_bins - 1 else f"{p95}"
+            margin_str = "—" if margin == math.inf else f"{margin:.1f} min"
+            lines.append(f"{h:02d}h    | {mean_queue:>6.1f} / {p95_str:<7} | {pad_use:>4.0%} | {garage_use:>5.0%} | "
+                         f"{refusals:>8.1f} | {crashes:<6} | {mean_wait:>4.1f} min | {margin_str}")
+        return "\n".join(lines)
@@ -0,0 +1,125 @@
+"""
+STATISTIQUES MONTE CARLO - SKYHUB PROJECT
+Agrège les réplications d'une configuration (pads, garage) :
+profit moyen, probabilité de crash et intervalles de confiance.
+"""
+import math
+import statistics
+
+def t_cdf(t: float, df: int) -> float:
+    """ Fonction de répartition de Student pour df entier (somme finie en cos(θ), θ = atan(t/√df)) """
+    theta = math.atan(t / math.sqrt(df))
+    cos2 = math.cos(theta) ** 2
+    term, total = 1.0, 1.0
+    for k in range(1 + df % 2, df - 1, 2):
+        term *= cos2 * k / (k + 1)
+        total += term
+    if df % 2:
+        inside = 2 / math.pi * (theta + (math.sin(theta) * math.cos(theta) * total if df > 1 else 0.0))
+    else:
+        inside = math.sin(theta) * total
+    return 0.5 + inside / 2
+
+def t_quantile(p: float, df: int) -> float:
+    """
+    Quantile de la loi de Student : exact pour df=1,2 ; au-delà, développement de Cornish-Fisher
+    affiné par Newton sur la répartition exacte (Cornish-Fisher seul est trop étroit à petit df :
+    3.159 au lieu de 3.182 pour df=3 à 97.5%).
+    """
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+
+    z = statistics.NormalDist().inv_cdf(p)
+    t = (z
+         + (z**3 + z) / (4 * df)
+         + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+         + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3))
+    log_norm = math.lgamma((df + 1) / 2) - math.lgamma(df / 2) - 0.5 * math.log(df * math.pi)
+    for _ in range(20):
+        density = math.exp(log_norm - (df + 1) / 2 * math.log1p(t * t / df))
+        step = (t_cdf(t, df) - p) / density
+        t -= step
+        if abs(step) < 1e-12 * max(1.0, abs(t)):
+            break
+    return t
+
+def wilson_interval(successes: int, n: int, confidence: float) -> tuple:
+    """ Intervalle de Wilson pour une proportion (robuste quand on observe 0 crash) """
+    if n == 0:
+        return 0.0, 1.0
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    p_hat = successes / n
+    denom = 1 + z**2 / n
+    center = (p_hat + z**2 / (2 * n)) / denom
+    half = z * math.sqrt(p_hat * (1 - p_hat) / n + z**2 / (4 * n**2)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+class CellStats:
+    """
+    Accumule les réplications d'une cellule de la grille.
+    """
+    def __init__(self, num_pads: int, num_garage: int, confidence: float = 0.95):
+        self.num_pads = num_pads
+        self.num_garage = num_garage
+        self.confidence = confidence
+
+        self.profits = []
+        self.flights = []
+        self.refusals = []
+        self.crashed_runs = 0   # Nombre de réplications avec au moins 1 crash
+        self.total_crashes = 0
+
+        self.eliminated = False  # Arrêtée par la course statistique
+
+    def add(self, result: tuple):
+        """ Ajoute le résultat (profit, vols, refus, crashs) d'une réplication """
+        profit, flights, refusals, crashes = result
+        self.profits.append(profit)
+        self.flights.append(flights)
+        self.refusals.append(refusals)
+        self.total_crashes += crashes
+        if crashes > 0:
+            self.crashed_runs += 1
+
+    @property
+    def n(self) -> int:
+        return len(self.profits)
+
+    @property
+    def mean_profit(self) -> float:
+        return statistics.fmean(self.profits) if self.profits else -float('inf')
+
+    @property
+    def mean_refusals(self) -> float:
+        return statistics.fmean(self.refusals) if self.refusals else 0.0
+
+    @property
+    def mean_flights(self) -> float:
+        return statistics.fmean(self.flights) if self.flights else 0.0
+
+    @property
+    def profit_half_width(self) -> float:
+        """ Demi-largeur de l'IC (Student) sur le profit moyen """
+        if self.n < 2:
+            return float('inf')
+        sd = statistics.stdev(self.profits)
+        return t_quantile(0.5 + self.confidence / 2, self.n - 1) * sd / math.sqrt(self.n)
+
+    @property
+    def profit_ci(self) -> tuple:
+        half = self.profit_half_width
+        return self.mean_profit - half, self.mean_profit + half
+
+    @property
+    def crash_probability(self) -> float:
+        return self.crashed_runs / self.n if self.n else 0.0
+
+    @property
+    def crash_ci(self) -> tuple:
+        return wilson_interval(self.crashed_runs, self.n, self.confidence)
+
+    def is_dominated_by(self, leader: "CellStats") -> bool:
+        """ Vrai si la borne haute de notre IC est sous la borne basse de celle du leader """
+        return self.profit_ci[1] < leader.profit_ci[0]
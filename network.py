@@ -0,0 +1,453 @@
+"""
+RÉSEAU DE VERTIPORTS - SKYHUB PROJECT
+Plusieurs Vertiports échangent la même flotte : un départ d'un hub devient, après le temps de
+vol de la route, une arrivée dans un autre. Les hubs de périphérie partent le matin vers le
+centre (profil d'arrivée du hub isolé), ceux du centre le soir vers la périphérie (profil de départ).
+
+Parallélisme : les hubs sont répartis entre processus (secteurs angulaires, pour que les routes
+entre processus soient longues) et synchronisés par fenêtres conservatrices. Un vol entre deux
+processus dure au moins 'lookahead' minutes : pendant une fenêtre de cette durée, chaque processus
+avance ses hubs sans rien attendre des autres, puis les vols en cours sont échangés. Les arrivées
+d'une même minute sont livrées dans un ordre fixe (minute, hub d'origine, numéro du vol) : le
+résultat ne dépend pas du nombre de processus.
+
+Limite : dans une ville dense, presque chaque hub a un voisin à 3 minutes (NETWORK_TURN_MIN + vol
+court), quel que soit le découpage ; la fenêtre ne dépasse donc pas 3 minutes et l'échange bloquant
+qui la termine coûte plus que ce que le découpage fait gagner (mesuré : x0.5 à x0.8 avec 4 processus
+pour 20 à 50 hubs). Le mode réparti sert au contrôle d'équivalence ; la simulation en série reste le défaut.
+"""
+import json
+import math
+import heapq
+import random
+import bisect
+import dataclasses
+import multiprocessing
+import config
+from evtol import EVTOL, EN_RECHARGE, AU_REPOS
+from vertiport import Vertiport
+from economics import month_economics
+from scenario import default_scenario
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Hub:
+    name: str
+    x: float            # Position (km)
+    y: float
+    kind: str           # "centre" (départs le soir) ou "peripherie" (départs le matin)
+    demand: float       # Multiplicateur du profil horaire de départ
+    fleet: int          # Drones basés au hub au début du mois
+
+class Network:
+    """ Hubs, temps de vol (minutes entières) et destinations pondérées de chaque hub """
+    def __init__(self, hubs):
+        self.hubs = tuple(hubs)
+        count = len(self.hubs)
+        if count < 2:
+            raise ValueError("Un réseau compte au moins deux hubs")
+
+        self.flight_time = [[0] * count for _ in range(count)]
+        for i, a in enumerate(self.hubs):
+            for j, b in enumerate(self.hubs):
+                if i != j:
+                    distance = math.hypot(a.x - b.x, a.y - b.y)
+                    self.flight_time[i][j] = math.ceil(config.NETWORK_TURN_MIN + distance / config.NETWORK_CRUISE_KM_PER_MIN)
+
+        # Déroutement : le hub le plus proche
+        self.alternate = [min((j for j in range(count) if j != i), key=lambda j: self.flight_time[i][j])
+                          for i in range(count)]
+
+        # Destinations des passagers : hubs de l'autre type à portée, pondérés par demande / temps de vol
+        self.routes = []
+        for i, origin in enumerate(self.hubs):
+            reachable = [j for j in range(count) if j != i and self.flight_time[i][j] <= config.NETWORK_MAX_FLIGHT_MIN]
+            targets = [j for j in reachable if self.hubs[j].kind != origin.kind] or reachable or [self.alternate[i]]
+            cumulative, total = [], 0.0
+            for j in targets:
+                total += self.hubs[j].demand / self.flight_time[i][j]
+                cumulative.append(total)
+            self.routes.append((cumulative, targets))
+
+    @classmethod
+    def city(cls, num_hubs: int = None, seed: int = None) -> "Network":
+        """ Ville synthétique : centres groupés au milieu, périphérie répartie sur le disque """
+        num_hubs = config.NETWORK_HUBS if num_hubs is None else num_hubs
+        rng = random.Random(config.OPTIMIZER_SEED if seed is None else seed)
+        centres = max(1, round(num_hubs * config.NETWORK_CENTRE_SHARE))
+        hubs = []
+        for k in range(num_hubs):
+            centre = k < centres
+            radius = config.NETWORK_RADIUS_KM * (0.25 * math.sqrt(rng.random()) if centre else 0.3 + 0.7 * math.sqrt(rng.random()))
+            angle = rng.uniform(0, 2 * math.pi)
+            demand = round(rng.uniform(0.4, 1.0) if centre else rng.uniform(0.1, 0.3), 3)
+            hubs.append(Hub(f"{'C' if centre else 'P'}{k:02d}", round(radius * math.cos(angle), 2),
+                            round(radius * math.sin(angle), 2), "centre" if centre else "peripherie", demand,
+                            round(demand * config.NETWORK_FLEET_PER_DEMAND)))
+        return cls(hubs)
+
+    @classmethod
+    def load(cls, path: str) -> "Network":
+        """ Réseau JSON : {"hubs": [{"name", "x", "y", "kind", "demand", "fleet"}, ...]} """
+        with open(path) as f:
+            data = json.load(f)
+        return cls(Hub(**{field.name: hub[field.name] for field in dataclasses.fields(Hub)}) for hub in data["hubs"])
+
+    def departure_probabilities(self, index: int, scenario) -> list:
+        """ Probabilité de demande de départ par minute, pour chaque heure du mois """
+        hub = self.hubs[index]
+        probabilities = []
+        for day in range(scenario.sim_duration_days):
+            if day % 7 >= 5:
+                profile = scenario.profile_weekend_flat
+            elif hub.kind == "centre":
+                profile = scenario.profile_departure_weekday
+            else:
+                profile = scenario.profile_arrival_weekday
+            probabilities.extend(min(p * hub.demand, 1.0) for p in profile)
+        return probabilities
+
+    def partition(self, shards: int) -> list:
+        """ Secteurs angulaires contigus autour du barycentre, de tailles égales à un hub près """
+        shards = max(1, min(shards, len(self.hubs)))
+        cx = sum(h.x for h in self.hubs) / len(self.hubs)
+        cy = sum(h.y for h in self.hubs) / len(self.hubs)
+        order = sorted(range(len(self.hubs)), key=lambda i: math.atan2(self.hubs[i].y - cy, self.hubs[i].x - cx))
+        return [sorted(order[k * len(order) // shards:(k + 1) * len(order) // shards]) for k in range(shards)]
+
+    def lookahead(self, parts: list) -> int:
+        """ Plus court vol entre deux processus : durée maximale d'une fenêtre de synchronisation """
+        owner = {i: k for k, part in enumerate(parts) for i in part}
+        return min((self.flight_time[i][j] for i in owner for j in owner if owner[i] != owner[j]),
+                   default=None)
+
+    def initial_sizes(self, scenario) -> list:
+        """ (pads, garage) de départ : loi de Little sur les arrivées moyennes d'un jour de semaine """
+        inbound = [0.0] * len(self.hubs)
+        for i in range(len(self.hubs)):
+            rate = sum(self.departure_probabilities(i, scenario.replace(sim_duration_days=1))) / 24
+            cumulative, targets = self.routes[i]
+            previous = 0.0
+            for weight, j in zip(cumulative, targets):
+                inbound[j] += rate * (weight - previous) / cumulative[-1]
+                previous = weight
+        sizes = []
+        for hub, rate in zip(self.hubs, inbound):
+            pads = max(1, math.ceil(rate * scenario.avg_cycle_time))
+            garage = max(hub.fleet, 3 * pads)
+            sizes.append((pads, math.ceil(garage / config.NETWORK_GARAGE_STEP) * config.NETWORK_GARAGE_STEP))
+        return sizes
+
+    def to_dict(self) -> dict:
+        return {"hubs": [dataclasses.asdict(hub) for hub in self.hubs]}
+
+# Compteurs par hub
+TRIPS, DEPARTURES, LOST, REFUSED_FULL, REFUSED_WAIT, EMERGENCIES, LOST_IN_FLIGHT, PEAK_PADS, PEAK_SPOTS, PEAK_QUEUE = range(10)
+STAT_NAMES = ("trajets", "departs", "demandes_perdues", "refus_plein", "refus_attente", "urgences",
+              "crashs_en_vol", "pic_pads", "pic_garage", "pic_file")
+
+class Shard:
+    """
+    Hubs simulés par un même processus. Un vol est le tuple
+    (minute d'arrivée, hub d'origine, numéro, hub de destination, drone, batterie, dérouté).
+    """
+    def __init__(self, network: Network, indices: list, sizes: list, seed: int, scenario=None):
+        from optimizer import derive_seed
+        self.network = network
+        self.scenario = default_scenario() if scenario is None else scenario
+        self.indices = list(indices)
+        self.hubs = {}
+        self.pending = {i: [] for i in self.indices}
+        self.sequence = {i: 0 for i in self.indices}
+        self.stats = {i: [0] * len(STAT_NAMES) for i in self.indices}
+        self.local = []
+
+        for i in self.indices:
+            pads, garage = sizes[i]
+            spec = network.hubs[i]
+            if spec.fleet > pads + garage - 1:
+                raise ValueError(f"{spec.name} : {spec.fleet} drones basés pour {pads + garage} places")
+            hub = Vertiport(spec.name, pads, garage, verbose=False, scenario=self.scenario)
+
+            # Flotte basée : identifiants globaux, indépendants du découpage en processus
+            first_id = sum(h.fleet for h in network.hubs[:i]) + 1
+            for ident in range(first_id, first_id + spec.fleet):
+                drone = EVTOL(ident, self.scenario)
+                if hub.free_spots:
+                    drone.status = AU_REPOS
+                    hub.occupy_slot(hub.parking_spots, hub.find_free_index(hub.parking_spots), drone)
+                else:
+                    drone.status = EN_RECHARGE
+                    hub.occupy_slot(hub.charging_pads, hub.find_free_index(hub.charging_pads), drone)
+
+            self.hubs[i] = hub
+            rng = random.Random(derive_seed(seed, "network", i))
+            cumulative, targets = network.routes[i]
+            self.local.append((i, hub, rng, network.departure_probabilities(i, self.scenario), self.pending[i],
+                               self.stats[i], cumulative, targets))
+
+    def send(self, origin: int, dest: int, ident, battery: float, minute: int, diverted: bool, outgoing: list):
+        """ Décollage vers dest : le vol part chez un hub de ce processus ou dans la boîte d'envoi """
+        flight_time = self.network.flight_time[origin][dest]
+        battery -= flight_time * self.scenario.consumption_per_min
+        if battery <= 0:
+            self.stats[origin][LOST_IN_FLIGHT] += 1
+            return
+        self.sequence[origin] += 1
+        flight = (minute + flight_time, origin, self.sequence[origin], dest, ident, battery, diverted)
+        if dest in self.pending:
+            heapq.heappush(self.pending[dest], flight)
+        else:
+            outgoing.append(flight)
+
+    def deliver(self, flights: list):
+        """ Vols venus d'autres processus """
+        for flight in flights:
+            heapq.heappush(self.pending[flight[3]], flight)
+
+    def land(self, i: int, hub: Vertiport, flight: tuple, minute: int, outgoing: list):
+        """ Arrivée : admission par le contrôleur du hub, sinon déroutement (puis atterrissage d'urgence) """
+        _, _, _, _, ident, battery, diverted = flight
+        stats = self.stats[i]
+        if hub.can_accept_battery(battery):
+            priority = 1
+            if not diverted:
+                stats[TRIPS] += 1
+        else:
+            full = len(hub.approach_queue) + hub.occupied_pads + hub.occupied_spots >= \
+                   hub.num_charging_pads + hub.num_parking_spots - 1
+            stats[REFUSED_FULL if full else REFUSED_WAIT] += 1
+            if not diverted:
+                self.send(i, self.network.alternate[i], ident, battery, minute, True, outgoing)
+                return
+            # Déjà dérouté : le drone n'a plus d'alternative
+            stats[EMERGENCIES] += 1
+            priority = 2
+        drone = EVTOL(ident, self.scenario)
+        drone.current_battery = battery
+        drone.mission_priority = priority
+        hub.add_to_approach(drone)
+
+    def advance(self, start: int, until: int) -> list:
+        """ Simule les minutes [start, until) ; renvoie les vols destinés à d'autres processus """
+        outgoing = []
+        land, send = self.land, self.send
+        for minute in range(start, until):
+            hour = minute // 60
+            for i, hub, rng, probabilities, pending, stats, cumulative, targets in self.local:
+                while pending and pending[0][0] == minute:
+                    land(i, hub, heapq.heappop(pending), minute, outgoing)
+
+                if rng.random() < probabilities[hour]:
+                    drone = hub.dispatch_mission("Taxi", 1)
+                    if drone:
+                        dest = targets[bisect.bisect(cumulative, rng.random() * cumulative[-1])]
+                        stats[DEPARTURES] += 1
+                        send(i, dest, drone._drone_id, drone.current_battery, minute, False, outgoing)
+                    else:
+                        stats[LOST] += 1
+
+                hub.update_simulation()
+                if hub.occupied_pads > stats[PEAK_PADS]: stats[PEAK_PADS] = hub.occupied_pads
+                if hub.occupied_spots > stats[PEAK_SPOTS]: stats[PEAK_SPOTS] = hub.occupied_spots
+                if len(hub.approach_queue) > stats[PEAK_QUEUE]: stats[PEAK_QUEUE] = len(hub.approach_queue)
+        return outgoing
+
+    def results(self) -> dict:
+        """ {hub: dict des compteurs} ; les crashs comptent ceux de la file et ceux en vol """
+        results = {}
+        for i in self.indices:
+            hub = self.hubs[i]
+            row = dict(zip(STAT_NAMES, self.stats[i]))
+            row.update(pads=hub.num_charging_pads, garage=hub.num_parking_spots,
+                       crashs=hub.crashes + row["crashs_en_vol"])
+            results[i] = row
+        return results
+
+def shard_worker(conn, network: Network, indices: list, sizes: list, seed: int, scenario):
+    """ Processus d'un groupe de hubs : (début, fin, vols entrants) -> vols sortants ; None -> résultats """
+    shard = Shard(network, indices, sizes, seed, scenario)
+    while True:
+        message = conn.recv()
+        if message is None:
+            conn.send(shard.results())
+            conn.close()
+            return
+        start, until, flights = message
+        shard.deliver(flights)
+        conn.send(shard.advance(start, until))
+
+def simulate_network(network: Network, sizes: list, seed: int, scenario=None, workers: int = 1) -> dict:
+    """ Un mois du réseau ; renvoie {hub: compteurs} (identique quel que soit 'workers') """
+    scenario = default_scenario() if scenario is None else scenario
+    duration = scenario.sim_duration_days * 1440
+    parts = network.partition(workers)
+    if len(parts) == 1:
+        shard = Shard(network, parts[0], sizes, seed, scenario)
+        shard.advance(0, duration)
+        return shard.results()
+
+    window = network.lookahead(parts)
+    owner = {i: k for k, part in enumerate(parts) for i in part}
+    context = multiprocessing.get_context()
+    connections, processes = [], []
+    for part in parts:
+        parent, child = context.Pipe()
+        process = context.Process(target=shard_worker, args=(child, network, part, sizes, seed, scenario), daemon=True)
+        process.start()
+        child.close()
+        connections.append(parent)
+        processes.append(process)
+
+    try:
+        inbox = [[] for _ in parts]
+        for start in range(0, duration, window):
+            until = min(start + window, duration)
+            for conn, flights in zip(connections, inbox):
+                conn.send((start, until, flights))
+            inbox = [[] for _ in parts]
+            for conn in connections:
+                for flight in conn.recv():
+                    inbox[owner[flight[3]]].append(flight)
+
+        results = {}
+        for conn in connections:
+            conn.send(None)
+            results.update(conn.recv())
+        return dict(sorted(results.items()))
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+def network_profit(results: dict, scenario=None) -> float:
+    """ Somme des bilans des hubs : recettes des trajets servis, amortissement, pénalités de crash """
+    scenario = default_scenario() if scenario is None else scenario
+    return sum(month_economics(row["pads"], row["garage"], row["trajets"], row["crashs"], scenario=scenario)
+               for row in results.values())
+
+def resize(network: Network, sizes: list, results: dict) -> list:
+    """
+    Ajustement simultané de tous les hubs d'après une simulation du réseau : un hub qui refuse
+    des atterrissages s'agrandit (garage s'il était plein, sinon pads), un hub jamais rempli se réduit
+    d'un cran.
+    """
+    step = config.NETWORK_GARAGE_STEP
+    resized = []
+    for i, (pads, garage) in enumerate(sizes):
+        row = results[i]
+        landings = row["trajets"] + row["refus_plein"] + row["refus_attente"]
+        pressure = row["crashs"] > 0 or \
+            (row["refus_plein"] + row["refus_attente"]) > config.NETWORK_REFUSAL_TOLERANCE * max(landings, 1)
+        if pressure:
+            if row["refus_plein"] >= row["refus_attente"]:
+                # Places manquantes : au moins la file d'attente de pointe
+                garage += max(step, math.ceil(row["pic_file"] / step) * step)
+            else:
+                pads += 1
+        else:
+            if row["pic_pads"] < pads and pads > 1:
+                pads -= 1
+            if row["pic_garage"] + step <= garage and garage - step >= network.hubs[i].fleet:
+                garage -= step
+        resized.append((pads, garage))
+    return resized
+
+def save_network_params(network: Network, sizes: list, profit: float, path: str = "best_network.json"):
+    data = network.to_dict()
+    for hub, (pads, garage) in zip(data["hubs"], sizes):
+        hub.update(num_pads=pads, num_garage=garage)
+    data["profit"] = profit
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"💾 Dimensionnement sauvegardé dans {path}")
+
+def main_network(workers: int, seed: int, network: Network, scenario=None, rounds: int = None,
+                 params_path: str = "best_network.json") -> list:
+    """
+    Dimensionnement conjoint : chaque manche simule tout le réseau puis ajuste tous les hubs à la
+    fois ; on garde le meilleur réseau sans crash. Renvoie les (pads, garage) de chaque hub.
+    """
+    import time
+    scenario = default_scenario() if scenario is None else scenario
+    rounds = config.NETWORK_SIZING_ROUNDS if rounds is None else rounds
+    parts = network.partition(workers)
+    print(f"--- 🌐 SKYHUB NETWORK | {len(network.hubs)} hubs | flotte {sum(h.fleet for h in network.hubs)} drones | "
+          f"{scenario.sim_duration_days} jours | Scénario : {scenario.name} ---")
+    print(f"Graine maître : {seed} | Processus : {len(parts)} | Fenêtre de synchronisation : "
+          f"{network.lookahead(parts) or scenario.sim_duration_days * 1440} min")
+    print("-" * 95)
+    print(f"{'MANCHE':<7} | {'PADS':>5} | {'GARAGE':>6} | {'TRAJETS':>8} | {'PERDUES':>8} | {'REFUS':>7} | "
+          f"{'CRASHS':>6} | {'PROFIT NET':>12} | {'DURÉE':>6}")
+    print("-" * 95)
+
+    sizes = network.initial_sizes(scenario)
+    best_sizes, best_profit, best_results = None, -float("inf"), None
+    seen = set()
+    for round_number in range(1, rounds + 1):
+        start = time.perf_counter()
+        results = simulate_network(network, sizes, seed, scenario, workers)
+        elapsed = time.perf_counter() - start
+        profit = network_profit(results, scenario)
+        crashes = sum(row["crashs"] for row in results.values())
+
+        status = ""
+        if crashes == 0 and profit > best_profit:
+            best_sizes, best_profit, best_results = sizes, profit, results
+            status = "⭐ RECORD"
+        print(f"{round_number:<7} | {sum(p for p, _ in sizes):>5} | {sum(g for _, g in sizes):>6} | "
+              f"{sum(row['trajets'] for row in results.values()):>8} | "
+              f"{sum(row['demandes_perdues'] for row in results.values()):>8} | "
+              f"{sum(row['refus_plein'] + row['refus_attente'] for row in results.values()):>7} | "
+              f"{crashes:>6} | {profit:>11,.0f}€ | {elapsed:>5.1f}s {status}", flush=True)
+
+        seen.add(tuple(sizes))
+        sizes = resize(network, sizes, results)
+        if tuple(sizes) in seen:
+            break       # Point fixe (ou cycle) de l'ajustement
+
+    print("-" * 95)
+    if best_sizes is None:
+        print("❌ Aucun dimensionnement sans crash.")
+        return None
+    print(f"🏆 RÉSEAU OPTIMAL : {sum(p for p, _ in best_sizes)} pads + {sum(g for _, g in best_sizes)} places de garage"
+          f" | {best_profit:,.0f}€")
+    for i, hub in enumerate(network.hubs):
+        row = best_results[i]
+        print(f"   {hub.name:<5} {hub.kind:<10} demande {hub.demand:.2f} | {row['pads']:>2} pads {row['garage']:>3} garage"
+              f" | trajets {row['trajets']:>6} | perdues {row['demandes_perdues']:>5} | refus {row['refus_plein'] + row['refus_attente']:>4}")
+    save_network_params(network, best_sizes, best_profit, params_path)
+    return best_sizes
+
+if __name__ == "__main__":
+    import time
+    import argparse
+    parser = argparse.ArgumentParser(description="SkyHub - Simulation d'un réseau de Vertiports")
+    parser.add_argument("--hubs", type=int, default=None, help="Hubs de la ville générée (défaut : config.NETWORK_HUBS)")
+    parser.add_argument("--network", default=None, metavar="FICHIER", help="Réseau JSON au lieu de la ville générée")
+    parser.add_argument("--workers", type=int, default=2, help="Processus du mode réparti comparé à la série (contrôle d'équivalence, pas une accélération)")
+    parser.add_argument("--seed", type=int, default=None, help="Graine (défaut : config.OPTIMIZER_SEED)")
+    parser.add_argument("--days", type=int, default=None, help="Durée (défaut : config.SIM_DURATION_DAYS)")
+    args = parser.parse_args()
+
+    seed = config.OPTIMIZER_SEED if args.seed is None else args.seed
+    network = Network.load(args.network) if args.network else Network.city(args.hubs, seed)
+    scenario = default_scenario()
+    if args.days is not None:
+        scenario = scenario.replace(sim_duration_days=args.days)
+    sizes = network.initial_sizes(scenario)
+
+    # Même mois en série et réparti : les résultats doivent être identiques
+    timings = {}
+    outcomes = {}
+    for workers in (1, args.workers):
+        start = time.perf_counter()
+        outcomes[workers] = simulate_network(network, sizes, seed, scenario, workers)
+        timings[workers] = time.perf_counter() - start
+        parts = network.partition(workers)
+        print(f"{len(network.hubs)} hubs | {scenario.sim_duration_days} jours | {len(parts)} processus "
+              f"(fenêtre {network.lookahead(parts) or '-'} min) : {timings[workers]:.1f}s | "
+              f"profit {network_profit(outcomes[workers], scenario):,.0f}€")
+    same = outcomes[1] == outcomes[args.workers]
+    print(f"Série vs {args.workers} processus : {'✅ identiques' if same else '❌ DIFFÉRENTS'} | "
+          f"durée série / répartie x{timings[1] / timings[args.workers]:.1f}")
@@ -1,70 +1,675 @@
+import os
 import random
 import json
+import hashlib
+import argparse
 import config
 from evtol import EVTOL
 from vertiport import Vertiport
+from montecarlo import CellStats
+from economics import month_economics, rescore
+from scenario import Scenario, default_scenario
 
-def run_month_simulation(num_pads: int, num_garage: int):
-    # Calcul des coûts fixes
-    total_capex = (num_pads * config.COST_PAD_BUILD) + (num_garage * config.COST_GARAGE_BUILD)
-    monthly_capex = total_capex / config.AMORTIZATION_MONTHS
-    sim_fixed_cost = monthly_capex * (config.SIM_DURATION_DAYS / 30)
+def derive_seed(master_seed: int, *keys) -> int:
+    """ Dérive une graine stable (indépendante du processus) pour une cellule de la grille """
+    payload = ":".join(str(k) for k in (master_seed,) + keys).encode()
+    return int.from_bytes(hashlib.sha256(payload).digest()[:8], "big")
 
-    hub = Vertiport("ParisHub", num_pads, num_garage, verbose=False)
-    drone_counter = 1
-    flights = 0
-    refusals = 0
-    
-    for day in range(config.SIM_DURATION_DAYS):
-        day_of_week = day % 7
-        is_weekend = (day_of_week >= 5)
-        
-        # SÉLECTION DU BON PROFIL
-        if is_weekend:
-            prof_arr = config.PROFILE_WEEKEND_FLAT
-            prof_dep = config.PROFILE_WEEKEND_FLAT
-        else:
-            prof_arr = config.PROFILE_ARRIVAL_WEEKDAY
-            prof_dep = config.PROFILE_DEPARTURE_WEEKDAY
-        
-        for hour in range(24):
-            prob_arrival = prof_arr[hour]
+class MonthSimulation:
+    """
+    run_month_simulation pas à pas : run(until) avance jusqu'à une minute donnée et l'état complet
+    (hub, flotte, générateur aléatoire, compteurs) se fige à tout moment (snapshot, voir whatif.py).
+    """
+    def __init__(self, num_pads: int, num_garage: int, seed: int = None, scenario=None, metrics=None):
+        # Générateur local : deux cellules ne partagent jamais le même flux aléatoire
+        self.rng = random.Random(seed)
+        self.scenario = default_scenario() if scenario is None else scenario
+        self.num_pads = num_pads
+        self.num_garage = num_garage
+
+        self.hub = Vertiport("ParisHub", num_pads, num_garage, verbose=False, scenario=self.scenario)
+        self.hub.metrics = metrics
+        self.drone_counter = 1
+        self.flights = 0
+        self.refusals = 0
+        self.minute = 0
+
+        # Modificateurs de trafic (branches « et si ? ») ; 1.0 et 0.2 : le mois de référence
+        self.arrival_scale = 1.0
+        self.urgent_share = 0.2
+
+    @property
+    def duration(self) -> int:
+        return self.scenario.sim_duration_days * 1440
+
+    def run(self, until: int = None):
+        """ Simule jusqu'à la minute 'until' exclue (défaut : fin du mois) """
+        until = self.duration if until is None else min(until, self.duration)
+        rng, scenario, hub = self.rng, self.scenario, self.hub
+        metrics = hub.metrics
+        drone_counter, flights, refusals = self.drone_counter, self.flights, self.refusals
+        minute = self.minute
+
+        while minute < until:
+            # SÉLECTION DU BON PROFIL (semaine / week-end), par tranche d'une heure au plus
+            prof_arr, prof_dep = scenario.day_profiles(minute // 1440)
+            hour = minute // 60 % 24
+            prob_arrival = prof_arr[hour] * self.arrival_scale
             prob_departure = prof_dep[hour]
-            
-            for _ in range(60):
+            urgent_share = self.urgent_share
+            end = min(until, (minute // 60 + 1) * 60)
+
+            for _ in range(minute, end):
                 # 1. GESTION DES ARRIVÉES (Selon profil Arrivée)
-                if random.random() < prob_arrival:
-                    temp_drone = EVTOL(f"D{drone_counter}")
-                    temp_drone.current_battery = random.randint(config.BATTERY_START_MIN, config.BATTERY_START_MAX)
-                    
-                    if hub.can_accept_drone(temp_drone):
-                        if random.random() < 0.2: temp_drone.mission_priority = 2
+                if rng.random() < prob_arrival:
+                    battery = rng.randint(scenario.battery_start_min, scenario.battery_start_max)
+
+                    # Le drone n'est construit qu'une fois admis (la majorité des arrivées est refusée)
+                    if hub.can_accept_battery(battery):
+                        temp_drone = EVTOL(drone_counter, scenario)
+                        temp_drone.current_battery = battery
+                        if rng.random() < urgent_share: temp_drone.mission_priority = 2
                         else: temp_drone.mission_priority = 0
-                        
+
                         hub.add_to_approach(temp_drone)
                         drone_counter += 1
                     else:
                         refusals += 1
-                
+                        if metrics is not None: metrics.record_refusal()
+
                 # 2. GESTION DES DÉPARTS (Selon profil Départ - INDÉPENDANT)
-                if random.random() < prob_departure:
+                if rng.random() < prob_departure:
                     if hub.dispatch_mission("Taxi", 0):
                         flights += 1
-                
+
                 # 3. MISE À JOUR
                 hub.update_simulation()
+            minute = end
+
+        self.drone_counter, self.flights, self.refusals = drone_counter, flights, refusals
+        self.minute = minute
+
+    def result(self) -> tuple:
+        """ (profit net, vols, refus, crashs) des minutes simulées jusqu'ici """
+        days = self.minute / 1440
+        net_profit = month_economics(self.num_pads, self.num_garage, self.flights, self.hub.crashes, days,
+                                     self.scenario)
+        return net_profit, self.flights, self.refusals, self.hub.crashes
+
+def run_month_simulation(num_pads: int, num_garage: int, seed: int = None, scenario=None, metrics=None,
+                         demand=None):
+    """ Un mois tiré des profils du scénario, ou la demande enregistrée 'demand' (demand_log.open_demand) """
+    if demand is not None:
+        return replay_month_simulation(num_pads, num_garage, demand, scenario, metrics)
+    simulation = MonthSimulation(num_pads, num_garage, seed, scenario, metrics)
+    simulation.run()
+    return simulation.result()
+
+def replay_month_simulation(num_pads: int, num_garage: int, demand, scenario=None, metrics=None):
+    """
+    Même simulation que run_month_simulation, mais la demande (arrivées, batteries, priorités,
+    départs) est rejouée depuis un flux pré-généré ou un journal enregistré (demand.DemandStream) :
+    aucun tirage aléatoire. Le flux est lu par blocs (mémoire constante) ; un journal réel peut
+    compter plusieurs arrivées ou départs dans la même minute.
+    """
+    scenario = default_scenario() if scenario is None else scenario
+    hub = Vertiport("ParisHub", num_pads, num_garage, verbose=False, scenario=scenario)
+    hub.metrics = metrics
+    drone_counter = 1
+    flights = 0
+    refusals = 0
+
+    # Blocs convertis en listes Python : lecture scalaire bien plus rapide que l'indexation NumPy
+    arrivals = demand.iter_arrivals()
+    departures = demand.iter_departures()
+    next_arrival = next(arrivals, None)
+    next_departure = next(departures, None)
+
+    for minute in range(demand.duration):
+        # 1. GESTION DES ARRIVÉES
+        while next_arrival is not None and next_arrival[0] == minute:
+            _, battery, priority = next_arrival
+            next_arrival = next(arrivals, None)
+
+            if hub.can_accept_battery(battery):
+                temp_drone = EVTOL(drone_counter, scenario)
+                temp_drone.current_battery = battery
+                temp_drone.mission_priority = priority
+                hub.add_to_approach(temp_drone)
+                drone_counter += 1
+            else:
+                refusals += 1
+                if metrics is not None: metrics.record_refusal()
+
+        # 2. GESTION DES DÉPARTS
+        while next_departure == minute:
+            next_departure = next(departures, None)
+            if hub.dispatch_mission("Taxi", 0):
+                flights += 1
 
-    # Bilan
-    revenue = flights * config.REVENUE_PER_FLIGHT
-    var_cost = flights * config.COST_PER_FLIGHT
-    crash_cost = hub.crashes * config.COST_CRASH_PENALTY
-    net_profit = revenue - var_cost - sim_fixed_cost - crash_cost
-    
+        # 3. MISE À JOUR
+        hub.update_simulation()
+
+    net_profit = month_economics(num_pads, num_garage, flights, hub.crashes, demand.days, scenario)
     return net_profit, flights, refusals, hub.crashes
 
-def main():
-    print(f"--- 🛡️ SKYHUB OPTIMIZER (Mode Pendulaire) ---")
-    print(f"Simulation sur {config.SIM_DURATION_DAYS} jours avec profils asymétriques.")
+def evaluate_cell(task):
+    """
+    Point d'entrée d'un worker : simule une cellule (pads, garage) avec sa graine dérivée,
+    ou rejoue le flux de demande commun stocké dans demand_dir
+    """
+    key, pads, garage, seed, demand_dir, scenario = task
+    if demand_dir:
+        from demand import load_demand
+        return key, replay_month_simulation(pads, garage, load_demand(demand_dir), scenario)
+    return key, run_month_simulation(pads, garage, seed, scenario)
+
+def evaluate_event(task):
+    """ Point d'entrée d'un worker (moteur à événements discrets) """
+    from event_engine import run_event_month_simulation
+    key, pads, garage, seed, demand_dir, scenario = task
+    if demand_dir:
+        from demand import load_demand
+        return key, run_event_month_simulation(pads, garage, seed, demand=load_demand(demand_dir), scenario=scenario)
+    return key, run_event_month_simulation(pads, garage, seed, scenario=scenario)
+
+def evaluate_metrics(task):
+    """ Point d'entrée d'un worker (diagnostic) : (clé, (résultat, métriques)) d'une simulation instrumentée """
+    from metrics import VertiportMetrics
+    key, pads, garage, seed, demand_dir, scenario = task
+    if demand_dir:
+        from demand import load_demand
+        demand = load_demand(demand_dir)
+        metrics = VertiportMetrics(demand.days, pads, garage, scenario.consumption_per_min)
+        return key, (replay_month_simulation(pads, garage, demand, scenario, metrics), metrics)
+    metrics = VertiportMetrics(scenario.sim_duration_days, pads, garage, scenario.consumption_per_min)
+    return key, (run_month_simulation(pads, garage, seed, scenario, metrics), metrics)
+
+SCALAR_EVALUATORS = {"object": evaluate_cell, "event": evaluate_event}
+
+def evaluate_batch(task):
+    """ Point d'entrée d'un worker (moteur vectorisé) : toutes les réplications d'une cellule d'un coup """
+    from batch_engine import run_batch_month_simulation  # NumPy n'est requis que pour ce moteur
+    key, pads, garage, seeds, demand_dirs, scenario = task
+    if demand_dirs:
+        from demand import load_demand
+        return key, run_batch_month_simulation(pads, garage, demand=[load_demand(d) for d in demand_dirs],
+                                               scenario=scenario)
+    return key, run_batch_month_simulation(pads, garage, seeds, scenario=scenario)
+
+class SharedPool:
+    """
+    Pool de processus ouvert une seule fois et réutilisé par toutes les manches et tous les
+    scénarios d'une exécution ; se passe partout où un nombre de workers est attendu.
+    (concurrent.futures n'est importé qu'ici : les exécutions en série démarrent sans multiprocessing)
+    """
+    def __init__(self, workers: int):
+        from concurrent.futures import ProcessPoolExecutor
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.workers = workers
+
+    def submit(self, fn, *args):
+        return self.executor.submit(fn, *args)
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+    def __str__(self):
+        return str(self.workers)
+
+def run_tasks(tasks, workers=1, evaluate=evaluate_cell):
+    """
+    Exécute des tâches (clé, pads, garage, graine(s), flux, scénario) et renvoie les résultats AU FIL DE L'EAU
+    (ordre de fin d'exécution en parallèle, ordre des tâches en série).
+    workers : nombre de processus, ou un SharedPool déjà ouvert.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    if isinstance(workers, SharedPool):
+        futures = [workers.submit(evaluate, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+        return
+
+    if workers <= 1:
+        for task in tasks:
+            yield evaluate(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(evaluate, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+def make_job(key, master_seed: int, pads: int, garage: int, seed: int, rep: int, demand_dirs=None,
+             scenario=None) -> tuple:
+    """
+    Simulation à évaluer : (clé, pads, garage, graine, flux, scénario, source). La source identifie le
+    hasard de la simulation pour le cache : sa graine, celle du flux commun qu'elle rejoue ou l'empreinte
+    du journal de demande enregistré.
+    """
+    scenario = default_scenario() if scenario is None else scenario
+    if demand_dirs:
+        from demand import demand_source, STREAM_VERSION
+        source = (demand_source(demand_dirs[rep])
+                  or f"demand:v{STREAM_VERSION}:{derive_seed(master_seed, 'demand', rep)}")
+        return key, pads, garage, seed, demand_dirs[rep], scenario, source
+    return key, pads, garage, seed, None, scenario, f"seed:{seed}"
+
+def evaluate_jobs(jobs, workers=1, engine: str = "object", cache=None, samples=None):
+    """
+    Évalue des simulations (make_job) et renvoie (clé, résultat) au fil de l'eau.
+    Avec un cache (result_cache.ResultCache), les simulations déjà connues sont seulement
+    re-chiffrées aux prix courants ; les autres sont lancées puis enregistrées.
+    samples : base d'échantillons (samples.SampleStore) alimentée par les simulations lancées
+    (None : rien n'est enregistré).
+    """
+    pending = jobs
+    if cache is not None:
+        cache_keys = {job[0]: cache.key(engine, job[1], job[2], job[6], job[5]) for job in jobs}
+        known = cache.get_many(list(cache_keys.values()))
+        pending = []
+        for job in jobs:
+            outcome = known.get(cache_keys[job[0]])
+            if outcome is None:
+                pending.append(job)
+            else:
+                # Re-chiffrage sur la durée réellement simulée (celle du flux rejoué, ex. un journal enregistré)
+                days = None
+                if job[4]:
+                    from demand import load_demand
+                    days = load_demand(job[4]).days
+                yield job[0], rescore(job[1], job[2], outcome, days, job[5])
+
+    if engine == "batch":
+        # Une tâche par cellule : le moteur vectorisé avance toutes ses réplications ensemble
+        groups = {}
+        for job in pending:
+            groups.setdefault((job[1], job[2], job[5]), []).append(job)
+        tasks = [(group_key, group_key[0], group_key[1], [job[3] for job in group],
+                  group[0][4] and [job[4] for job in group], group_key[2])
+                 for group_key, group in groups.items()]
+        results = ((job[0], result) for group_key, outcomes in run_tasks(tasks, workers, evaluate_batch)
+                   for job, result in zip(groups[group_key], outcomes))
+    else:
+        results = run_tasks([job[:6] for job in pending], workers, SCALAR_EVALUATORS[engine])
+
+    # Échantillons du modèle de substitution (samples.py) : chaque simulation réellement lancée,
+    # hors journaux de demande enregistrés
+    recorded = []
+
+    stored = []
+    pending_jobs = {job[0]: job for job in pending}
+    for key, result in results:
+        job = pending_jobs[key]
+        if cache is not None:
+            stored.append((cache_keys[key], result[1:], job[5]))
+            if len(stored) >= 64:
+                cache.put_many(stored, engine)
+                stored = []
+        if samples is not None and not job[6].startswith("log:"):
+            recorded.append((job[1], job[2], job[5], result, job[5].sim_duration_days))
+            if len(recorded) >= 64:
+                samples.add_many(recorded, engine)
+                recorded = []
+        yield key, result
+    if cache is not None:
+        cache.put_many(stored, engine)
+    if samples is not None:
+        samples.add_many(recorded, engine)
+
+def iter_grid_results(cells, master_seed: int, workers=1, engine: str = "object", demand_dirs=None,
+                      cache=None, scenario=None, samples=None):
+    """ Évalue chaque cellule une fois et renvoie (pads, garage, résultat) dès qu'elle est terminée """
+    jobs = [make_job((pads, garage), master_seed, pads, garage, derive_seed(master_seed, pads, garage), 0,
+                     demand_dirs, scenario)
+            for pads, garage in cells]
+    for (pads, garage), result in evaluate_jobs(jobs, workers, engine, cache, samples):
+        yield pads, garage, result
+
+def run_round(active, master_seed: int, first_rep: int, last_rep: int, workers, engine: str,
+              demand_dirs=None, cache=None, scenario=None, samples=None):
+    """
+    Réplications [first_rep, last_rep) des cellules actives : {(cellule, réplication): résultat}.
+    Avec demand_dirs, la réplication r de chaque cellule rejoue le flux commun demand_dirs[r].
+    """
+    jobs = [make_job((cell, rep), master_seed, cell[0], cell[1], derive_seed(master_seed, cell[0], cell[1], rep),
+                     rep, demand_dirs, scenario)
+            for cell in active for rep in range(first_rep, last_rep)]
+    return dict(evaluate_jobs(jobs, workers, engine, cache, samples))
+
+def run_replications(cells, master_seed: int, replications: int, workers: int = 1, race: bool = False,
+                     engine: str = "object", demand_dirs=None, cache=None, scenario=None, samples=None):
+    """
+    Lance N réplications Monte Carlo par cellule (graine dérivée de (cellule, réplication)).
+    En mode course, une cellule est abandonnée dès qu'elle a crashé ou que son IC de profit
+    est entièrement sous celui du leader courant.
+    """
+    stats = {cell: CellStats(cell[0], cell[1], config.CONFIDENCE_LEVEL) for cell in cells}
+    active = list(cells)
+    done_reps = 0
+    target = min(config.RACE_MIN_REPLICATIONS, replications) if race else replications
+
+    while active and done_reps < replications:
+        results = run_round(active, master_seed, done_reps, target, workers, engine, demand_dirs, cache, scenario,
+                            samples)
+
+        # Agrégation dans l'ordre (cellule, réplication) : indépendante de l'ordre de fin des workers
+        for cell in active:
+            for rep in range(done_reps, target):
+                stats[cell].add(results[(cell, rep)])
+        done_reps = target
+
+        if not race:
+            break
+
+        # Élimination : crash observé, puis domination statistique par le leader
+        survivors = [c for c in active if stats[c].crashed_runs == 0]
+        if survivors:
+            leader = max(survivors, key=lambda c: stats[c].mean_profit)
+            survivors = [c for c in survivors if c == leader or not stats[c].is_dominated_by(stats[leader])]
+        for cell in active:
+            if cell not in survivors:
+                stats[cell].eliminated = True
+        active = survivors
+
+        print(f"🏁 Course : {done_reps} réplications | {len(active)} configurations en lice", flush=True)
+
+        # Un seul survivant : on complète directement ses réplications
+        step = replications if len(active) <= 1 else config.RACE_BATCH_REPLICATIONS
+        target = min(replications, done_reps + step)
+
+    return stats
+
+def write_demand_streams(master_seed: int, count: int, directory: str, scenario=None) -> list:
+    """
+    Génère les flux de demande communs (un par réplication) et renvoie leurs dossiers :
+    les workers les relisent en mmap au lieu de les régénérer.
+    """
+    from demand import generate_demand_stream
+    demand_dirs = []
+    for rep in range(count):
+        path = os.path.join(directory, f"rep_{rep}")
+        generate_demand_stream(derive_seed(master_seed, "demand", rep), scenario=scenario).save(path)
+        demand_dirs.append(path)
+    return demand_dirs
+
+def save_best_params(best_config, path: str = "best_params.json"):
+    """ Solution lue par le visualiseur """
+    solution_data = {"num_pads": best_config[0], "num_garage": best_config[1]}
+    with open(path, "w") as f:
+        json.dump(solution_data, f)
+    print(f"💾 Sauvegardé dans {path}")
+
+def main_monte_carlo(workers, seed: int, replications: int, race: bool, engine: str, demand_dirs=None,
+                     cache=None, scenario=None, params_path: str = "best_params.json", prescreen: bool = False,
+                     samples=None):
+    """ Variante de main() avec réplications, intervalles de confiance et course statistique """
+    scenario = default_scenario() if scenario is None else scenario
+    print(f"--- 🛡️ SKYHUB OPTIMIZER (Monte Carlo) | Scénario : {scenario.name} ---")
+    print(f"Simulation sur {scenario.sim_duration_days} jours | {replications} réplications/config | IC {config.CONFIDENCE_LEVEL:.0%}")
+    print(f"Graine maître : {seed} | Workers : {workers} | Moteur : {engine} | Course : {'OUI' if race else 'NON'} | "
+          f"Demande commune : {'OUI' if demand_dirs else 'NON'}")
+
+    cells = scenario.grid()
+    screen = None
+    if prescreen:
+        from prescreen import PreScreen
+        screen = PreScreen(cells, scenario, seed)
+        print(screen.summary())
+        cells = screen.to_simulate
+    stats = run_replications(cells, seed, replications, workers, race, engine, demand_dirs, cache, scenario, samples)
+
+    print("-" * 110)
+    print(f"{'CONFIG':<18} | {'PROFIT MOYEN (± IC)':<24} | {'P(CRASH) [IC]':<18} | {'REFUS':<8} | {'N':<4} | {'ANALYSE'}")
+    print("-" * 110)
+
+    best_config = None
+    best_profit = -float('inf')
+
+    for cell in cells:
+        s = stats[cell]
+        profit = s.mean_profit
+
+        status = ""
+        if s.crashed_runs > 0: status = "💀 ÉCHEC SÉCU"
+        elif s.eliminated: status = "✂️ DOMINÉ"
+        elif profit > best_profit:
+            best_profit = profit
+            best_config = cell
+            status = "⭐ RECORD"
+        elif s.mean_refusals > 6000: status = "⚠️ SATURATION"
+
+        if profit > 0 or status != "":
+            half = s.profit_half_width
+            half_str = f"{half:,.0f}" if half != float('inf') else "∞"
+            crash_lo, crash_hi = s.crash_ci
+            print(f"Pads={cell[0]} Garage={cell[1]:<2} | {profit:>10,.0f} ± {half_str:<9}€ | "
+                  f"{s.crash_probability:.2f} [{crash_lo:.2f}-{crash_hi:.2f}] | {s.mean_refusals:<8.0f} | {s.n:<4} | {status}")
+
+    total_runs = sum(s.n for s in stats.values())
+    print("-" * 110)
+    print(f"🎲 Simulations lancées : {total_runs} / {replications * len(scenario.grid())} (grille complète)")
+    if screen is not None:
+        # Cellules éliminées par la course : profit trop peu précis pour juger le pré-filtre
+        screen.report({cell: (s.mean_profit, s.crashed_runs) for cell, s in stats.items() if not s.eliminated})
+
+    if best_config:
+        print(f"🏆 INFRASTRUCTURE OPTIMALE : {best_config[0]} Pads + {best_config[1]} Garage")
+        save_best_params(best_config, params_path)
+    else:
+        print("❌ Aucune configuration rentable.")
+    return best_config
+
+def main_structured(workers, seed: int, replications: int, monte_carlo: bool, engine: str,
+                    demand_dirs=None, cache=None, scenario=None, params_path: str = "best_params.json",
+                    samples=None):
+    """ Recherche structurée (search.StructuredSearch) : ne simule qu'une partie de la grille """
+    from search import StructuredSearch
+    scenario = default_scenario() if scenario is None else scenario
+    print(f"--- 🛡️ SKYHUB OPTIMIZER (Recherche structurée) | Scénario : {scenario.name} ---")
+    print(f"Simulation sur {scenario.sim_duration_days} jours | {replications if monte_carlo else 1} réplication(s)/config")
+    print(f"Graine maître : {seed} | Workers : {workers} | Moteur : {engine} | Demande commune : {'OUI' if demand_dirs else 'NON'}")
+    print("-" * 95)
+    print(f"{'CONFIG':<18} | {'PROFIT':<12} | {'CRASH':<8} | {'ÉTAPE'}")
+    print("-" * 95)
+
+    def evaluate(batch):
+        if monte_carlo:
+            stats = run_replications(batch, seed, replications, workers, False, engine, demand_dirs, cache, scenario,
+                                     samples)
+            scores = {cell: (stats[cell].mean_profit, stats[cell].crashed_runs > 0) for cell in batch}
+        else:
+            scores = {(pads, garage): (result[0], result[3] > 0)
+                      for pads, garage, result in iter_grid_results(batch, seed, workers, engine, demand_dirs, cache,
+                                                                    scenario, samples)}
+        step = "pads sûrs" if search.min_safe_pads is None else "garage"
+        for cell in batch:
+            profit, crashed = scores[cell]
+            print(f"Pads={cell[0]} Garage={cell[1]:<2} | {profit:<10,.0f}€ | {'OUI' if crashed else 'non':<8} | {step}",
+                  flush=True)
+        return scores
+
+    search = StructuredSearch(*scenario.search_space(), evaluate)
+    best_config = search.run()
+
+    print("-" * 95)
+    saved = search.grid_size - search.simulations
+    print(f"🔎 Cellules simulées : {search.simulations} / {search.grid_size} (grille complète) | "
+          f"{saved} évitées ({saved / search.grid_size:.0%})")
+    if best_config:
+        print(f"🏆 INFRASTRUCTURE OPTIMALE : {best_config[0]} Pads + {best_config[1]} Garage")
+        save_best_params(best_config, params_path)
+    else:
+        print("❌ Aucune configuration sans crash.")
+    return best_config
+
+def main_diagnose(workers, seed: int, replications: int, cell: tuple, demand_dirs=None, scenario=None,
+                  metrics_path: str = None):
+    """
+    Rejoue les simulations d'une cellule (mêmes graines ou flux communs que la recherche) avec
+    les métriques activées, fusionne les réplications et affiche le profil par heure.
+    """
+    scenario = default_scenario() if scenario is None else scenario
+    pads, garage = cell
+    print(f"--- 🔬 SKYHUB DIAGNOSTIC | Scénario : {scenario.name} | Pads={pads} Garage={garage} ---")
+    print(f"Simulation sur {scenario.sim_duration_days} jours | {replications} réplication(s) | Graine maître : {seed} | "
+          f"Workers : {workers} | Demande commune : {'OUI' if demand_dirs else 'NON'}")
+
+    if replications > 1:
+        jobs = [make_job(rep, seed, pads, garage, derive_seed(seed, pads, garage, rep), rep, demand_dirs, scenario)
+                for rep in range(replications)]
+    else:
+        jobs = [make_job(0, seed, pads, garage, derive_seed(seed, pads, garage), 0, demand_dirs, scenario)]
+    outcomes = dict(run_tasks([job[:6] for job in jobs], workers, evaluate_metrics))
+
+    # Fusion dans l'ordre des réplications : indépendante de l'ordre de fin des workers
+    stats = CellStats(pads, garage, config.CONFIDENCE_LEVEL)
+    merged = None
+    for rep in sorted(outcomes):
+        result, metrics = outcomes[rep]
+        stats.add(result)
+        merged = metrics if merged is None else merged.merge(metrics)
+
+    print("-" * 95)
+    print(merged.report())
+    print("-" * 95)
+    print(f"Profit moyen : {stats.mean_profit:,.0f}€ | Vols : {sum(stats.flights) / stats.n:.0f} | "
+          f"Refus : {stats.mean_refusals:.0f} | Réplications avec crash : {stats.crashed_runs}/{stats.n}")
+    if metrics_path:
+        merged.save(metrics_path)
+        print(f"💾 Métriques sauvegardées dans {metrics_path}")
+    return merged
+
+def main(workers: int = None, seed: int = None, replications: int = None, race: bool = False,
+         engine: str = None, crn: bool = None, use_cache: bool = None, cache_path: str = None,
+         cache_max: int = None, cache_purge: bool = False, cache_clear: bool = False, search: str = None,
+         capacity: bool = False, scenarios=None, diagnose: tuple = None, metrics_path: str = None,
+         network: str = None, prescreen: bool = None, adaptive: bool = None,
+         demand_log: str = None, surrogate: bool = None, run_dir: str = None, merge_only: bool = False,
+         record_samples: bool = None):
+    """
+    Optimise chaque scénario (défaut : valeurs de config.py) ; un même pool de processus sert à tous.
+    run_dir : résultats enregistrés au fil de l'eau dans une file durable (workqueue.py), reprise et
+    partage entre processus ; merge_only : fusion des résultats déjà enregistrés, sans simuler.
+    Renvoie {nom du scénario: meilleure configuration}.
+    """
+    workers = config.OPTIMIZER_WORKERS if workers is None else workers
+    seed = config.OPTIMIZER_SEED if seed is None else seed
+    replications = config.REPLICATIONS if replications is None else replications
+    engine = config.OPTIMIZER_ENGINE if engine is None else engine
+    crn = config.COMMON_RANDOM_NUMBERS if crn is None else crn
+    use_cache = config.RESULT_CACHE if use_cache is None else use_cache
+    search = config.OPTIMIZER_SEARCH if search is None else search
+    prescreen = config.PRESCREEN if prescreen is None else prescreen
+    adaptive = config.ADAPTIVE_HORIZON if adaptive is None else adaptive
+    surrogate = config.SURROGATE if surrogate is None else surrogate
+    record_samples = config.SURROGATE_RECORD if record_samples is None else record_samples
+    scenarios = [default_scenario()] if not scenarios else list(scenarios)
+
+    if network:
+        # Réseau de hubs : processus dédiés (un groupe de hubs chacun), pas le pool partagé
+        from network import Network, main_network
+        city = Network.city(int(network), seed) if network.isdigit() else Network.load(network)
+        return {scenario.name: main_network(workers, seed, city, scenario,
+                                            params_path="best_network.json" if len(scenarios) == 1
+                                            else f"best_network_{scenario.name}.json")
+                for scenario in scenarios}
+
+    monte_carlo = replications > 1 or race
+    if monte_carlo:
+        replications = max(replications, 2)
+
+    cache = None
+    if use_cache and not capacity and not diagnose:
+        from result_cache import ResultCache
+        cache = ResultCache(cache_path, cache_max)
+        if cache_clear:
+            print(f"🗄️ Cache vidé : {cache.clear()} entrées supprimées")
+        elif cache_purge:
+            print(f"🗄️ Cache : {cache.purge_stale(scenarios)} entrées d'autres paramètres physiques supprimées")
+
+    # Base d'échantillons du modèle de substitution, passée aux recherches (main_surrogate ouvre la sienne sinon)
+    samples = None
+    if record_samples:
+        from samples import SampleStore
+        samples = SampleStore()
+
+    def run_search(pool, scenario, demand_dirs=None):
+        if diagnose:
+            path = metrics_path if not metrics_path or len(scenarios) == 1 else f"{scenario.name}_{metrics_path}"
+            return main_diagnose(pool, seed, replications if monte_carlo else 1, tuple(diagnose), demand_dirs,
+                                 scenario, path)
+        if capacity:
+            from capacity import main_capacity
+            return main_capacity(pool, seed, replications, engine, scenario)
+        # Une solution par scénario quand on en compare plusieurs
+        params_path = "best_params.json" if len(scenarios) == 1 else f"best_params_{scenario.name}.json"
+        if run_dir:
+            from workqueue import main_queue
+            directory = run_dir if len(scenarios) == 1 else os.path.join(run_dir, scenario.name)
+            return main_queue(pool, seed, replications, engine, bool(crn), cache, scenario, directory, params_path,
+                              merge_only, samples)
+        if adaptive:
+            from horizon import main_horizon
+            return main_horizon(pool, seed, scenario, params_path)
+        if surrogate:
+            from surrogate import main_surrogate
+            return main_surrogate(pool, seed, engine, scenario, params_path, cache, samples)
+        if search == "structured":
+            return main_structured(pool, seed, replications, monte_carlo, engine, demand_dirs, cache, scenario,
+                                   params_path, samples)
+        if monte_carlo:
+            return main_monte_carlo(pool, seed, replications, race, engine, demand_dirs, cache, scenario,
+                                    params_path, prescreen, samples)
+        return main_grid(pool, seed, engine, demand_dirs, cache, scenario, params_path, prescreen, samples)
+
+    def run_scenario(pool, scenario):
+        if demand_log:
+            # Demande enregistrée : converti une fois en colonnes, rejoué en mmap par chaque cellule
+            from demand_log import demand_directory, read_meta
+            directory = demand_directory(demand_log)
+            meta = read_meta(directory) or {}
+            print(f"📜 Journal de demande : {demand_log} | {meta.get('arrivals', '?')} arrivées, "
+                  f"{meta.get('departures', '?')} départs, {meta.get('days', '?')} jours")
+            return run_search(pool, scenario, [directory])
+        if not crn or capacity or run_dir:      # File durable : flux communs conservés dans le dossier du run
+            return run_search(pool, scenario)
+
+        # Nombres aléatoires communs : flux générés une fois, partagés par toutes les cellules
+        import tempfile
+        with tempfile.TemporaryDirectory(prefix="skyhub_demand_") as tmp:
+            return run_search(pool, scenario, write_demand_streams(seed, replications, tmp, scenario))
+
+    pool = SharedPool(workers) if workers > 1 else workers
+    try:
+        best = {scenario.name: run_scenario(pool, scenario) for scenario in scenarios}
+        if len(scenarios) > 1 and not diagnose:
+            print("=" * 60)
+            for name, best_config in best.items():
+                if capacity:
+                    # Frontière capacité / coût : liste de cellules, de la moins chère à la plus chère
+                    found = ", ".join(f"{pads}x{garage}" for pads, garage in best_config) or "aucune"
+                    print(f"📋 {name:<20} : frontière {found}")
+                    continue
+                found = f"{best_config[0]} Pads + {best_config[1]} Garage" if best_config else "aucune"
+                print(f"📋 {name:<20} : {found}")
+        return best
+    finally:
+        if isinstance(pool, SharedPool):
+            pool.shutdown()
+        if cache is not None:
+            print(f"🗄️ Cache : {cache.summary()}")
+            cache.close()
+        if samples is not None:
+            samples.close()
+
+def main_grid(workers, seed: int, engine: str, demand_dirs=None, cache=None, scenario=None,
+              params_path: str = "best_params.json", prescreen: bool = False, samples=None):
+    """ Une simulation par cellule de la grille """
+    scenario = default_scenario() if scenario is None else scenario
+    print(f"--- 🛡️ SKYHUB OPTIMIZER (Mode Pendulaire) | Scénario : {scenario.name} ---")
+    print(f"Simulation sur {scenario.sim_duration_days} jours avec profils asymétriques.")
+    print(f"Graine maître : {seed} | Workers : {workers} | Moteur : {engine} | Demande commune : {'OUI' if demand_dirs else 'NON'}")
     print("-" * 95)
     print(f"{'CONFIG':<18} | {'PROFIT NET':<12} | {'REFUS':<8} | {'CRASHS':<8} | {'ANALYSE'}")
     print("-" * 95)
@@ -72,32 +677,102 @@ def main():
     best_config = None
     best_profit = -float('inf')
 
-    for pads in config.SEARCH_PADS: 
-        for garage in config.SEARCH_GARAGE:
-            profit, flights, refused, crashes = run_month_simulation(pads, garage)
-            
+    cells = scenario.grid()
+    screen = None
+    if prescreen:
+        from prescreen import PreScreen
+        screen = PreScreen(cells, scenario, seed)
+        print(screen.summary())
+        cells = screen.to_simulate
+    finished = {}
+    outcomes = {}
+    next_row = 0
+
+    for pads, garage, result in iter_grid_results(cells, seed, workers, engine, demand_dirs, cache, scenario,
+                                                  samples):
+        finished[(pads, garage)] = result
+
+        # On affiche dans l'ordre de la grille dès que les cellules précédentes sont terminées
+        # (le tableau et le RECORD sont ainsi identiques en série et en parallèle)
+        while next_row < len(cells) and cells[next_row] in finished:
+            row_pads, row_garage = cells[next_row]
+            profit, flights, refused, crashes = finished.pop(cells[next_row])
+            next_row += 1
+            outcomes[(row_pads, row_garage)] = (profit, crashes)
+
             status = ""
             if crashes > 0: status = "💀 ÉCHEC SÉCU" 
             elif profit > best_profit:
                 best_profit = profit
-                best_config = (pads, garage)
+                best_config = (row_pads, row_garage)
                 status = "⭐ RECORD"
             elif refused > 6000: status = "⚠️ SATURATION"
             
             if profit > 0 or status != "":
-                print(f"Pads={pads} Garage={garage:<2} | {profit:<10,.0f}€ | {refused:<8} | {crashes:<8} | {status}")
+                print(f"Pads={row_pads} Garage={row_garage:<2} | {profit:<10,.0f}€ | {refused:<8} | {crashes:<8} | {status}", flush=True)
 
     print("-" * 95)
+    if screen is not None:
+        screen.report(outcomes)
     if best_config:
         print(f"🏆 INFRASTRUCTURE OPTIMALE : {best_config[0]} Pads + {best_config[1]} Garage")
-        
-        # SAUVEGARDE
-        solution_data = {"num_pads": best_config[0], "num_garage": best_config[1]}
-        with open("best_params.json", "w") as f:
-            json.dump(solution_data, f)
-        print("💾 Sauvegardé dans best_params.json")
+        save_best_params(best_config, params_path)
     else:
         print("❌ Aucune configuration rentable.")
+    return best_config
+
+def cli(argv=None, prog: str = None):
+    """ Ligne de commande de l'optimiseur (python3 optimizer.py ou python3 skyhub.py optimize) """
+    parser = argparse.ArgumentParser(prog=prog, description="SkyHub - Optimiseur d'infrastructure")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut : config.OPTIMIZER_WORKERS)")
+    parser.add_argument("--seed", type=int, default=None, help="Graine maître (défaut : config.OPTIMIZER_SEED)")
+    parser.add_argument("--replications", type=int, default=None, help="Réplications Monte Carlo par config (défaut : config.REPLICATIONS)")
+    parser.add_argument("--race", action="store_true", help="Course statistique : abandonne les configs dominées ou crashées")
+    parser.add_argument("--engine", choices=["object", "batch", "event"], default=None, help="Moteur de simulation (défaut : config.OPTIMIZER_ENGINE)")
+    parser.add_argument("--crn", action="store_true", default=None, help="Même flux de demande pour toutes les configs (nombres aléatoires communs)")
+    parser.add_argument("--cache", action="store_true", default=None, help="Réutilise les résultats physiques déjà simulés (défaut : config.RESULT_CACHE)")
+    parser.add_argument("--cache-path", default=None, help="Base SQLite du cache (défaut : config.RESULT_CACHE_PATH)")
+    parser.add_argument("--cache-max", type=int, default=None, help="Nombre maximal d'entrées, éviction LRU (défaut : config.RESULT_CACHE_MAX_ENTRIES)")
+    parser.add_argument("--cache-purge", action="store_true", help="Supprime les entrées calculées avec d'autres paramètres physiques")
+    parser.add_argument("--cache-clear", action="store_true", help="Vide le cache avant la recherche")
+    parser.add_argument("--search", choices=["grid", "structured"], default=None, help="Grille complète ou recherche structurée (défaut : config.OPTIMIZER_SEARCH)")
+    parser.add_argument("--prescreen", action="store_true", default=None, help="Élague analytiquement (modèle fluide) les cellules qui ne peuvent pas être optimales (défaut : config.PRESCREEN)")
+    parser.add_argument("--adaptive-horizon", action="store_true", default=None, help="Simule chaque config jusqu'à convergence de ses moyennes hebdomadaires (défaut : config.ADAPTIVE_HORIZON)")
+    parser.add_argument("--surrogate", action="store_true", default=None, help="Estime la grille par le modèle de substitution, ne simule que les cellules incertaines (défaut : config.SURROGATE)")
+    parser.add_argument("--record-samples", action="store_true", default=None, help="Enregistre chaque simulation dans la base du modèle de substitution (défaut : config.SURROGATE_RECORD)")
+    parser.add_argument("--run-dir", default=None, metavar="DOSSIER", help="Enregistre chaque simulation dans une file durable : reprise après interruption, plusieurs processus sur le même dossier")
+    parser.add_argument("--merge", action="store_true", help="Avec --run-dir : fusionne les résultats enregistrés (tableau classé, best_params.json) sans simuler")
+    parser.add_argument("--capacity", action="store_true", help="Multiplicateur de trafic maximal soutenable par config (frontière capacité / coût)")
+    parser.add_argument("--diagnose", type=int, nargs=2, default=None, metavar=("PADS", "GARAGE"), help="Rejoue une config avec les métriques (file, occupation, refus, marges par heure)")
+    parser.add_argument("--metrics-out", default=None, metavar="FICHIER.npz", help="Sauvegarde les métriques fusionnées du diagnostic (NumPy)")
+    parser.add_argument("--network", default=None, metavar="HUBS|FICHIER", help="Dimensionne conjointement un réseau de hubs (ville générée de HUBS hubs ou réseau JSON)")
+    parser.add_argument("--demand-log", default=None, metavar="JOURNAL", help="Rejoue un journal de demande enregistré (CSV / JSONL / dossier converti) au lieu des profils")
+    parser.add_argument("--scenario", nargs="+", default=None, metavar="FICHIER", help="Scénario(s) JSON ou TOML optimisés dans le même processus (défaut : config.py)")
+    args = parser.parse_args(argv)
+    if args.race and args.search == "structured":
+        parser.error("--race ne s'applique qu'à la grille complète")
+    if args.adaptive_horizon and (args.race or args.crn or (args.replications or 1) > 1):
+        parser.error("--adaptive-horizon : une réplication par config, graines dérivées (ni --race, ni --crn)")
+    if args.surrogate and (args.race or args.crn or (args.replications or 1) > 1 or args.adaptive_horizon
+                           or args.demand_log):
+        parser.error("--surrogate : une simulation par cellule sur les profils du scénario (ni --race, ni --crn, ni journal)")
+    if args.merge and not args.run_dir:
+        parser.error("--merge s'applique à un dossier de run (--run-dir)")
+    if args.run_dir and (args.race or args.search == "structured" or args.capacity or args.network or args.diagnose
+                         or args.adaptive_horizon or args.surrogate or args.demand_log or args.prescreen):
+        parser.error("--run-dir : grille complète à nombre de réplications fixe (ni course, ni recherche adaptative)")
+    if args.demand_log and (args.race or args.crn or (args.replications or 1) > 1 or args.capacity or args.network
+                            or args.adaptive_horizon or args.prescreen or args.engine not in (None, "object")):
+        parser.error("--demand-log : un seul rejeu du journal par config, moteur object, grille ou recherche structurée")
+    return main(workers=args.workers, seed=args.seed, replications=args.replications, race=args.race,
+                engine=args.engine, crn=args.crn, use_cache=args.cache, cache_path=args.cache_path,
+                cache_max=args.cache_max, cache_purge=args.cache_purge, cache_clear=args.cache_clear,
+                search=args.search, capacity=args.capacity,
+                scenarios=[Scenario.load(path) for path in args.scenario] if args.scenario else None,
+                diagnose=args.diagnose, metrics_path=args.metrics_out, network=args.network,
+                prescreen=args.prescreen, adaptive=args.adaptive_horizon, demand_log=args.demand_log,
+                surrogate=args.surrogate, run_dir=args.run_dir, merge_only=args.merge,
+                record_samples=args.record_samples)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli()
@@ -0,0 +1,192 @@
+"""
+PRÉ-FILTRE ANALYTIQUE - SKYHUB PROJECT
+Modèle fluide heure par heure du hub (débits moyens au lieu de drones individuels), calculé pour
+toutes les cellules de la grille à la fois (NumPy) : file d'approche, stock au sol, vols servis
+et refus sur tout le mois, en quelques dizaines de microsecondes par cellule.
+
+  - admission : la file reste sous l'attente tolérée par le contrôleur (autonomie moyenne à
+    l'arrivée - SAFETY_BUFFER_MIN) au débit estimé pads / AVG_CYCLE_TIME, et le hub sous sa capacité ;
+  - atterrissages : un pad se libère après la charge jusqu'au seuil du valet (vertiport.VALET_JAM_PERCENT),
+    dans la limite des places au sol (les départs de l'heure en libèrent) ;
+  - départs : servis sur le stock au sol, y compris les drones posés dans l'heure.
+
+Élagage : une cellule dont le profit estimé, majoré de la marge, reste sous le meilleur profit
+estimé minoré de la marge ne peut pas être optimale ; une cellule dont la file ne peut plus se
+poser pendant une heure entière (autonomie < 1 h) crashe à coup sûr. Le modèle n'étant qu'une
+approximation, un échantillon des cellules élaguées est simulé quand même pour mesurer les désaccords.
+"""
+import math
+import random
+import dataclasses
+import numpy as np
+import config
+from economics import month_economics
+from scenario import default_scenario
+from vertiport import battery_level, VALET_JAM_PERCENT
+
+@dataclasses.dataclass
+class FluidEstimate:
+    flights: float
+    refusals: float
+    peak_queue: float
+    peak_ground: float
+    crash: bool             # File bloquée une heure entière : crash certain
+
+def fluid_estimates(cells, scenario=None) -> dict:
+    """ {cellule: FluidEstimate} pour toutes les cellules (pads, garage), calculées ensemble """
+    scenario = default_scenario() if scenario is None else scenario
+    pads = np.array([cell[0] for cell in cells], dtype=float)
+    garage = np.array([cell[1] for cell in cells], dtype=float)
+    capacity = pads + garage - 1                # Une place tampon (contrôleur)
+
+    mean_battery = (scenario.battery_start_min + scenario.battery_start_max) / 2
+    max_wait = max(0.0, mean_battery / scenario.consumption_per_min - scenario.safety_buffer_min)
+    queue_max = max_wait * pads / scenario.avg_cycle_time
+    pad_time = max(1.0, (battery_level(scenario, VALET_JAM_PERCENT) - mean_battery) / scenario.charge_rate_per_min) + 1
+    landing_rate = 60 * pads / pad_time
+
+    queue = np.zeros(len(cells))
+    ground = np.zeros(len(cells))
+    flights = np.zeros(len(cells))
+    refusals = np.zeros(len(cells))
+    peak_queue = np.zeros(len(cells))
+    peak_ground = np.zeros(len(cells))
+    crash = np.zeros(len(cells), dtype=bool)
+
+    for day in range(scenario.sim_duration_days):
+        prof_arr, prof_dep = scenario.day_profiles(day)
+        for hour in range(24):
+            arrivals = 60 * prof_arr[hour]
+            demand = 60 * prof_dep[hour]
+            total = queue + arrivals
+
+            # Atterrissages et départs de l'heure se libèrent mutuellement des places : point fixe
+            served = np.minimum(demand, ground)
+            for _ in range(3):
+                landed = np.minimum(np.minimum(total, landing_rate), capacity - ground + served)
+                served = np.minimum(demand, ground + landed)
+
+            crash |= (queue >= 1) & (landed <= 0)
+            kept = np.minimum(total - landed, np.maximum(0.0, np.minimum(queue_max, capacity - ground - landed + served)))
+            refusals += total - landed - kept
+            queue = kept
+            ground += landed - served
+            flights += served
+            np.maximum(peak_queue, queue, out=peak_queue)
+            np.maximum(peak_ground, ground, out=peak_ground)
+
+    return {cell: FluidEstimate(float(flights[k]), float(refusals[k]), float(peak_queue[k]), float(peak_ground[k]),
+                                bool(crash[k]))
+            for k, cell in enumerate(cells)}
+
+def profit_bounds(cell, estimate: FluidEstimate, scenario, margin: float) -> tuple:
+    """ (profit minoré, profit majoré) : vols estimés à ± margin près """
+    pads, garage = cell
+    return (month_economics(pads, garage, estimate.flights * (1 - margin), 0, scenario=scenario),
+            month_economics(pads, garage, estimate.flights * (1 + margin), 0, scenario=scenario))
+
+class PreScreen:
+    """
+    Cellules à simuler après élagage analytique : celles qui restent, plus un échantillon d'audit
+    des cellules élaguées (tiré avec la graine maître, donc reproductible).
+    """
+    def __init__(self, cells, scenario=None, seed: int = None, margin: float = None, audit_share: float = None):
+        from optimizer import derive_seed
+        self.scenario = default_scenario() if scenario is None else scenario
+        self.cells = list(cells)
+        self.margin = config.PRESCREEN_MARGIN if margin is None else margin
+        audit_share = config.PRESCREEN_AUDIT_SHARE if audit_share is None else audit_share
+
+        self.estimates = fluid_estimates(self.cells, self.scenario)
+        self.bounds = {cell: profit_bounds(cell, self.estimates[cell], self.scenario, self.margin) for cell in self.cells}
+        safe = [cell for cell in self.cells if not self.estimates[cell].crash]
+        best_floor = max((self.bounds[cell][0] for cell in safe), default=-float("inf"))
+
+        self.pruned = {}        # cellule -> raison
+        for cell in self.cells:
+            if self.estimates[cell].crash:
+                self.pruned[cell] = "crash"
+            elif self.bounds[cell][1] < best_floor:
+                self.pruned[cell] = "dominée"
+
+        rng = random.Random(derive_seed(config.OPTIMIZER_SEED if seed is None else seed, "prescreen"))
+        pruned = [cell for cell in self.cells if cell in self.pruned]
+        self.audited = set(rng.sample(pruned, math.ceil(audit_share * len(pruned)))) if pruned else set()
+
+    @property
+    def to_simulate(self) -> list:
+        """ Cellules conservées et cellules d'audit, dans l'ordre de la grille """
+        return [cell for cell in self.cells if cell not in self.pruned or cell in self.audited]
+
+    def summary(self) -> str:
+        crashes = sum(1 for reason in self.pruned.values() if reason == "crash")
+        return (f"🔎 Pré-filtre fluide (marge ±{self.margin:.0%}) : {len(self.pruned)}/{len(self.cells)} cellules élaguées "
+                f"({len(self.pruned) - crashes} dominées, {crashes} crash certain) | "
+                f"{len(self.to_simulate)} simulées dont {len(self.audited)} d'audit")
+
+    def report(self, outcomes: dict) -> dict:
+        """
+        Compare le pré-filtre aux simulations {cellule: (profit, crashs)} et affiche les désaccords :
+        cellule d'audit qui bat la meilleure cellule conservée (ou ne crashe pas), crash non prévu,
+        écart moyen entre profit estimé et simulé. Renvoie ces comptes.
+        """
+        kept = [cell for cell in outcomes if cell not in self.pruned]
+        safe_kept = [outcomes[cell][0] for cell in kept if outcomes[cell][1] == 0]
+        best_kept = max(safe_kept, default=-float("inf"))
+
+        wrong_prunes = []
+        for cell in sorted(self.audited & outcomes.keys()):
+            profit, crashes = outcomes[cell]
+            if self.pruned[cell] == "crash" and crashes == 0:
+                wrong_prunes.append(cell)
+            elif self.pruned[cell] == "dominée" and crashes == 0 and profit > best_kept:
+                wrong_prunes.append(cell)
+        unforeseen_crashes = sum(1 for cell in kept if outcomes[cell][1] > 0)
+
+        errors = []
+        for cell, (profit, _) in outcomes.items():
+            estimated = sum(self.bounds[cell]) / 2
+            if profit:
+                errors.append(abs(estimated - profit) / abs(profit))
+        mean_error = sum(errors) / len(errors) if errors else 0.0
+
+        audited = len(self.audited & outcomes.keys())
+        print(f"🔎 Pré-filtre vs simulation : élagages démentis {len(wrong_prunes)}/{audited} audités"
+              f"{' ' + str(wrong_prunes) if wrong_prunes else ''} | crashs non prévus {unforeseen_crashes}/{len(kept)} | "
+              f"écart moyen sur le profit {mean_error:.1%}")
+        return {"audited": audited, "wrong_prunes": len(wrong_prunes), "unforeseen_crashes": unforeseen_crashes,
+                "mean_profit_error": mean_error}
+
+if __name__ == "__main__":
+    import time
+    import argparse
+    from optimizer import derive_seed, run_tasks
+    parser = argparse.ArgumentParser(description="SkyHub - Pré-filtre fluide contre simulation complète")
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut : config.OPTIMIZER_WORKERS)")
+    parser.add_argument("--wide", action="store_true", help="Boîte élargie (pads x2, garage x2) au lieu de la grille du scénario")
+    args = parser.parse_args()
+
+    scenario = default_scenario()
+    seed = config.OPTIMIZER_SEED
+    workers = config.OPTIMIZER_WORKERS if args.workers is None else args.workers
+    pads_values, garage_values = scenario.search_space()
+    if args.wide:
+        pads_values = range(1, 2 * max(pads_values) + 1)
+        garage_values = range(min(garage_values), 2 * max(garage_values) + 1, 5)
+    cells = [(pads, garage) for pads in pads_values for garage in garage_values]
+
+    start = time.perf_counter()
+    screen = PreScreen(cells, scenario, seed, audit_share=1.0)      # Audit complet : toutes les cellules simulées
+    elapsed = time.perf_counter() - start
+    print(screen.summary())
+    print(f"⏱️ Modèle fluide : {elapsed / len(cells) * 1e6:.0f} µs par cellule ({len(cells)} cellules)")
+
+    tasks = [(cell, cell[0], cell[1], derive_seed(seed, *cell), None, scenario) for cell in cells]
+    start = time.perf_counter()
+    results = dict(run_tasks(tasks, workers))
+    print(f"⏱️ Simulation : {(time.perf_counter() - start) / len(cells) * 1e6:,.0f} µs par cellule")
+
+    outcomes = {cell: (result[0], result[3]) for cell, result in results.items()}
+    screen.report(outcomes)
+    best = max((cell for cell in cells if outcomes[cell][1] == 0), key=lambda cell: outcomes[cell][0])
+    print(f"🏆 Optimum simulé {best} : {'conservé' if best not in screen.pruned else 'ÉLAGUÉ'}")
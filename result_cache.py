@@ -0,0 +1,104 @@
+"""
+CACHE DE RÉSULTATS PHYSIQUES - SKYHUB PROJECT
+Stocke sur disque (SQLite) les résultats physiques (vols, refus, crashs) de chaque simulation,
+indépendamment de l'économie : changer un prix ne demande qu'un re-chiffrage (economics.rescore).
+
+Une entrée est identifiée par l'empreinte des paramètres physiques et de trafic du scénario,
+le moteur et sa version, la cellule (pads, garage) et la source aléatoire (graine ou flux commun).
+Modifier un paramètre physique change l'empreinte : les anciennes entrées ne sont plus lues
+(purge_stale supprime celles des scénarios qui ne sont plus étudiés) ; l'éviction garde les entrées les plus récemment utilisées.
+"""
+import time
+import hashlib
+import sqlite3
+import config
+from scenario import default_scenario
+
+# À incrémenter dès qu'une modification d'un moteur change ses résultats
+ENGINE_VERSIONS = {"object": 3, "batch": 3, "event": 3}
+
+class ResultCache:
+    """ Résultats (vols, refus, crashs) par simulation, persistés dans une base SQLite """
+    def __init__(self, path: str = None, max_entries: int = None):
+        self.path = config.RESULT_CACHE_PATH if path is None else path
+        self.max_entries = config.RESULT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS outcomes (
+                               key TEXT PRIMARY KEY, fingerprint TEXT, engine TEXT,
+                               flights INTEGER, refusals INTEGER, crashes INTEGER, last_used REAL)""")
+        self.db.commit()
+
+    def key(self, engine: str, num_pads: int, num_garage: int, source, scenario=None) -> str:
+        """ Clé d'une simulation ; source = graine, ou identité du flux de demande rejoué """
+        fingerprint = (default_scenario() if scenario is None else scenario).physics_fingerprint()
+        payload = f"{fingerprint}:{engine}:{ENGINE_VERSIONS[engine]}:{num_pads}:{num_garage}:{source}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get_many(self, keys: list) -> dict:
+        """ {clé: (vols, refus, crashs)} pour les clés présentes ; met à jour les statistiques """
+        found = {}
+        for start in range(0, len(keys), 500):  # Limite de paramètres d'une requête SQLite
+            chunk = keys[start:start + 500]
+            rows = self.db.execute(f"SELECT key, flights, refusals, crashes FROM outcomes "
+                                   f"WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            found.update((key, (flights, refusals, crashes)) for key, flights, refusals, crashes in rows)
+
+        if found:
+            now = time.time()
+            self.db.executemany("UPDATE outcomes SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+            self.db.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries: list, engine: str):
+        """ Enregistre [(clé, (vols, refus, crashs), scénario)] puis applique la limite de taille """
+        if not entries:
+            return
+        now = time.time()
+        self.db.executemany("INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            [(key, scenario.physics_fingerprint(), engine, int(f), int(r), int(c), now)
+                             for key, (f, r, c), scenario in entries])
+        self.stores += len(entries)
+        self.evict()
+        self.db.commit()
+
+    def evict(self, max_entries: int = None) -> int:
+        """ Supprime les entrées les moins récemment utilisées au-delà de max_entries """
+        limit = self.max_entries if max_entries is None else max_entries
+        excess = len(self) - limit
+        if limit <= 0 or excess <= 0:
+            return 0
+        self.db.execute("DELETE FROM outcomes WHERE key IN "
+                        "(SELECT key FROM outcomes ORDER BY last_used LIMIT ?)", (excess,))
+        self.db.commit()
+        return excess
+
+    def purge_stale(self, scenarios=None) -> int:
+        """ Invalide les entrées calculées avec d'autres paramètres physiques que ceux des scénarios """
+        fingerprints = sorted({s.physics_fingerprint() for s in (scenarios or [default_scenario()])})
+        removed = self.db.execute(f"DELETE FROM outcomes WHERE fingerprint NOT IN ({','.join('?' * len(fingerprints))})",
+                                  fingerprints).rowcount
+        self.db.commit()
+        return removed
+
+    def clear(self) -> int:
+        removed = self.db.execute("DELETE FROM outcomes").rowcount
+        self.db.commit()
+        return removed
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM outcomes").fetchone()[0]
+
+    def summary(self) -> str:
+        looked_up = self.hits + self.misses
+        rate = self.hits / looked_up if looked_up else 0.0
+        return (f"{self.hits} réutilisés / {looked_up} ({rate:.0%}) | {self.stores} enregistrés | "
+                f"{len(self)} entrées dans {self.path}")
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,83 @@
+"""
+ÉCHANTILLONS DE SIMULATION - SKYHUB PROJECT
+Avec --surrogate ou --record-samples (config.SURROGATE_RECORD), chaque simulation lancée par
+l'optimiseur laisse un échantillon (paramètres du scénario, configuration) -> (vols par jour,
+refus par jour, crash), conservé d'une exécution à l'autre dans une base SQLite : c'est la mémoire sur laquelle le modèle de substitution (surrogate.py) apprend.
+
+Contrairement au cache de résultats (clés opaques, une entrée par graine), les paramètres sont
+stockés en clair pour pouvoir interpoler entre villes et technologies de batterie. Les journaux de
+demande enregistrés (demand_log.py) ne sont pas conservés : leur trafic ne se résume pas aux profils.
+Aucune dépendance à NumPy : l'enregistrement reste possible avec le seul moteur object.
+"""
+import time
+import sqlite3
+import statistics
+import config
+
+# Variables explicatives d'une simulation (dans cet ordre) : configuration, drone, contrôle, trafic, horizon
+# (la probabilité de crash dépend de la durée simulée)
+FEATURES = ("pads", "garage", "battery_max", "battery_start_min", "battery_start_max", "consumption_per_min",
+            "charge_rate_per_min", "safety_buffer_min", "avg_cycle_time", "arrival_mean", "arrival_peak",
+            "departure_mean", "departure_peak", "weekend_level", "sim_duration_days")
+TARGETS = ("flights_per_day", "refusals_per_day", "crashed")
+
+def features(num_pads: int, num_garage: int, scenario) -> tuple:
+    """ Variables explicatives d'une cellule dans un scénario (profils résumés par leur moyenne et leur pic) """
+    return (float(num_pads), float(num_garage), scenario.battery_max, float(scenario.battery_start_min),
+            float(scenario.battery_start_max), scenario.consumption_per_min, scenario.charge_rate_per_min,
+            scenario.safety_buffer_min, scenario.avg_cycle_time,
+            statistics.mean(scenario.profile_arrival_weekday), max(scenario.profile_arrival_weekday),
+            statistics.mean(scenario.profile_departure_weekday), max(scenario.profile_departure_weekday),
+            statistics.mean(scenario.profile_weekend_flat), float(scenario.sim_duration_days))
+
+class SampleStore:
+    """ Échantillons (variables, vols/jour, refus/jour, crash) persistés dans une base SQLite """
+    def __init__(self, path: str = None):
+        self.path = config.SURROGATE_SAMPLES_PATH if path is None else path
+        self.added = 0
+        self.db = sqlite3.connect(self.path)
+        columns = ", ".join(f"{name} REAL" for name in FEATURES + TARGETS)
+        self.db.execute(f"CREATE TABLE IF NOT EXISTS samples (id INTEGER PRIMARY KEY, {columns}, engine TEXT, "
+                        f"created REAL)")
+        # Base d'une version antérieure : colonnes ajoutées, vides pour les anciens échantillons (ignorés par rows)
+        existing = {row[1] for row in self.db.execute("PRAGMA table_info(samples)")}
+        for name in FEATURES + TARGETS:
+            if name not in existing:
+                self.db.execute(f"ALTER TABLE samples ADD COLUMN {name} REAL")
+        self.db.commit()
+
+    def add_many(self, entries: list, engine: str):
+        """ Enregistre [(pads, garage, scénario, (profit, vols, refus, crashs), jours simulés)] """
+        if not entries:
+            return
+        now = time.time()
+        placeholders = ", ".join("?" * (len(FEATURES) + len(TARGETS) + 2))
+        self.db.executemany(
+            f"INSERT INTO samples ({', '.join(FEATURES + TARGETS)}, engine, created) VALUES ({placeholders})",
+            [features(pads, garage, scenario) + (flights / days, refusals / days, float(crashes > 0), engine, now)
+             for pads, garage, scenario, (_, flights, refusals, crashes), days in entries])
+        self.db.commit()
+        self.added += len(entries)
+
+    def rows(self, limit: int = None, engine: str = None) -> list:
+        """ [(variables..., cibles...)] des échantillons complets, récents d'abord (d'un seul moteur si précisé) """
+        conditions = [f"{name} IS NOT NULL" for name in FEATURES + TARGETS]
+        parameters = []
+        if engine is not None:
+            conditions.append("engine = ?")
+            parameters.append(engine)
+        query = f"SELECT {', '.join(FEATURES + TARGETS)} FROM samples WHERE {' AND '.join(conditions)} ORDER BY id DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        return self.db.execute(query, parameters).fetchall()
+
+    def clear(self) -> int:
+        removed = self.db.execute("DELETE FROM samples").rowcount
+        self.db.commit()
+        return removed
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM samples").fetchone()[0]
+
+    def close(self):
+        self.db.close()
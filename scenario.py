@@ -0,0 +1,136 @@
+"""
+SCÉNARIOS - SKYHUB PROJECT
+Un scénario regroupe tous les paramètres d'un modèle (drone, contrôle aérien, économie, trafic)
+dans un objet immuable, passé explicitement au moteur et à l'optimiseur : plusieurs villes ou
+technologies de batterie peuvent être évaluées dans un même processus, sans modifier config.py.
+
+Chargement depuis un fichier JSON ou TOML : seules les valeurs à changer sont nécessaires,
+les autres sont prises dans config.py (noms en minuscules ou tels qu'écrits dans config.py).
+"""
+import os
+import copy
+import json
+import hashlib
+import dataclasses
+import config
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Scenario:
+    # Drone
+    battery_max: float
+    battery_start_min: int
+    battery_start_max: int
+    consumption_per_min: float
+    charge_rate_per_min: float
+
+    # Sécurité & contrôle aérien
+    safety_buffer_min: float
+    avg_cycle_time: float
+
+    # Économie
+    cost_pad_build: float
+    cost_garage_build: float
+    amortization_months: int
+    revenue_per_flight: float
+    cost_per_flight: float
+    cost_crash_penalty: float
+
+    # Simulation et trafic (profils horaires, 24 valeurs)
+    sim_duration_days: int
+    profile_arrival_weekday: tuple
+    profile_departure_weekday: tuple
+    profile_weekend_flat: tuple
+
+    name: str = "Paris"
+
+    # Espace de recherche (None : dimensionnement automatique, voir config.calculate_search_space)
+    search_pads: tuple = None
+    search_garage: tuple = None
+
+    # Paramètres qui déterminent les résultats physiques (l'économie n'en fait pas partie)
+    PHYSICS_FIELDS = ("battery_max", "battery_start_min", "battery_start_max", "consumption_per_min",
+                      "charge_rate_per_min", "safety_buffer_min", "avg_cycle_time", "sim_duration_days",
+                      "profile_arrival_weekday", "profile_departure_weekday", "profile_weekend_flat")
+
+    def __post_init__(self):
+        for name in ("profile_arrival_weekday", "profile_departure_weekday", "profile_weekend_flat"):
+            profile = tuple(getattr(self, name))
+            if len(profile) != 24:
+                raise ValueError(f"{name} : 24 valeurs horaires attendues, {len(profile)} reçues")
+            object.__setattr__(self, name, profile)
+        for name in ("search_pads", "search_garage"):
+            if getattr(self, name) is not None:
+                object.__setattr__(self, name, tuple(getattr(self, name)))
+
+    @classmethod
+    def from_config(cls, name: str = "Paris") -> "Scenario":
+        """ Instantané des valeurs courantes de config.py """
+        values = {field.name: getattr(config, field.name.upper()) for field in dataclasses.fields(cls)
+                  if field.name not in ("name", "search_pads", "search_garage")}
+        return cls(name=name, **values)
+
+    @classmethod
+    def from_dict(cls, data: dict, base: "Scenario" = None) -> "Scenario":
+        """ Scénario de base (config.py par défaut) modifié par les clés de data """
+        known = {field.name for field in dataclasses.fields(cls)}
+        changes = {}
+        for key, value in data.items():
+            if key.lower() not in known:
+                raise ValueError(f"Paramètre de scénario inconnu : {key}")
+            changes[key.lower()] = value
+        return dataclasses.replace(base or cls.from_config(), **changes)
+
+    @classmethod
+    def load(cls, path: str) -> "Scenario":
+        """ Lit un scénario JSON ou TOML ; son nom par défaut est celui du fichier """
+        if path.endswith(".toml"):
+            import tomllib
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            with open(path) as f:
+                data = json.load(f)
+        data.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+        return cls.from_dict(data)
+
+    def replace(self, **changes) -> "Scenario":
+        return dataclasses.replace(self, **changes)
+
+    def physics_fingerprint(self) -> str:
+        """ Empreinte des paramètres physiques et de trafic (clé du cache de résultats) """
+        payload = json.dumps({name: getattr(self, name) for name in self.PHYSICS_FIELDS}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def day_profiles(self, day: int):
+        """ Profils horaires (arrivée, départ) du jour : semaine ou week-end """
+        if day % 7 >= 5:
+            return self.profile_weekend_flat, self.profile_weekend_flat
+        return self.profile_arrival_weekday, self.profile_departure_weekday
+
+    def search_space(self):
+        """ (pads, garage) à explorer : ceux du scénario, sinon le dimensionnement automatique """
+        if self.search_pads is not None and self.search_garage is not None:
+            return self.search_pads, self.search_garage
+        pads, garage = config.calculate_search_space(self.profile_arrival_weekday, self.avg_cycle_time)
+        return self.search_pads or tuple(pads), self.search_garage or tuple(garage)
+
+    def grid(self) -> list:
+        """ Cellules (pads, garage) de l'espace de recherche, dans l'ordre de la grille """
+        pads_values, garage_values = self.search_space()
+        return [(pads, garage) for pads in pads_values for garage in garage_values]
+
+CONFIG_FIELDS = [field.name for field in dataclasses.fields(Scenario)
+                 if field.name not in ("name", "search_pads", "search_garage")]
+_default = [None, None]     # (copie des valeurs de config.py, scénario construit avec elles)
+
+def default_scenario() -> Scenario:
+    """
+    Scénario des valeurs courantes de config.py (utilisé quand aucun scénario n'est fourni).
+    Reconstruit seulement si config.py a changé depuis l'appel précédent : un drone créé sans
+    scénario partage celui-ci au lieu d'en porter une copie.
+    """
+    values = [getattr(config, name.upper()) for name in CONFIG_FIELDS]
+    if values != _default[0]:
+        _default[0] = [copy.copy(value) for value in values]     # Une liste modifiée sur place doit aussi invalider
+        _default[1] = Scenario.from_config()
+    return _default[1]
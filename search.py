@@ -0,0 +1,136 @@
+"""
+RECHERCHE STRUCTURÉE - SKYHUB PROJECT
+Au lieu de simuler toute la grille (pads x garage), on exploite la forme du problème :
+  1. le risque de crash baisse quand le nombre de pads augmente : bisection sur les pads
+     (au plus grand garage) pour trouver le plus petit nombre de pads sans crash ;
+  2. à pads fixés, le profit est à peu près unimodal en garage : section dorée discrète ;
+  3. le meilleur profit par nombre de pads l'est aussi : section dorée sur les pads sûrs,
+     chaque sonde lançant la recherche du meilleur garage.
+Les cellules visitées sont mémorisées : une cellule n'est jamais simulée deux fois.
+"""
+import math
+
+PHI = (1 + math.sqrt(5)) / 2
+
+def golden_section_max(objective, lo: int, hi: int) -> int:
+    """
+    Indice du maximum d'une fonction unimodale sur les entiers [lo, hi] (section dorée discrète).
+    objective(indices) renvoie les valeurs d'une liste d'indices : les deux sondes d'une étape
+    sont évaluées ensemble. Une valeur -inf (configuration qui crashe) pousse vers les grands indices.
+    """
+    memo = {}
+
+    def values(indices):
+        missing = [i for i in indices if i not in memo]
+        if missing:
+            memo.update(zip(missing, objective(missing)))
+        return [memo[i] for i in indices]
+
+    a, b = lo, hi
+    while b - a > 2:
+        step = round((b - a) / PHI)
+        c, d = b - step, a + step
+        if c >= d:
+            c, d = (a + b) // 2, (a + b) // 2 + 1
+        fc, fd = values([c, d])
+        if fc >= fd and fc != -math.inf:
+            b = d - 1
+        else:
+            a = c + 1
+
+    candidates = list(range(a, b + 1))
+    scores = values(candidates)
+    return candidates[scores.index(max(scores))]
+
+class StructuredSearch:
+    """
+    Recherche de la meilleure cellule de la grille pads x garage (Scenario.search_space).
+    evaluate(cells) renvoie {cellule: (profit, crash)} pour une liste de cellules à simuler.
+    """
+    def __init__(self, pads_values, garage_values, evaluate):
+        self.pads_values = list(pads_values)
+        self.garage_values = list(garage_values)
+        self.evaluate = evaluate
+        self.results = {}       # cellule -> (profit, crash), dans l'ordre de visite
+        self.min_safe_pads = None
+
+    @property
+    def grid_size(self) -> int:
+        return len(self.pads_values) * len(self.garage_values)
+
+    @property
+    def simulations(self) -> int:
+        return len(self.results)
+
+    def scores(self, cells) -> list:
+        """ Profit de chaque cellule (-inf si crash) ; seules les cellules inconnues sont simulées """
+        missing = [cell for cell in cells if cell not in self.results]
+        if missing:
+            self.results.update(self.evaluate(missing))
+        return [-math.inf if self.results[cell][1] else self.results[cell][0] for cell in cells]
+
+    def find_min_safe_pads(self):
+        """ Bisection : plus petit indice de pads sans crash au plus grand garage (None si aucun) """
+        garage = self.garage_values[-1]
+        lo, hi = 0, len(self.pads_values) - 1
+        if self.scores([(self.pads_values[hi], garage)])[0] == -math.inf:
+            return None
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.scores([(self.pads_values[mid], garage)])[0] == -math.inf:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def best_garage(self, pad_index: int) -> float:
+        """ Meilleur profit à pads fixés (section dorée sur le garage) """
+        pads = self.pads_values[pad_index]
+        best = golden_section_max(lambda indices: self.scores([(pads, self.garage_values[i]) for i in indices]),
+                                  0, len(self.garage_values) - 1)
+        return self.scores([(pads, self.garage_values[best])])[0]
+
+    def run(self):
+        """ Meilleure cellule sans crash parmi celles visitées, ou None """
+        self.min_safe_pads = self.find_min_safe_pads()
+        if self.min_safe_pads is None:
+            return None
+
+        golden_section_max(lambda indices: [self.best_garage(i) for i in indices],
+                           self.min_safe_pads, len(self.pads_values) - 1)
+        return self.best_cell()
+
+    def best_cell(self):
+        """ Même règle que la grille : meilleur profit sans crash, ex aequo -> première cellule de la grille """
+        best, best_profit = None, -math.inf
+        for cell in sorted(self.results):
+            profit, crashed = self.results[cell]
+            if not crashed and profit > best_profit:
+                best, best_profit = cell, profit
+        return best
+
+if __name__ == "__main__":
+    import tempfile
+    import config
+    from optimizer import iter_grid_results, write_demand_streams
+    from scenario import default_scenario
+
+    # Scénario Paris par défaut : grille complète simulée une fois, puis la recherche structurée
+    # « simule » en lisant ces résultats (on compte les cellules qu'elle aurait lancées)
+    scenario = default_scenario()
+    cells = scenario.grid()
+    with tempfile.TemporaryDirectory(prefix="skyhub_demand_") as tmp:
+        for label, demand_dirs in [("graines indépendantes", None),
+                                   ("flux commun", write_demand_streams(config.OPTIMIZER_SEED, 1, tmp))]:
+            grid = {(pads, garage): result for pads, garage, result in
+                    iter_grid_results(cells, config.OPTIMIZER_SEED, demand_dirs=demand_dirs)}
+            grid_best = StructuredSearch(*scenario.search_space(), None)
+            grid_best.results = {cell: (r[0], r[3] > 0) for cell, r in grid.items()}
+
+            search = StructuredSearch(*scenario.search_space(),
+                                      lambda batch: {cell: (grid[cell][0], grid[cell][3] > 0) for cell in batch})
+            best = search.run()
+            expected = grid_best.best_cell()
+            print(f"--- {label.upper()} : grille {expected} | structurée {best} "
+                  f"({'IDENTIQUE' if best == expected else '❌ ÉCART'}) | "
+                  f"{search.simulations}/{search.grid_size} simulations ---")
@@ -1,62 +1,272 @@
 import json
+import time
 import random
-import pygame 
+import argparse
 import config
 from vertiport import Vertiport
-from visualizer import VertiportVisualizer
 from evtol import EVTOL
+from scenario import default_scenario
 
-def run_demo():
-    # 1. CHARGEMENT INFRASTRUCTURE
-    try:
-        with open("best_params.json", "r") as f:
-            data = json.load(f)
-            PADS = data['num_pads']
-            GARAGE = data['num_garage']
-            print(f"📂 Infra chargée : {PADS} Pads | {GARAGE} Garage")
-    except FileNotFoundError:
-        PADS, GARAGE = 6, 20
-        print("⚠️ Pas de fichier config, valeurs par défaut.")
+# pygame et visualizer ne sont importés que par les modes affichés (run_demo, run_replay) :
+# le mode sans affichage (run_headless) tourne sur un nœud de calcul sans écran ni pygame
 
-    # 2. INITIALISATION
-    hub = Vertiport("SkyHub Pendulaire", PADS, GARAGE)
-    viz = VertiportVisualizer()
-    drone_cnt = 1
-    
-    clock = pygame.time.Clock()
-    FPS = 20 
+class LiveSimulation:
+    """
+    Simulation de démonstration, avancée minute par minute indépendamment de l'affichage.
+    Avec 'demand' (demand_log.open_demand), les mouvements enregistrés remplacent les tirages.
+    """
+    def __init__(self, num_pads: int, num_garage: int, scenario=None, demand=None):
+        self.scenario = default_scenario() if scenario is None else scenario
+        self.hub = Vertiport("SkyHub Pendulaire", num_pads, num_garage, scenario=self.scenario)
+        self.minute = 0
+        self.drone_cnt = 1
+        self.demand = demand
+        if demand is not None:
+            self.arrivals = demand.iter_arrivals()
+            self.departures = demand.iter_departures()
+            self.next_arrival = next(self.arrivals, None)
+            self.next_departure = next(self.departures, None)
+
+    def admit(self, battery: int, priority: int = 0):
+        if self.hub.can_accept_battery(battery):
+            d = EVTOL(f"D{self.drone_cnt:03d}", self.scenario)
+            d.current_battery = battery
+            d.mission_priority = priority
+            self.hub.add_to_approach(d)
+            self.drone_cnt += 1
 
-    print(f"--- DÉMARRAGE SIMULATION (Profil Asymétrique) ---")
-    
-    for minute in range(1440):
-        clock.tick(FPS)
-        if pygame.event.peek(pygame.QUIT): break
+    def step(self):
+        """ Une minute simulée """
+        if self.demand is not None:
+            return self.replay_step()
 
         # 1. TEMPS ET PROFILS
-        current_hour = (minute // 60) % 24
-        
-        # On pioche dans les listes séparées
-        prob_arrival = config.PROFILE_ARRIVAL_WEEKDAY[current_hour]
-        prob_departure = config.PROFILE_DEPARTURE_WEEKDAY[current_hour]
-        
+        day, current_hour = self.minute // 1440, (self.minute // 60) % 24
+
+        # On pioche dans les listes séparées (semaine ou week-end)
+        prof_arr, prof_dep = self.scenario.day_profiles(day)
+        prob_arrival = prof_arr[current_hour]
+        prob_departure = prof_dep[current_hour]
+
         # ---------------------------------
         # GESTION DES ARRIVÉES
         if random.random() < prob_arrival:
-            d = EVTOL(f"D{drone_cnt:03d}")
-            d.current_battery = random.randint(config.BATTERY_START_MIN, config.BATTERY_START_MAX)
-            
-            if hub.can_accept_drone(d):
-                hub.add_to_approach(d)
-                drone_cnt += 1
+            self.admit(random.randint(self.scenario.battery_start_min, self.scenario.battery_start_max))
 
         # ---------------------------------
         # GESTION DES DÉPARTS (Indépendante des arrivées !)
         if random.random() < prob_departure:
-            hub.dispatch_mission("Taxi", 0)
+            self.hub.dispatch_mission("Taxi", 0)
 
         # ---------------------------------
-        hub.update_simulation()
-        viz.draw(hub, minute)
+        self.hub.update_simulation()
+        self.minute += 1
+
+    def replay_step(self):
+        """ Une minute du journal de demande : tous ses mouvements, arrivées d'abord """
+        while self.next_arrival is not None and self.next_arrival[0] == self.minute:
+            _, battery, priority = self.next_arrival
+            self.next_arrival = next(self.arrivals, None)
+            self.admit(battery, priority)
+        while self.next_departure == self.minute:
+            self.next_departure = next(self.departures, None)
+            self.hub.dispatch_mission("Taxi", 0)
+        self.hub.update_simulation()
+        self.minute += 1
+
+def load_infrastructure(path: str = "best_params.json") -> tuple:
+    """ (pads, garage) trouvés par l'optimiseur, sinon valeurs par défaut """
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+            print(f"📂 Infra chargée : {data['num_pads']} Pads | {data['num_garage']} Garage")
+            return data['num_pads'], data['num_garage']
+    except FileNotFoundError:
+        print("⚠️ Pas de fichier config, valeurs par défaut.")
+        return 6, 20
+
+def run_headless(pads: int = None, garage: int = None, days: int = None, seed: int = None, engine: str = "object",
+                 demand_log: str = None):
+    """
+    Simulation sans affichage, aussi vite que possible (moteur de l'optimiseur, aucun journal), puis
+    métriques de synthèse. engine : "object" (pas fixe) ou "event" (événements discrets : plus rapide
+    seulement quand la plupart des minutes sont inactives, trafic faible ; plus lent au trafic nominal).
+    Un journal de demande fixe la durée et se rejoue avec le moteur object : ValueError sinon.
+    """
+    from optimizer import run_month_simulation
+    if pads is None or garage is None:
+        pads, garage = load_infrastructure()
+    seed = config.OPTIMIZER_SEED if seed is None else seed
+    scenario = default_scenario()
+    demand = None
+    if demand_log:
+        from demand_log import open_demand
+        demand = open_demand(demand_log)
+        if engine != "object":
+            raise ValueError(f"journal de demande : rejeu par le moteur object uniquement (pas {engine})")
+        if days is not None and days != demand.days:
+            raise ValueError(f"journal de demande : {demand.days} jours enregistrés, la durée ne se choisit pas ({days})")
+        days = demand.days
+        print(f"📜 Journal de demande : {demand_log} ({days} jours)")
+    days = scenario.sim_duration_days if days is None else days
+    scenario = scenario.replace(sim_duration_days=days)
+
+    start = time.perf_counter()
+    if engine == "event":
+        from event_engine import run_event_month_simulation
+        profit, flights, refusals, crashes = run_event_month_simulation(pads, garage, seed, scenario=scenario)
+    else:
+        profit, flights, refusals, crashes = run_month_simulation(pads, garage, seed, scenario, demand=demand)
+    elapsed = time.perf_counter() - start
+
+    print(f"--- SIMULATION SANS AFFICHAGE | {pads} Pads | {garage} Garage | {days} jour(s) | moteur {engine} ---")
+    print(f"Vols : {flights:,} ({flights / days:,.1f}/jour) | Refus d'atterrissage : {refusals:,} "
+          f"({refusals / days:,.1f}/jour) | Crashs : {crashes}")
+    print(f"Profit net ({days} jours) : {profit:,.0f}€ | {elapsed:.2f}s ({days * 1440 / elapsed:,.0f} min simulées/s)")
+    return profit, flights, refusals, crashes
+
+def run_demo(days: int = None, warp: float = None, fps: int = None, demand_log: str = None):
+    """
+    Control Center : la simulation avance de 'warp' minutes par seconde réelle, quel que soit
+    le nombre d'images affichées (une image lente ou sautée ne ralentit pas la simulation).
+    Espace : pause | Haut / Bas : vitesse x2 / ÷2 | Échap : quitter
+    demand_log : journal de demande enregistré (demand_log.py) rejoué à la place des profils.
+    """
+    warp = config.VISUALIZER_WARP if warp is None else warp
+    fps = config.VISUALIZER_FPS if fps is None else fps
+
+    import pygame
+    from visualizer import VertiportVisualizer
+
+    # 1. CHARGEMENT INFRASTRUCTURE
+    PADS, GARAGE = load_infrastructure()
+
+    # 2. INITIALISATION
+    demand = None
+    if demand_log:
+        from demand_log import open_demand
+        demand = open_demand(demand_log)
+        print(f"📜 Journal de demande : {demand_log} ({demand.days} jours)")
+    sim = LiveSimulation(PADS, GARAGE, demand=demand)
+    days = config.VISUALIZER_DAYS if days is None else days
+    total_minutes = days * 1440
+    viz = VertiportVisualizer(scenario=sim.scenario)
+    clock = pygame.time.Clock()
+
+    print(f"--- DÉMARRAGE SIMULATION (Profil Asymétrique) | {days} jour(s) | {warp:g} min/sec ---")
+
+    due = 0.0           # Minutes simulées en retard sur l'horloge réelle
+    speed = 0.0         # Vitesse mesurée (moyenne glissante)
+    paused = False
+    while sim.minute < total_minutes:
+        elapsed = clock.tick(fps) / 1000.0
+
+        commands = viz.poll_events()
+        if "quit" in commands: break
+        for command in commands:
+            if command == "pause": paused = not paused
+            elif command == "faster": warp *= 2
+            elif command == "slower": warp = max(warp / 2, 1.0)
+        sim.hub.verbose = warp <= config.VISUALIZER_LOG_MAX_WARP
+
+        # Simulation : toutes les minutes dues depuis l'image précédente, dans la limite d'une
+        # image de calcul (si la machine ne suit pas ce rythme, le retard est abandonné)
+        steps = 0
+        if not paused:
+            due += warp * elapsed
+            deadline = time.perf_counter() + 1.0 / fps
+            while due >= 1 and sim.minute < total_minutes:
+                sim.step()
+                due -= 1
+                steps += 1
+                if steps % 64 == 0 and time.perf_counter() > deadline:
+                    due = 0.0
+                    break
+        if elapsed > 0:
+            speed = 0.9 * speed + 0.1 * steps / elapsed
+
+        viz.draw(sim.hub, sim.minute, warp, speed)
+
+    print(f"--- FIN : {sim.minute // 1440} jour(s) {sim.minute % 1440 // 60}h simulés | Crashs : {sim.hub.crashes} ---")
+    viz.close()
+
+def run_replay(path: str, start: int = 0, warp: float = None, fps: int = None):
+    """
+    Rejoue une trace enregistrée (traces.py) sans re-simuler : lecture avant ou arrière,
+    sauts instantanés à n'importe quelle minute.
+    Espace : pause | Haut / Bas : vitesse | R : sens de lecture | Gauche / Droite : ±1 h |
+    Page préc. / suiv. : ±1 jour | Début / Fin | clic ou glisser sur la barre de lecture | Échap : quitter
+    """
+    import pygame
+    from traces import Trace
+    from visualizer import VertiportVisualizer
+    warp = config.VISUALIZER_WARP if warp is None else warp
+    fps = config.VISUALIZER_FPS if fps is None else fps
+
+    trace = Trace(path)
+    last = trace.minutes - 1
+    print(f"📼 Trace chargée : {trace.num_pads} Pads | {trace.num_garage} Garage | {trace.days} jour(s)")
+    viz = VertiportVisualizer(scenario=trace.scenario)
+    clock = pygame.time.Clock()
+
+    position = float(min(max(start, 0), last))
+    direction = 1
+    paused = False
+    while True:
+        elapsed = clock.tick(fps) / 1000.0
+
+        commands = viz.poll_events()
+        if "quit" in commands: break
+        for command in commands:
+            if command == "pause": paused = not paused
+            elif command == "faster": warp *= 2
+            elif command == "slower": warp = max(warp / 2, 1.0)
+            elif command == "reverse": direction = -direction
+            elif command[0] == "jump": position += command[1]
+            elif command[0] == "seek": position = command[1] * last
+
+        if not paused:
+            position += direction * warp * elapsed
+        position = min(max(position, 0.0), float(last))
+
+        minute = int(position)
+        viz.draw(trace.seek(minute), minute, direction * warp, progress=minute / last if last else 1.0)
+
+    trace.close()
+    viz.close()
+
+def parse_start(day: int, clock_time: str) -> int:
+    """ Jour (à partir de 1) et heure "HH:MM" -> minute de la trace """
+    hours, minutes = (int(part) for part in clock_time.split(":"))
+    return (day - 1) * 1440 + hours * 60 + minutes
+
+def cli(argv=None, prog: str = None):
+    """ Ligne de commande du Control Center (python3 simulation.py ou python3 skyhub.py simulate / visualize / replay) """
+    parser = argparse.ArgumentParser(prog=prog, description="SkyHub - Control Center")
+    parser.add_argument("--days", type=int, default=None, help="Durée (défaut : config.VISUALIZER_DAYS avec affichage, config.SIM_DURATION_DAYS sans)")
+    parser.add_argument("--warp", type=float, default=None, help="Minutes simulées par seconde (défaut : config.VISUALIZER_WARP)")
+    parser.add_argument("--fps", type=int, default=None, help="Images par seconde (défaut : config.VISUALIZER_FPS)")
+    parser.add_argument("--demand-log", default=None, metavar="JOURNAL", help="Rejoue un journal de demande enregistré (CSV / JSONL / dossier converti) au lieu des profils")
+    parser.add_argument("--replay", default=None, metavar="TRACE", help="Rejoue une trace enregistrée par traces.py au lieu de simuler")
+    parser.add_argument("--day", type=int, default=1, help="Rejeu : jour de départ (à partir de 1)")
+    parser.add_argument("--time", default="00:00", help="Rejeu : heure de départ HH:MM")
+    parser.add_argument("--headless", action="store_true", help="Sans affichage ni pygame : simule au plus vite et affiche les métriques")
+    parser.add_argument("--pads", type=int, default=None, help="Sans affichage : pads (défaut : best_params.json)")
+    parser.add_argument("--garage", type=int, default=None, help="Sans affichage : places de garage (défaut : best_params.json)")
+    parser.add_argument("--seed", type=int, default=None, help="Sans affichage : graine (défaut : config.OPTIMIZER_SEED)")
+    parser.add_argument("--engine", choices=["object", "event"], default="object", help="Sans affichage : moteur de simulation (event : gagnant seulement à faible trafic)")
+    args = parser.parse_args(argv)
+    if args.days is not None and args.days < 1:
+        parser.error("--days doit valoir au moins 1")
+    if args.headless and args.replay:
+        parser.error("--headless et --replay s'excluent")
+    if args.headless and args.demand_log and (args.days is not None or args.engine != "object"):
+        parser.error("--demand-log : le journal fixe la durée et se rejoue avec le moteur object (ni --days, ni --engine event)")
+    if args.headless:
+        return run_headless(args.pads, args.garage, args.days, args.seed, args.engine, args.demand_log)
+    if args.replay:
+        return run_replay(args.replay, parse_start(args.day, args.time), warp=args.warp, fps=args.fps)
+    return run_demo(days=args.days, warp=args.warp, fps=args.fps, demand_log=args.demand_log)
 
 if __name__ == "__main__":
-    run_demo()
\ No newline at end of file
+    cli()
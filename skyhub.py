@@ -0,0 +1,37 @@
+"""
+SKYHUB - POINT D'ENTRÉE UNIQUE
+    python3 skyhub.py optimize [options de optimizer.py]
+    python3 skyhub.py simulate [--pads 8 --garage 57 --days 28 --engine object|event]    (sans affichage ni pygame)
+    python3 skyhub.py visualize [--days --warp --fps --demand-log]                (Control Center pygame)
+    python3 skyhub.py replay TRACE [--day 17 --time 07:40]
+Chaque sous-commande n'importe que son module : ni pygame ni NumPy sur le chemin de calcul par
+défaut, et « skyhub.py --help » ne charge rien d'autre que argparse (python3 benchmark.py --startup).
+"""
+import argparse
+import importlib
+
+# Sous-commande -> (module, fonction cli(argv, prog), arguments ajoutés devant ceux de l'utilisateur, aide)
+COMMANDS = {
+    "optimize": ("optimizer", "cli", [], "Recherche de la meilleure infrastructure (options de optimizer.py)"),
+    "simulate": ("simulation", "cli", ["--headless"], "Un mois sans affichage, au plus vite, métriques de synthèse"),
+    "visualize": ("simulation", "cli", [], "Control Center : simulation affichée en temps réel (pygame)"),
+    "replay": ("simulation", "cli", ["--replay"], "Rejoue une trace enregistrée par traces.py (pygame)"),
+}
+
+def load(command: str):
+    """ Fonction cli de la sous-commande, son module importé à la demande """
+    module, function, _, _ = COMMANDS[command]
+    return getattr(importlib.import_module(module), function)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="skyhub", description="SkyHub - Optimiseur et simulateur de vertiport",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="\n".join(f"  {name:<10} {spec[3]}" for name, spec in COMMANDS.items()))
+    parser.add_argument("command", choices=COMMANDS, metavar="COMMANDE", help="optimize | simulate | visualize | replay")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Options de la sous-commande (COMMANDE --help)")
+    args = parser.parse_args(argv)
+    prefix = [] if {"-h", "--help"} & set(args.args) else COMMANDS[args.command][2]
+    return load(args.command)(prefix + args.args, prog=f"skyhub {args.command}")
+
+if __name__ == "__main__":
+    main()
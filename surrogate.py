@@ -0,0 +1,277 @@
+"""
+MODÈLE DE SUBSTITUTION - SKYHUB PROJECT
+Les résultats physiques varient continûment avec la configuration (pads, garage), la batterie,
+la recharge, la consommation et l'intensité du trafic : un processus gaussien (régression à noyau
+RBF, NumPy seul) ajusté sur les échantillons accumulés par les exécutions --surrogate ou
+--record-samples de l'optimiseur (samples.py) répond en quelques millisecondes, avec un écart-type, pour une ville ou une
+technologie jamais simulée.
+
+  - variables centrées et réduites (une variable constante dans les échantillons : 10 % de sa
+    valeur vaut un écart-type, pour qu'une nouvelle technologie reste « loin » des données) ;
+  - réplications d'un même point regroupées (moyenne, bruit divisé par leur nombre) ;
+  - longueur de corrélation et niveau de bruit choisis par validation croisée « leave-one-out »,
+    calculée exactement à partir de l'inverse de la matrice de covariance ;
+  - cibles : vols et refus par jour, indicatrice de crash (lue comme une probabilité) ; la durée
+    simulée est une variable (le risque de crash croît avec elle) et seuls les échantillons du
+    moteur de la recherche servent à l'ajustement.
+
+Recherche assistée (main_surrogate) : on ne simule que les cellules où le modèle est incertain
+(écart-type relatif des vols > SURROGATE_TOLERANCE) ou proche de la frontière de crash, on
+ré-ajuste, et la configuration recommandée est toujours vérifiée par une simulation complète.
+"""
+import time
+import dataclasses
+import numpy as np
+import config
+from economics import month_economics
+from optimizer import iter_grid_results, save_best_params
+from samples import FEATURES, TARGETS, SampleStore, features
+from scenario import default_scenario
+
+LENGTH_SCALES = (0.5, 1.0, 2.0, 4.0)   # Candidats, en écarts-types des variables
+NOISE_RATIOS = (0.01, 0.1)             # Variance du bruit d'une simulation / variance de la cible
+
+@dataclasses.dataclass
+class Prediction:
+    """ Estimation d'une cellule (par jour simulé) et écarts-types du modèle """
+    flights: float
+    flights_std: float
+    refusals: float
+    refusals_std: float
+    crash_probability: float
+    crash_std: float
+
+    @property
+    def verdict(self) -> str:
+        """ "crash" (sûrement), "frontière" (à simuler), "incertain" (vols mal connus, à simuler) ou "sûr" """
+        if self.crash_probability - 2 * self.crash_std >= 0.5:
+            return "crash"
+        if self.crash_probability + 2 * self.crash_std >= 0.5 or self.crash_probability > config.SURROGATE_CRASH_RISK:
+            return "frontière"
+        if self.flights_std > config.SURROGATE_TOLERANCE * max(self.flights, 1.0):
+            return "incertain"
+        return "sûr"
+
+def squared_distances(a, b):
+    return np.maximum((a * a).sum(1)[:, None] + (b * b).sum(1)[None, :] - 2 * a @ b.T, 0.0)
+
+class Surrogate:
+    """ Processus gaussien ajusté sur des échantillons [(variables..., cibles...)] """
+    def __init__(self, rows: list, max_points: int = None):
+        max_points = config.SURROGATE_MAX_POINTS if max_points is None else max_points
+        data = np.asarray(rows, dtype=float)
+        x, y = data[:, :len(FEATURES)], data[:, len(FEATURES):]
+
+        # Réplications d'un même point : une seule ligne, bruit divisé par leur nombre
+        x, inverse, counts = np.unique(x, axis=0, return_inverse=True, return_counts=True)
+        sums = np.zeros((len(x), len(TARGETS)))
+        np.add.at(sums, inverse.ravel(), y)
+        y = sums / counts[:, None]
+        if len(x) > max_points:
+            keep = np.sort(np.random.default_rng(0).choice(len(x), max_points, replace=False))
+            x, y, counts = x[keep], y[keep], counts[keep]
+
+        self.samples = len(data)
+        self.points = len(x)
+        self.center = x.mean(0)
+        self.scale = np.maximum(x.std(0), 0.1 * np.abs(self.center))
+        self.scale[self.scale == 0] = 1.0
+        self.x = (x - self.center) / self.scale
+        self.y_mean = y.mean(0)
+        self.y_scale = np.maximum(y.std(0), 1e-6)
+        self.y_scale[TARGETS.index("crashed")] = 0.5        # Écart-type maximal d'une indicatrice
+        z = (y - self.y_mean) / self.y_scale
+
+        # Hyperparamètres : erreur leave-one-out exacte (alpha_i / (K^-1)_ii) sur les vols et les refus
+        distances = squared_distances(self.x, self.x)
+        best = None
+        for length_scale in LENGTH_SCALES:
+            kernel = np.exp(-distances / (2 * length_scale ** 2))
+            for noise in NOISE_RATIOS:
+                inverse_k = np.linalg.inv(kernel + np.diag(noise / counts + 1e-8))
+                alpha = inverse_k @ z
+                loo = alpha[:, :2] / np.diag(inverse_k)[:, None]
+                error = float((loo ** 2).mean())
+                if best is None or error < best[0]:
+                    best = (error, length_scale, noise, inverse_k, alpha)
+        self.loo_error, self.length_scale, self.noise, self.inverse_k, self.alpha = best
+
+    @classmethod
+    def fit(cls, store: SampleStore, engine: str = None):
+        """
+        Modèle ajusté sur la base d'échantillons (d'un seul moteur si précisé),
+        None s'il y en a moins de SURROGATE_MIN_SAMPLES
+        """
+        rows = store.rows(limit=50 * config.SURROGATE_MAX_POINTS, engine=engine)
+        return cls(rows) if len(rows) >= config.SURROGATE_MIN_SAMPLES else None
+
+    def predict(self, points) -> list:
+        """ [Prediction] pour des vecteurs de variables (samples.features) """
+        query = (np.asarray(points, dtype=float) - self.center) / self.scale
+        k = np.exp(-squared_distances(query, self.x) / (2 * self.length_scale ** 2))
+        mean = self.y_mean + (k @ self.alpha) * self.y_scale
+        variance = np.maximum(1.0 - ((k @ self.inverse_k) * k).sum(1), 0.0)[:, None]
+        # Vols et refus : écart-type d'une simulation (bruit compris) ; crash : incertitude du modèle seule
+        variance = variance + np.array([self.noise, self.noise, 0.0])
+        std = np.sqrt(variance) * self.y_scale
+        return [Prediction(max(m[0], 0.0), s[0], max(m[1], 0.0), s[1], float(np.clip(m[2], 0.0, 1.0)), s[2])
+                for m, s in zip(mean, std)]
+
+    def predict_cells(self, cells, scenario=None) -> dict:
+        """ {cellule: Prediction} pour les cellules (pads, garage) d'un scénario """
+        scenario = default_scenario() if scenario is None else scenario
+        return dict(zip(cells, self.predict([features(pads, garage, scenario) for pads, garage in cells])))
+
+    def __str__(self):
+        return (f"{self.points} points ({self.samples} échantillons) | longueur {self.length_scale:g} | "
+                f"bruit {self.noise:g} | erreur LOO {self.loo_error:.3f}")
+
+def main_surrogate(workers, seed: int, engine: str, scenario=None, params_path: str = "best_params.json", cache=None,
+                   samples=None):
+    """
+    Grille estimée par le modèle ; simulations seulement là où il est incertain, puis vérification.
+    samples : base d'échantillons déjà ouverte (--record-samples), sinon celle par défaut.
+    """
+    scenario = default_scenario() if scenario is None else scenario
+    days = scenario.sim_duration_days
+    print(f"--- 🛡️ SKYHUB OPTIMIZER (Modèle de substitution) | Scénario : {scenario.name} ---")
+    print(f"Simulation sur {days} jours | tolérance {config.SURROGATE_TOLERANCE:.0%} sur les vols | "
+          f"risque de crash < {config.SURROGATE_CRASH_RISK:.0%} | {config.SURROGATE_ROUNDS} manches max")
+    print(f"Graine maître : {seed} | Workers : {workers} | Moteur : {engine}")
+
+    cells = scenario.grid()
+    store = SampleStore() if samples is None else samples
+    simulated = {}
+    predictions = {}
+    model = None
+    fit_time = predict_time = 0.0
+
+    def simulate(batch):
+        # Chaque simulation lancée enrichit la base d'échantillons (evaluate_jobs l'y enregistre)
+        for pads, garage, result in iter_grid_results(batch, seed, workers, engine, None, cache, scenario, store):
+            simulated[(pads, garage)] = result
+
+    for round_index in range(config.SURROGATE_ROUNDS):
+        start = time.perf_counter()
+        model = Surrogate.fit(store, engine)
+        fit_time += time.perf_counter() - start
+        if model is not None:
+            start = time.perf_counter()
+            predictions = model.predict_cells(cells, scenario)
+            predict_time = time.perf_counter() - start
+        to_run = [cell for cell in cells if cell not in simulated
+                  and (model is None or predictions[cell].verdict in ("frontière", "incertain"))]
+        if not to_run:
+            break
+        reason = ("pas encore de modèle" if model is None else
+                  ", ".join(f"{sum(predictions[c].verdict == v for c in to_run)} {v}" for v in ("frontière", "incertain")))
+        print(f"🧠 Manche {round_index + 1} : {len(to_run)} cellule(s) simulée(s) ({reason})", flush=True)
+        simulate(to_run)
+
+    def estimate(cell):
+        """ (profit, crash, source) : simulation si elle existe, sinon modèle """
+        if cell in simulated:
+            profit, _, _, crashes = simulated[cell]
+            return profit, crashes > 0, "simulé"
+        prediction = predictions[cell]
+        profit = month_economics(cell[0], cell[1], prediction.flights * days, 0, days, scenario)
+        return profit, prediction.verdict in ("crash", "frontière"), \
+            f"modèle ±{prediction.flights_std / max(prediction.flights, 1.0):.0%}"
+
+    # Vérification : la recommandation finale est toujours une cellule simulée
+    while True:
+        safe = [cell for cell in cells if not estimate(cell)[1]]
+        best_config = max(safe, key=lambda cell: estimate(cell)[0]) if safe else None
+        if best_config is None or best_config in simulated:
+            break
+        predicted = estimate(best_config)[0]
+        simulate([best_config])
+        print(f"🧠 Vérification Pads={best_config[0]} Garage={best_config[1]} : modèle {predicted:,.0f}€ | "
+              f"simulation {simulated[best_config][0]:,.0f}€ | crashs {simulated[best_config][3]}", flush=True)
+
+    print("-" * 100)
+    print(f"{'CONFIG':<18} | {'PROFIT NET':<12} | {'P(CRASH)':<9} | {'SOURCE':<13} | {'ANALYSE'}")
+    print("-" * 100)
+    for cell in cells:
+        profit, crashed, source = estimate(cell)
+        crash = f"{predictions[cell].crash_probability:.2f}" if cell in predictions else "-"
+        status = "💀 ÉCHEC SÉCU" if crashed else "⭐ RECOMMANDÉE" if cell == best_config else ""
+        if profit > 0 or status:
+            print(f"Pads={cell[0]} Garage={cell[1]:<2} | {profit:<10,.0f}€ | {crash:<9} | {source:<13} | {status}")
+
+    print("-" * 100)
+    saved = len(cells) - len(simulated)
+    print(f"🧠 Simulations : {len(simulated)} / {len(cells)} (grille complète) | {saved} évitées ({saved / len(cells):.0%})")
+    if model is not None:
+        print(f"🧠 Modèle : {model} | ajustements {fit_time:.2f}s | grille prédite en {predict_time * 1000:.1f} ms")
+    if samples is None:
+        store.close()
+    if best_config:
+        print(f"🏆 INFRASTRUCTURE OPTIMALE : {best_config[0]} Pads + {best_config[1]} Garage")
+        save_best_params(best_config, params_path)
+    else:
+        print("❌ Aucune configuration rentable.")
+    return best_config
+
+def scaled(scenario, traffic: float, charge_rate: float, name: str):
+    """ Scénario au trafic multiplié (profils bornés à 1) et à la vitesse de recharge donnée """
+    scale = lambda profile: tuple(min(1.0, p * traffic) for p in profile)
+    return scenario.replace(name=name, charge_rate_per_min=charge_rate,
+                            profile_arrival_weekday=scale(scenario.profile_arrival_weekday),
+                            profile_departure_weekday=scale(scenario.profile_departure_weekday),
+                            profile_weekend_flat=scale(scenario.profile_weekend_flat))
+
+if __name__ == "__main__":
+    import os
+    import argparse
+    import tempfile
+    from optimizer import derive_seed, run_tasks
+    parser = argparse.ArgumentParser(description="SkyHub - Modèle de substitution contre simulation complète")
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut : config.OPTIMIZER_WORKERS)")
+    parser.add_argument("--days", type=int, default=14, help="Jours simulés par échantillon")
+    args = parser.parse_args()
+
+    workers = config.OPTIMIZER_WORKERS if args.workers is None else args.workers
+    seed = config.OPTIMIZER_SEED
+    base = default_scenario().replace(sim_duration_days=args.days)
+    # Base d'échantillons jetable : le contrôle ne touche pas à celle de l'utilisateur
+    config.SURROGATE_SAMPLES_PATH = os.path.join(tempfile.mkdtemp(prefix="skyhub_surrogate_"), "samples.sqlite")
+    store = SampleStore()
+
+    # 1. Apprentissage : grilles complètes de neuf « villes » (trafic x recharge) autour du scénario
+    training = [scaled(base, traffic, charge, f"trafic x{traffic:g} recharge {charge:g}")
+                for traffic in (0.8, 1.0, 1.2) for charge in (4.0, 5.0, 6.0)]
+    start = time.perf_counter()
+    for scenario in training:
+        list(iter_grid_results(scenario.grid(), seed, workers, "object", None, None, scenario, store))
+    train_time = time.perf_counter() - start
+    start = time.perf_counter()
+    model = Surrogate.fit(store, "object")
+    print(f"Apprentissage : {len(store)} simulations en {train_time:.0f}s | ajustement {time.perf_counter() - start:.2f}s "
+          f"| {model}")
+
+    # 2. Ville jamais simulée (entre les villes d'apprentissage) : modèle contre grille complète
+    test = scaled(base, 1.1, 4.5, "trafic x1.1 recharge 4.5")
+    cells = test.grid()
+    start = time.perf_counter()
+    predictions = model.predict_cells(cells, test)
+    query_time = (time.perf_counter() - start) / len(cells)
+    tasks = [(cell, cell[0], cell[1], derive_seed(seed, *cell), None, test) for cell in cells]
+    truth = dict(run_tasks(tasks, workers))
+
+    errors = [abs(predictions[c].flights * args.days - truth[c][1]) / max(truth[c][1], 1) for c in cells]
+    covered = sum(abs(predictions[c].flights * args.days - truth[c][1]) <= 2 * predictions[c].flights_std * args.days
+                  for c in cells)
+    crash_agree = sum((predictions[c].crash_probability >= 0.5) == (truth[c][3] > 0) for c in cells)
+    print(f"Ville inédite ({test.name}) : écart moyen sur les vols {sum(errors) / len(errors):.1%} | "
+          f"dans ±2σ {covered}/{len(cells)} | crash bien classé {crash_agree}/{len(cells)} | "
+          f"{query_time * 1e6:.0f} µs par requête")
+
+    # 3. Recherche assistée sur la ville inédite : simulations évitées, même optimum que la grille complète ?
+    safe = [c for c in cells if truth[c][3] == 0]
+    grid_best = max(safe, key=lambda c: truth[c][0]) if safe else None
+    assisted = main_surrogate(workers, seed, "object", test, os.path.join(os.path.dirname(config.SURROGATE_SAMPLES_PATH),
+                                                                          "best_params.json"))
+    gap = (truth[grid_best][0] - truth[assisted][0]) / abs(truth[grid_best][0]) if assisted and grid_best else None
+    print(f"🏆 Grille complète {grid_best} | recherche assistée {assisted}"
+          + (f" (profit simulé à {gap:.1%} de l'optimum)" if gap is not None else ""))
@@ -0,0 +1,273 @@
+"""
+TRACES DE SIMULATION - SKYHUB PROJECT
+Enregistre, sans affichage, l'état du hub à chaque minute (file d'approche, contenu des pads
+et du garage, batteries) dans un fichier binaire compact, puis le relit en accès direct
+(mmap) : le visualiseur peut sauter à n'importe quelle minute sans re-simuler.
+
+Format (petit-boutiste) :
+  en-tête     MAGIC, version (u16), longueur (u32) et métadonnées JSON (infrastructure, scénario)
+  images      une par minute : compteurs cumulés (refus, crashs, atterrissages), file complète,
+              puis soit toutes les places (image clé, toutes les TRACE_KEYFRAME_INTERVAL minutes),
+              soit seulement les places modifiées depuis la minute précédente (delta)
+  index       position (u64) de l'image de chaque minute
+  pied        position de l'index (u64), nombre de minutes (u32), END_MAGIC
+Relire une minute = décoder l'image clé qui la précède puis au plus intervalle - 1 deltas.
+"""
+import os
+import json
+import mmap
+import struct
+import dataclasses
+import config
+from scenario import Scenario, default_scenario
+
+MAGIC = b"SKYTRACE"
+END_MAGIC = b"SKYTREND"
+VERSION = 1
+KEYFRAME, DELTA = 0, 1
+
+HEADER = struct.Struct("<8sHI")         # magic, version, longueur des métadonnées
+FRAME = struct.Struct("<BIIIH")         # type, refus, crashs, atterrissages, longueur de file
+DRONE = struct.Struct("<IBH")           # id (0 = place vide), priorité, batterie (dixièmes de %)
+CHANGES = struct.Struct("<H")           # nombre de places modifiées (delta)
+CHANGE = struct.Struct("<HIBH")         # place (pads puis garage), puis le drone comme DRONE
+OFFSET = struct.Struct("<Q")
+FOOTER = struct.Struct("<QI8s")
+
+class TraceRecorder:
+    """
+    Observateur d'un Vertiport (hub.metrics) qui écrit une trace : même interface que
+    metrics.VertiportMetrics, donc branché sur n'importe quelle simulation du moteur objet.
+    """
+    def __init__(self, path: str, num_pads: int, num_garage: int, scenario=None, keyframe_interval: int = None):
+        self.scenario = default_scenario() if scenario is None else scenario
+        self.num_pads = num_pads
+        self.num_garage = num_garage
+        self.keyframe_interval = config.TRACE_KEYFRAME_INTERVAL if keyframe_interval is None else keyframe_interval
+
+        self.minute = 0
+        self.refusals = 0
+        self.crashes = 0
+        self.landings = 0
+        self.offsets = []
+        self.previous = [(0, 0, 0)] * (num_pads + num_garage)
+        self.ids = {}           # Identifiants non numériques ("D001") -> numéro
+
+        meta = json.dumps({"num_pads": num_pads, "num_garage": num_garage,
+                           "keyframe_interval": self.keyframe_interval,
+                           "scenario": dataclasses.asdict(self.scenario)}).encode()
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, len(meta)) + meta)
+        self.position = HEADER.size + len(meta)
+
+    def encode(self, drone) -> tuple:
+        """ (id, priorité, batterie en dixièmes de %) ; (0, 0, 0) pour une place vide """
+        if drone is None:
+            return 0, 0, 0
+        ident = drone._drone_id
+        if not isinstance(ident, int):
+            ident = self.ids.setdefault(ident, len(self.ids) + 1)
+        return ident, drone.mission_priority, round(drone.current_battery * 10)
+
+    # --- Interface d'observation (voir Vertiport.metrics) ---
+
+    def record_minute(self, hub):
+        """ Fin d'une minute : une image clé ou un delta des places """
+        queue = hub.approach_queue
+        parts = [b""]
+        encode = self.encode
+        parts.extend(DRONE.pack(*encode(d)) for d in queue)
+
+        slots = [encode(d) for d in hub.charging_pads]
+        slots.extend(encode(d) for d in hub.parking_spots)
+        if self.minute % self.keyframe_interval == 0:
+            kind = KEYFRAME
+            parts.extend(DRONE.pack(*slot) for slot in slots)
+        else:
+            kind = DELTA
+            changes = [CHANGE.pack(i, *slot) for i, (slot, old) in enumerate(zip(slots, self.previous)) if slot != old]
+            parts.append(CHANGES.pack(len(changes)))
+            parts.extend(changes)
+        parts[0] = FRAME.pack(kind, self.refusals, self.crashes, self.landings, len(queue))
+        self.previous = slots
+
+        frame = b"".join(parts)
+        self.file.write(frame)
+        self.offsets.append(self.position)
+        self.position += len(frame)
+        self.minute += 1
+
+    def record_landing(self, drone):
+        self.landings += 1
+
+    def record_refusal(self):
+        self.refusals += 1
+
+    def record_crash(self):
+        self.crashes += 1
+
+    def close(self):
+        """ Écrit l'index et le pied : la trace devient lisible """
+        index = b"".join(OFFSET.pack(offset) for offset in self.offsets)
+        self.file.write(index + FOOTER.pack(self.position, len(self.offsets), END_MAGIC))
+        self.file.close()
+
+class TracedDrone:
+    """ Drone relu dans une trace : ce dont le visualiseur a besoin """
+    __slots__ = ("_drone_id", "mission_priority", "current_battery", "max_battery")
+
+    def __init__(self, drone_id: int, priority: int, battery: float, max_battery: float):
+        self._drone_id = drone_id
+        self.mission_priority = priority
+        self.current_battery = battery
+        self.max_battery = max_battery
+
+    @property
+    def drone_id(self) -> str:
+        return f"D{self._drone_id}"
+
+class TracedHub:
+    """ État du hub à une minute de la trace (mêmes attributs que Vertiport pour le visualiseur) """
+    def __init__(self, num_pads: int, num_garage: int):
+        self.num_charging_pads = num_pads
+        self.num_parking_spots = num_garage
+        self.approach_queue = []
+        self.charging_pads = [None] * num_pads
+        self.parking_spots = [None] * num_garage
+        self.refusals = 0
+        self.crashes = 0
+        self.landings = 0
+
+    @property
+    def occupied_pads(self) -> int:
+        return sum(1 for d in self.charging_pads if d is not None)
+
+    @property
+    def occupied_spots(self) -> int:
+        return sum(1 for d in self.parking_spots if d is not None)
+
+class Trace:
+    """ Trace relue en mmap ; seek(minute) renvoie l'état du hub (TracedHub) à cette minute """
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, meta_len = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} : trace SkyHub v{VERSION} attendue")
+        index_offset, self.minutes, end_magic = FOOTER.unpack_from(self.data, len(self.data) - FOOTER.size)
+        if end_magic != END_MAGIC:
+            raise ValueError(f"{path} : trace incomplète (enregistrement interrompu)")
+
+        meta = json.loads(self.data[HEADER.size:HEADER.size + meta_len])
+        self.num_pads = meta["num_pads"]
+        self.num_garage = meta["num_garage"]
+        self.keyframe_interval = meta["keyframe_interval"]
+        self.scenario = Scenario(**meta["scenario"])
+        self.index_offset = index_offset
+
+        self.hub = TracedHub(self.num_pads, self.num_garage)
+        self.minute = -1        # Minute de l'état décodé dans self.hub
+
+    @property
+    def days(self) -> int:
+        return self.minutes // 1440
+
+    def frame_offset(self, minute: int) -> int:
+        return OFFSET.unpack_from(self.data, self.index_offset + OFFSET.size * minute)[0]
+
+    def apply(self, minute: int):
+        """ Décode l'image d'une minute dans self.hub (image clé, ou delta sur la minute précédente) """
+        data, hub = self.data, self.hub
+        max_battery = self.scenario.battery_max
+        position = self.frame_offset(minute)
+        kind, hub.refusals, hub.crashes, hub.landings, queue_len = FRAME.unpack_from(data, position)
+        position += FRAME.size
+
+        queue = []
+        for _ in range(queue_len):
+            ident, priority, battery = DRONE.unpack_from(data, position)
+            queue.append(TracedDrone(ident, priority, battery / 10, max_battery))
+            position += DRONE.size
+        hub.approach_queue = queue
+
+        pads, spots = hub.charging_pads, hub.parking_spots
+        if kind == KEYFRAME:
+            changes = ((i,) + DRONE.unpack_from(data, position + i * DRONE.size)
+                       for i in range(self.num_pads + self.num_garage))
+        else:
+            (count,) = CHANGES.unpack_from(data, position)
+            position += CHANGES.size
+            changes = (CHANGE.unpack_from(data, position + i * CHANGE.size) for i in range(count))
+        for slot, ident, priority, battery in changes:
+            drone = TracedDrone(ident, priority, battery / 10, max_battery) if ident else None
+            if slot < self.num_pads:
+                pads[slot] = drone
+            else:
+                spots[slot - self.num_pads] = drone
+        self.minute = minute
+
+    def seek(self, minute: int) -> TracedHub:
+        """ État du hub à la fin de la minute donnée (bornée à la trace) """
+        minute = max(0, min(minute, self.minutes - 1))
+        interval = self.keyframe_interval
+        if not (self.minute <= minute and self.minute // interval == minute // interval):
+            # Retour en arrière ou saut : on repart de l'image clé du segment
+            self.apply(minute - minute % interval)
+        for m in range(self.minute + 1, minute + 1):
+            self.apply(m)
+        return self.hub
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+def record_trace(path: str, num_pads: int, num_garage: int, seed: int = None, scenario=None, demand=None):
+    """
+    Simule une configuration (moteur objet, graine ou flux de demande rejoué) en l'enregistrant ;
+    renvoie le résultat (profit, vols, refus, crashs) de la simulation.
+    """
+    from optimizer import run_month_simulation, replay_month_simulation
+    scenario = default_scenario() if scenario is None else scenario
+    recorder = TraceRecorder(path, num_pads, num_garage, scenario)
+    try:
+        if demand is not None:
+            return replay_month_simulation(num_pads, num_garage, demand, scenario, recorder)
+        return run_month_simulation(num_pads, num_garage, seed, scenario, recorder)
+    finally:
+        recorder.close()
+
+if __name__ == "__main__":
+    import time
+    import argparse
+    import random
+    parser = argparse.ArgumentParser(description="SkyHub - Enregistrement d'une trace (sans affichage)")
+    parser.add_argument("output", help="Fichier de trace à écrire (.skytrace)")
+    parser.add_argument("--pads", type=int, default=8)
+    parser.add_argument("--garage", type=int, default=57)
+    parser.add_argument("--seed", type=int, default=None, help="Graine de la simulation (défaut : config.OPTIMIZER_SEED)")
+    parser.add_argument("--days", type=int, default=None, help="Durée (défaut : celle du scénario)")
+    parser.add_argument("--scenario", default=None, help="Scénario JSON ou TOML (défaut : config.py)")
+    args = parser.parse_args()
+
+    scenario = Scenario.load(args.scenario) if args.scenario else default_scenario()
+    if args.days is not None:
+        scenario = scenario.replace(sim_duration_days=args.days)
+    seed = config.OPTIMIZER_SEED if args.seed is None else args.seed
+
+    start = time.perf_counter()
+    result = record_trace(args.output, args.pads, args.garage, seed, scenario)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(args.output)
+    print(f"--- Trace : Pads={args.pads} Garage={args.garage} | {scenario.sim_duration_days} jours en {elapsed:.1f}s ---")
+    print(f"Profit {result[0]:,.0f}€ | Vols {result[1]} | Refus {result[2]} | Crashs {result[3]}")
+    print(f"💾 {args.output} : {size / 1e6:.2f} Mo ({size / (scenario.sim_duration_days * 1440):.0f} octets/minute)")
+
+    # Accès direct : sauts aléatoires dans la trace
+    trace = Trace(args.output)
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(1000):
+        trace.seek(rng.randrange(trace.minutes))
+    print(f"⏩ Saut aléatoire : {(time.perf_counter() - start):.3f} ms en moyenne (1000 sauts)")
+    trace.close()
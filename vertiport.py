@@ -1,16 +1,31 @@
 import math
-import config
-from evtol import EVTOL
+import heapq
+from scenario import default_scenario
+from evtol import EVTOL, EN_VOL, EN_RECHARGE, AU_REPOS
+
+# Seuils de batterie du contrôleur, en % de scenario.battery_max (batch_engine, event_engine et prescreen les partagent)
+VALET_JAM_PERCENT = 60.0        # Délestage Pad -> Garage quand la file d'approche attend
+VALET_IDLE_PERCENT = 99.0       # Délestage Pad -> Garage sinon
+EMERGENCY_PERCENT = 15.0        # Sous ce seuil, atterrissage de sécurité au garage
+DISPATCH_PERCENT = 50.0         # Réserve minimale pour décoller
+DISPATCH_URGENT_PERCENT = 30.0  # Réserve minimale pour une mission de priorité 2
+
+def battery_level(scenario, percent: float) -> float:
+    """ Seuil exprimé en % de battery_max -> unités de batterie du scénario (même arrondi pour tous les moteurs) """
+    return percent * scenario.battery_max / 100
 
 class Vertiport:
     """
     Gère l'infrastructure (Pads, Garage, Ciel) et le contrôle aérien.
     """
-    def __init__(self, name: str, num_charging_pads: int, num_parking_spots: int, verbose: bool = True):
+    def __init__(self, name: str, num_charging_pads: int, num_parking_spots: int, verbose: bool = True,
+                 scenario=None):
         self.name = name
+        self.scenario = default_scenario() if scenario is None else scenario
         self.num_charging_pads = num_charging_pads
         self.num_parking_spots = num_parking_spots
         self.verbose = verbose
+        self.metrics = None     # Observateur optionnel, sans journal (metrics.VertiportMetrics, traces.TraceRecorder)
         
         self.crashes = 0 
         
@@ -19,8 +34,39 @@ class Vertiport:
         self.parking_spots = [None] * num_parking_spots
         self.approach_queue = []
 
+        # Index des places libres (tas min : la première place libre est toujours en tête)
+        # et compteurs d'occupation, tenus à jour par occupy_slot / release_slot
+        self.free_pads = list(range(num_charging_pads))
+        self.free_spots = list(range(num_parking_spots))
+        self.occupied_pads = 0
+        self.occupied_spots = 0
+        self.offline_pads = set()          # Pads en maintenance (les derniers) : plus jamais réattribués
+        self.active_pads = num_charging_pads
+
+        # Index de batterie (tas à suppression paresseuse : une entrée n'est valide que si
+        # sa version est celle de la place). Les pads chargent tous au même rythme, donc
+        # batterie - CHARGE * ticks est invariant : l'ordre du tas reste juste sans mise à jour.
+        self.ticks = 0                      # Minutes écoulées (horloge des index)
+        self.slot_version = 0
+        self.pad_versions = [-1] * num_charging_pads
+        self.spot_versions = [-1] * num_parking_spots
+        self.pads_by_charge = []            # (-(batterie - CHARGE*ticks), index, version)
+        self.pads_full = []                 # (index, version) : batterie au max (ex aequo -> 1er index)
+        self.spots_by_max = []              # (-batterie, index, version)
+        self.spots_by_min = []              # (batterie, index, version), seulement si batterie < battery_max
+
+        # Seuils du contrôleur convertis une fois pour toutes dans les unités du scénario
+        self.valet_jam_level = battery_level(self.scenario, VALET_JAM_PERCENT)
+        self.valet_idle_level = battery_level(self.scenario, VALET_IDLE_PERCENT)
+        self.emergency_level = battery_level(self.scenario, EMERGENCY_PERCENT)
+        self.dispatch_level = battery_level(self.scenario, DISPATCH_PERCENT)
+        self.dispatch_urgent_level = battery_level(self.scenario, DISPATCH_URGENT_PERCENT)
+
     def log(self, message: str):
-        """ Wrapper pour print, activé seulement si verbose=True """
+        """
+        Wrapper pour print, activé seulement si verbose=True.
+        Les appels du chemin chaud testent verbose avant de formater le message (drone_id est formaté à la demande).
+        """
         if self.verbose:
             print(message)
 
@@ -30,50 +76,187 @@ class Vertiport:
         Décide si un drone peut entrer dans l'espace aérien du Vertiport.
         Retourne True si accepté, False si refusé (risque de crash ou saturation).
         """
+        return self.can_accept_battery(incoming_drone.current_battery)
+
+    def can_accept_battery(self, battery: float) -> bool:
+        """ Même décision à partir de la seule batterie : aucun drone à construire pour un refus """
         # 1. Vérification Physique (Capacité de stockage)
         # On compte tous les drones présents (Ciel + Pads + Garage)
-        occupants_total = len(self.approach_queue) + \
-                          len([d for d in self.charging_pads if d]) + \
-                          len([d for d in self.parking_spots if d])
+        occupants_total = len(self.approach_queue) + self.occupied_pads + self.occupied_spots
         
-        capacity_total = self.num_charging_pads + self.num_parking_spots
+        capacity_total = self.active_pads + self.num_parking_spots
         
         # Règle : On garde toujours 1 place tampon pour éviter le blocage (deadlock)
         if occupants_total >= (capacity_total - 1):
             return False 
 
         # 2. Vérification Temporelle (Autonomie vs Attente estimée)
-        flight_time_remaining = incoming_drone.current_battery / config.CONSUMPTION_PER_MIN
+        scenario = self.scenario
+        flight_time_remaining = battery / scenario.consumption_per_min
         
         # Estimation du débit du Vertiport
-        # Hypothèse : Temps moyen de rotation sur un pad = 15 min
-        avg_cycle_time = 15.0 
-        throughput_per_min = self.num_charging_pads / avg_cycle_time
+        # Hypothèse : Temps moyen de rotation sur un pad (15 min par défaut)
+        throughput_per_min = self.active_pads / scenario.avg_cycle_time
         
         # Temps d'attente estimé dans la file
         queue_size = len(self.approach_queue)
         estimated_wait_time = queue_size / throughput_per_min if throughput_per_min > 0 else 999
         
         # Règle : Le temps d'attente doit être inférieur à l'autonomie moins la marge de sécurité
-        if estimated_wait_time > (flight_time_remaining - config.SAFETY_BUFFER_MIN):
+        if estimated_wait_time > (flight_time_remaining - scenario.safety_buffer_min):
             return False 
 
         return True 
 
     def add_to_approach(self, evtol: EVTOL):
-        """ Ajoute un drone validé dans la file d'attente """
-        type_str = "URGENCE" if evtol.mission_priority == 2 else "PASSAGERS" if evtol.mission_priority == 1 else "VIDE"
-        self.log(f"📡 RADAR: {evtol.drone_id} ({type_str}) demande l'atterrissage.")
-        evtol.status = "EN_VOL"
-        self.approach_queue.append(evtol)
+        """
+        Ajoute un drone validé dans la file d'attente, à sa place dans l'ordre d'atterrissage
+        (Priorité > Batterie Faible > ordre d'arrivée). Tous les drones en vol perdent la même
+        batterie par minute : la file reste triée sans jamais être retriée.
+        """
+        if self.verbose:
+            type_str = "URGENCE" if evtol.mission_priority == 2 else "PASSAGERS" if evtol.mission_priority == 1 else "VIDE"
+            self.log(f"📡 RADAR: {evtol.drone_id} ({type_str}) demande l'atterrissage.")
+        evtol.status = EN_VOL
+
+        queue = self.approach_queue
+        key = (-evtol.mission_priority, evtol.current_battery)
+        lo, hi = 0, len(queue)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key < (-queue[mid].mission_priority, queue[mid].current_battery):
+                hi = mid
+            else:
+                lo = mid + 1
+        queue.insert(lo, evtol)
 
     def find_free_index(self, location_list: list) -> int:
-        """ Trouve le premier index vide dans une liste """
+        """ Trouve le premier index vide dans une liste (O(1) pour les pads et le garage) """
+        if location_list is self.charging_pads:
+            return self.free_pads[0] if self.free_pads else -1
+        if location_list is self.parking_spots:
+            return self.free_spots[0] if self.free_spots else -1
+
         for i in range(len(location_list)):
             if location_list[i] is None:
                 return i
         return -1
 
+    def occupy_slot(self, location_list: list, index: int, drone: EVTOL):
+        """ Place un drone sur une place libre (pad ou garage) en tenant les index à jour """
+        location_list[index] = drone
+        if location_list is self.charging_pads:
+            free, self.occupied_pads = self.free_pads, self.occupied_pads + 1
+        else:
+            free, self.occupied_spots = self.free_spots, self.occupied_spots + 1
+
+        # Cas courant : on occupe la première place libre (tête du tas)
+        if free[0] == index:
+            heapq.heappop(free)
+        else:
+            free.remove(index)
+            heapq.heapify(free)
+
+        # Indexation par batterie
+        self.slot_version += 1
+        version = self.slot_version
+        battery = drone.current_battery
+        if location_list is self.charging_pads:
+            self.pad_versions[index] = version
+            if battery >= drone.max_battery:
+                heapq.heappush(self.pads_full, (index, version))
+            else:
+                heapq.heappush(self.pads_by_charge, (-(battery - self.scenario.charge_rate_per_min * self.ticks), index, version))
+        else:
+            self.spot_versions[index] = version
+            heapq.heappush(self.spots_by_max, (-battery, index, version))
+            if battery < self.scenario.battery_max:
+                heapq.heappush(self.spots_by_min, (battery, index, version))
+
+    def release_slot(self, location_list: list, index: int):
+        """ Libère une place (pad ou garage) """
+        location_list[index] = None
+        if location_list is self.charging_pads:
+            if index not in self.offline_pads:
+                heapq.heappush(self.free_pads, index)
+            self.occupied_pads -= 1
+            self.pad_versions[index] = -1
+        else:
+            heapq.heappush(self.free_spots, index)
+            self.occupied_spots -= 1
+            self.spot_versions[index] = -1
+
+        # Purge des entrées périmées quand elles deviennent majoritaires
+        if len(self.pads_by_charge) + len(self.spots_by_max) > 2 * (self.num_charging_pads + self.num_parking_spots) + 64:
+            self.compact_indexes()
+
+    def set_pads_offline(self, count: int):
+        """
+        Met en maintenance les 'count' derniers pads (0 : tous rouverts). Un pad occupé termine
+        sa rotation : il n'est retiré qu'au départ de son drone. ValueError hors de [0, num_charging_pads].
+        """
+        if not 0 <= count <= self.num_charging_pads:
+            raise ValueError(f"pads hors service : {count} hors de [0, {self.num_charging_pads}]")
+        offline = set(range(self.num_charging_pads - count, self.num_charging_pads))
+        for index in self.offline_pads - offline:
+            if self.charging_pads[index] is None:
+                heapq.heappush(self.free_pads, index)
+        self.free_pads = [index for index in self.free_pads if index not in offline]
+        heapq.heapify(self.free_pads)
+        self.offline_pads = offline
+        self.active_pads = self.num_charging_pads - count
+        if self.verbose: self.log(f"🔧 MAINTENANCE : {count} pad(s) hors service.")
+
+    def compact_indexes(self):
+        """ Reconstruit les tas d'index sans les entrées périmées """
+        def valid(heap, versions):
+            kept = [entry for entry in heap if versions[entry[-2]] == entry[-1]]
+            heapq.heapify(kept)
+            return kept
+
+        self.pads_by_charge = valid(self.pads_by_charge, self.pad_versions)
+        self.pads_full = valid(self.pads_full, self.pad_versions)
+        self.spots_by_max = valid(self.spots_by_max, self.spot_versions)
+        self.spots_by_min = valid(self.spots_by_min, self.spot_versions)
+
+    def fullest_pad(self) -> int:
+        """ Index du pad le plus chargé (ex aequo : le premier), -1 si aucun drone """
+        versions = self.pad_versions
+        charging = self.pads_by_charge
+        full = self.pads_full
+
+        # Les drones arrivés au maximum passent dans le tas 'plein', ordonné par index
+        while charging:
+            _, index, version = charging[0]
+            if versions[index] != version:
+                heapq.heappop(charging)
+            elif self.charging_pads[index].current_battery >= self.charging_pads[index].max_battery:
+                heapq.heappop(charging)
+                heapq.heappush(full, (index, version))
+            else:
+                break
+
+        while full and versions[full[0][0]] != full[0][1]:
+            heapq.heappop(full)
+
+        if full:
+            return full[0][0]
+        return charging[0][1] if charging else -1
+
+    def fullest_spot(self) -> int:
+        """ Index de la place de garage la plus chargée (ex aequo : la première), -1 si vide """
+        heap, versions = self.spots_by_max, self.spot_versions
+        while heap and versions[heap[0][1]] != heap[0][2]:
+            heapq.heappop(heap)
+        return heap[0][1] if heap else -1
+
+    def emptiest_spot(self) -> int:
+        """ Index de la place de garage la moins chargée sous battery_max (ex aequo : la première), -1 sinon """
+        heap, versions = self.spots_by_min, self.spot_versions
+        while heap and versions[heap[0][1]] != heap[0][2]:
+            heapq.heappop(heap)
+        return heap[0][1] if heap else -1
+
     def optimize_fleet_position(self):
         """ Algorithme de 'Valet' : Déplace les drones entre Garage et Pads """
         
@@ -81,121 +264,131 @@ class Vertiport:
         free_garage_idx = self.find_free_index(self.parking_spots)
         if free_garage_idx != -1:
             is_traffic_jam = len(self.approach_queue) > 0
-            battery_threshold = 60.0 if is_traffic_jam else 99.0
+            battery_threshold = self.valet_jam_level if is_traffic_jam else self.valet_idle_level
             
             best_candidate = None
-            best_pad_idx = -1
-            max_battery = -1
 
             # On cherche le drone le plus chargé sur les pads pour le garer
-            for i, drone in enumerate(self.charging_pads):
-                if drone and drone.current_battery >= battery_threshold:
-                    if drone.current_battery > max_battery:
-                        max_battery = drone.current_battery
-                        best_candidate = drone
-                        best_pad_idx = i
+            best_pad_idx = self.fullest_pad()
+            if best_pad_idx != -1 and self.charging_pads[best_pad_idx].current_battery >= battery_threshold:
+                best_candidate = self.charging_pads[best_pad_idx]
             
             if best_candidate:
-                self.parking_spots[free_garage_idx] = best_candidate
-                self.charging_pads[best_pad_idx] = None 
-                best_candidate.status = "AU_REPOS"
-                self.log(f"♻️ DÉLESTAGE : {best_candidate.drone_id} déplacé vers Garage.")
+                self.occupy_slot(self.parking_spots, free_garage_idx, best_candidate)
+                self.release_slot(self.charging_pads, best_pad_idx)
+                best_candidate.status = AU_REPOS
+                if self.verbose: self.log(f"♻️ DÉLESTAGE : {best_candidate.drone_id} déplacé vers Garage.")
                 return 
 
         # B. Pad -> Garage (Recharger les drones vides du garage)
         free_pad_idx = self.find_free_index(self.charging_pads)
         if free_pad_idx != -1:
             candidate_to_charge = None
-            garage_idx = -1
-            min_battery = 101 
-            
-            for i, drone in enumerate(self.parking_spots):
-                if drone and drone.current_battery < 100:
-                    if drone.current_battery < min_battery:
-                        min_battery = drone.current_battery
-                        candidate_to_charge = drone
-                        garage_idx = i
+            garage_idx = self.emptiest_spot()
+            if garage_idx != -1:
+                candidate_to_charge = self.parking_spots[garage_idx]
             
             if candidate_to_charge:
-                self.charging_pads[free_pad_idx] = candidate_to_charge
-                self.parking_spots[garage_idx] = None
+                self.occupy_slot(self.charging_pads, free_pad_idx, candidate_to_charge)
+                self.release_slot(self.parking_spots, garage_idx)
                 candidate_to_charge.go_to_charge()
-                self.log(f"🔌 RECHARGE : {candidate_to_charge.drone_id} sort du garage.")
+                if self.verbose: self.log(f"🔌 RECHARGE : {candidate_to_charge.drone_id} sort du garage.")
 
     def run_landing_logic(self):
         """ Gère l'atterrissage prioritaire """
         if not self.approach_queue:
             return
 
-        # Tri : Priorité > Batterie Faible
-        self.approach_queue.sort(key=lambda d: (-d.mission_priority, d.current_battery))
+        # La file est déjà dans l'ordre : Priorité > Batterie Faible
         landing_drone = self.approach_queue[0] 
 
         # 1. Essai Pad
         pad_index = self.find_free_index(self.charging_pads)
         if pad_index != -1:
             self.approach_queue.pop(0) 
-            self.charging_pads[pad_index] = landing_drone
-            landing_drone.status = "EN_RECHARGE"
-            self.log(f"⬇️ ATTERRISSAGE (Charge) : {landing_drone.drone_id}")
+            self.occupy_slot(self.charging_pads, pad_index, landing_drone)
+            landing_drone.status = EN_RECHARGE
+            if self.metrics is not None: self.metrics.record_landing(landing_drone)
+            if self.verbose: self.log(f"⬇️ ATTERRISSAGE (Charge) : {landing_drone.drone_id}")
             return
 
         # 2. Essai Garage (Si urgence ou passagers)
         garage_index = self.find_free_index(self.parking_spots)
-        if garage_index != -1 and (landing_drone.mission_priority > 0 or landing_drone.current_battery < 15):
+        if garage_index != -1 and (landing_drone.mission_priority > 0 or landing_drone.current_battery < self.emergency_level):
             self.approach_queue.pop(0) 
-            self.parking_spots[garage_index] = landing_drone
-            landing_drone.status = "AU_REPOS"
-            self.log(f"⬇️ ATTERRISSAGE (Sécurité) : {landing_drone.drone_id}")
+            self.occupy_slot(self.parking_spots, garage_index, landing_drone)
+            landing_drone.status = AU_REPOS
+            if self.metrics is not None: self.metrics.record_landing(landing_drone)
+            if self.verbose: self.log(f"⬇️ ATTERRISSAGE (Sécurité) : {landing_drone.drone_id}")
             return
 
-    def dispatch_mission(self, mission_type: str, priority: int) -> bool:
-        """ Trouve le meilleur drone disponible pour une mission """
-        self.log(f"🔔 COMMANDE : Recherche drone pour '{mission_type}' (Prio: {priority})")
+    def dispatch_mission(self, mission_type: str, priority: int) -> EVTOL:
+        """ Trouve le meilleur drone disponible pour une mission ; renvoie le drone parti (None si aucun) """
+        if self.verbose: self.log(f"🔔 COMMANDE : Recherche drone pour '{mission_type}' (Prio: {priority})")
         
         best_drone = None
         origin_list = None
         origin_index = -1
         
         # Seuil minimum de batterie pour partir
-        min_bat_req = 30 if priority == 2 else 50
-
-        # Recherche dans les deux zones
-        for current_list in [self.charging_pads, self.parking_spots]:
-            for i, d in enumerate(current_list):
-                if d and d.current_battery >= min_bat_req:
-                    if best_drone is None or d.current_battery > best_drone.current_battery:
-                        best_drone = d
-                        origin_list = current_list
-                        origin_index = i
+        min_bat_req = self.dispatch_urgent_level if priority == 2 else self.dispatch_level
+
+        # Meilleur candidat de chaque zone ; à égalité, le pad l'emporte (ordre de recherche)
+        pad_idx = self.fullest_pad()
+        spot_idx = self.fullest_spot()
+        pad_drone = self.charging_pads[pad_idx] if pad_idx != -1 else None
+        spot_drone = self.parking_spots[spot_idx] if spot_idx != -1 else None
+
+        for d, current_list, i in [(pad_drone, self.charging_pads, pad_idx), (spot_drone, self.parking_spots, spot_idx)]:
+            if d and d.current_battery >= min_bat_req:
+                if best_drone is None or d.current_battery > best_drone.current_battery:
+                    best_drone = d
+                    origin_list = current_list
+                    origin_index = i
         
         if best_drone:
-            self.log(f"🛫 DÉCOLLAGE : {best_drone.drone_id}")
+            if self.verbose: self.log(f"🛫 DÉCOLLAGE : {best_drone.drone_id}")
             best_drone.assign_mission(mission_type, priority)
-            origin_list[origin_index] = None 
-            return True
+            self.release_slot(origin_list, origin_index)
+            return best_drone
         else:
             self.log(f"❌ ÉCHEC : Flotte indisponible.")
-            return False
+            return None
+
+    def audit_crashes(self):
+        """ Retire de la file les drones à batterie vide et comptabilise les crashs """
+        # Pas de liste temporaire tant qu'aucun drone n'est à sec (cas de loin le plus fréquent)
+        if not any(d.current_battery <= 0 for d in self.approach_queue):
+            return
+
+        survivors = []
+        for d in self.approach_queue:
+            if d.current_battery <= 0:
+                if self.verbose: self.log(f"🔥 CRASH AÉRIEN : {d.drone_id} s'est écrasé !")
+                self.crashes += 1 
+                if self.metrics is not None: self.metrics.record_crash()
+            else:
+                survivors.append(d)
+        self.approach_queue[:] = survivors
 
     def update_simulation(self):
         """ Mise à jour d'un tick de simulation """
+        self.ticks += 1
         # Mise à jour des entités
         for d in self.approach_queue: d.update()
         for d in self.charging_pads: 
             if d: d.update()
         for d in self.parking_spots:
             if d: 
-                if d.status != "AU_REPOS": d.status = "AU_REPOS"
+                if d.status != AU_REPOS: d.status = AU_REPOS
                 d.update()
 
         # Vérification des Crashs (Audit)
-        crashed = [d for d in self.approach_queue if d.current_battery <= 0]
-        for d in crashed:
-            self.log(f"🔥 CRASH AÉRIEN : {d.drone_id} s'est écrasé !")
-            self.crashes += 1 
-            self.approach_queue.remove(d)
+        self.audit_crashes()
 
         # Logique de gestion
         self.optimize_fleet_position()
-        self.run_landing_logic()
\ No newline at end of file
+        self.run_landing_logic()
+
+        if self.metrics is not None:
+            self.metrics.record_minute(self)
\ No newline at end of file
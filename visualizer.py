@@ -1,13 +1,15 @@
 import pygame
-import sys
-import config  # Nécessaire pour afficher le % de trafic du profil
 from vertiport import Vertiport
+from scenario import default_scenario
 
 # --- PALETTE DE COULEURS (Style Control Center) ---
 COLOR_BG = (15, 20, 30)         # Bleu nuit profond (Fond)
 COLOR_GRID = (30, 40, 50)       # Lignes de grille discrètes
 COLOR_TEXT = (200, 200, 200)    # Blanc cassé (Texte principal)
 COLOR_ACCENT = (0, 255, 200)    # Cyan (Bordures et Titres)
+COLOR_TITLE_BG = (20, 30, 40)   # Fond des titres de section
+COLOR_SLOT_BG = (25, 30, 40)    # Emplacement vide
+COLOR_SLOT_LABEL = (60, 70, 80)
 
 # Couleurs des Drones
 COLOR_DRONE_BODY = (240, 240, 240)
@@ -16,174 +18,279 @@ COLOR_PRIORITY_STD = (50, 150, 255)   # Bleu (Standard)
 COLOR_BATTERY_LOW = (255, 100, 0)     # Orange
 COLOR_BATTERY_OK = (50, 200, 50)      # Vert
 
+# --- MISE EN PAGE : (titre, x, y, largeur, hauteur, disposition, colonnes) ---
+SECTION_QUEUE = ("APPROACH QUEUE", 20, 80, 250, 850, "vertical", 1)
+SECTION_PADS = ("CHARGING PADS", 290, 80, 900, 300, "grid", 6)
+SECTION_GARAGE = ("PARKING / GARAGE", 290, 400, 900, 530, "grid", 10)  # Plus large que haut
+STATS_RECT = (1210, 80, 370, 300)
+HEADER_RECT = (20, 20, 1170, 32)
+TIMELINE_RECT = (20, 937, 1560, 8)     # Barre de lecture d'une trace (cliquer / glisser pour se déplacer)
+TEXT_CACHE_MAX = 4096   # Textes mémorisés (identifiants de drones, statistiques) avant remise à zéro
+
 class VertiportVisualizer:
-    def __init__(self, width=1600, height=950):
+    """
+    Rendu du Vertiport avec caches : le fond (grille, cadres, emplacements vides) est dessiné une
+    fois ; textes et icônes de drones sont rendus une fois puis recopiés ; seuls les emplacements,
+    titres et panneaux qui ont changé depuis l'image précédente sont redessinés (dirty rects).
+    """
+    def __init__(self, width=1600, height=950, scenario=None):
         pygame.init()
         # On augmente la taille de la fenêtre pour tout faire rentrer
         self.screen = pygame.display.set_mode((width, height))
         pygame.display.set_caption("SkyHub Control Center v2.0")
-        
+        self.scenario = default_scenario() if scenario is None else scenario
+
         # Polices d'écriture (Monospace pour bien aligner les chiffres)
         self.font_title = pygame.font.SysFont("Consolas", 24, bold=True)
         self.font_label = pygame.font.SysFont("Consolas", 18)
         self.font_small = pygame.font.SysFont("Consolas", 12)
 
-    def draw_grid(self):
-        """Dessine une grille technique en arrière-plan"""
-        w, h = self.screen.get_size()
+        self.background = None      # Fond pré-rendu pour une taille d'infrastructure donnée
+        self.layout_key = None
+        self.slots = {}             # Section -> [(rect, centre de l'icône)] des emplacements visibles
+        self.shown = {}             # Ce qui est affiché : clé -> signature (None = vide)
+        self.text_cache = {}
+        self.glyph_cache = {}
+
+    # --- Caches ---
+
+    def text(self, font, string: str, color=COLOR_TEXT) -> pygame.Surface:
+        """ Surface d'un texte, rendue une seule fois """
+        key = (id(font), string, color)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            if len(self.text_cache) >= TEXT_CACHE_MAX:
+                self.text_cache.clear()
+            surface = self.text_cache[key] = font.render(string, True, color)
+        return surface
+
+    def glyph(self, priority: int, bar: int, low: bool) -> pygame.Surface:
+        """ Icône d'un drone (hélices, corps, jauge de batterie de 'bar' pixels), sans son identifiant """
+        key = (priority == 2, bar, low)
+        surface = self.glyph_cache.get(key)
+        if surface is None:
+            surface = pygame.Surface((34, 41), pygame.SRCALPHA)
+            # 1. Couleur du Halo selon la priorité
+            glow_color = COLOR_PRIORITY_HIGH if priority == 2 else COLOR_PRIORITY_STD
+            # 2. Hélices (Forme en X), centre en (17, 17)
+            pygame.draw.line(surface, glow_color, (2, 2), (32, 32), 3)
+            pygame.draw.line(surface, glow_color, (2, 32), (32, 2), 3)
+            # 3. Corps du drone (Cercle)
+            pygame.draw.circle(surface, COLOR_DRONE_BODY, (17, 17), 10)
+            # 4. Barre de batterie (Sous le drone) : fond noir puis niveau
+            pygame.draw.rect(surface, (0, 0, 0), (2, 35, 30, 5))
+            pygame.draw.rect(surface, COLOR_BATTERY_LOW if low else COLOR_BATTERY_OK, (2, 35, bar, 5))
+            self.glyph_cache[key] = surface
+        return surface
+
+    def build_background(self, vertiport: Vertiport):
+        """ Grille technique, cadres et emplacements vides : dessinés une fois par infrastructure """
+        background = pygame.Surface(self.screen.get_size())
+        background.fill(COLOR_BG)
+        w, h = background.get_size()
         for x in range(0, w, 40):
-            pygame.draw.line(self.screen, COLOR_GRID, (x, 0), (x, h))
+            pygame.draw.line(background, COLOR_GRID, (x, 0), (x, h))
         for y in range(0, h, 40):
-            pygame.draw.line(self.screen, COLOR_GRID, (0, y), (w, y))
+            pygame.draw.line(background, COLOR_GRID, (0, y), (w, y))
+
+        capacities = {SECTION_QUEUE: None, SECTION_PADS: vertiport.num_charging_pads,
+                      SECTION_GARAGE: vertiport.num_parking_spots}
+        padding = 10
+        self.slots = {}
+        for section, capacity in capacities.items():
+            title, x, y, w, h, layout, cols = section
+            # Bordure Cadre et fond du titre
+            pygame.draw.rect(background, COLOR_ACCENT, (x, y, w, h), 1, border_radius=8)
+            pygame.draw.rect(background, COLOR_TITLE_BG, (x+10, y-12, 220, 24))
 
-    def draw_drone_icon(self, center_x, center_y, drone):
-        """Dessine un drone stylisé (Cercle + Hélices)"""
+            slots = []
+            if layout == "vertical":    # File d'attente : cadres dessinés avec les drones
+                slot_h = 60
+                slot_y = y + 40
+                while slot_y + 50 <= y + h:
+                    slots.append((pygame.Rect(x+padding, slot_y, w-2*padding, 50), (x + w//2, slot_y + 25)))
+                    slot_y += slot_h
+            else:                       # Pads et Garage : emplacements fixes
+                slot_w = (w - (cols+1)*padding) // cols
+                slot_h = 60
+                prefix = "P" if section is SECTION_PADS else "G"
+                for i in range(capacity):
+                    r, c = divmod(i, cols)
+                    slot_x = x + padding + c*(slot_w + padding)
+                    slot_y = y + 40 + r*(slot_h + padding)
+                    # Si ça dépasse du cadre, on arrête
+                    if slot_y + slot_h > y + h:
+                        break
+                    rect = pygame.Rect(slot_x, slot_y, slot_w, slot_h)
+                    pygame.draw.rect(background, COLOR_SLOT_BG, rect, border_radius=4)
+                    pygame.draw.rect(background, COLOR_GRID, rect, 1, border_radius=4)
+                    background.blit(self.text(self.font_small, f"{prefix}{i+1}", COLOR_SLOT_LABEL),
+                                    (slot_x+5, slot_y+5))
+                    slots.append((rect, (slot_x + slot_w//2, slot_y + slot_h//2)))
+            self.slots[section] = slots
+
+        # Panneau des statistiques
+        pygame.draw.rect(background, COLOR_GRID, STATS_RECT, 1)
+        background.blit(self.text(self.font_label, "LIVE STATISTICS", COLOR_ACCENT), (1220, 90))
+
+        self.background = background
+        self.layout_key = (vertiport.num_charging_pads, vertiport.num_parking_spots)
+        self.shown = {}
+
+    # --- Dessin incrémental ---
+
+    def drone_signature(self, drone):
+        """ Ce qui est visible d'un drone : l'icône n'est redessinée que si cela change """
         if drone is None:
-            return
+            return None
+        bar = int(30 * min(drone.current_battery / drone.max_battery, 1.0))
+        return drone.drone_id, drone.mission_priority, bar, drone.current_battery <= 30
 
-        # 1. Couleur du Halo selon la priorité
-        glow_color = COLOR_PRIORITY_HIGH if drone.mission_priority == 2 else COLOR_PRIORITY_STD
-        
-        # 2. Hélices (Forme en X)
-        size = 15
-        pygame.draw.line(self.screen, glow_color, (center_x-size, center_y-size), (center_x+size, center_y+size), 3)
-        pygame.draw.line(self.screen, glow_color, (center_x-size, center_y+size), (center_x+size, center_y-size), 3)
-        
-        # 3. Corps du drone (Cercle)
-        pygame.draw.circle(self.screen, COLOR_DRONE_BODY, (center_x, center_y), 10)
-        
-        # 4. Barre de batterie (Sous le drone)
-        bat_pct = drone.current_battery / 100.0
-        bat_color = COLOR_BATTERY_OK if drone.current_battery > 30 else COLOR_BATTERY_LOW
-        
-        # Fond noir de la jauge
-        pygame.draw.rect(self.screen, (0,0,0), (center_x-15, center_y+18, 30, 5))
-        # Niveau de batterie
-        pygame.draw.rect(self.screen, bat_color, (center_x-15, center_y+18, 30 * bat_pct, 5))
-
-        # 5. ID du Drone
-        text = self.font_small.render(drone.drone_id, True, COLOR_TEXT)
+    def draw_drone_icon(self, center_x, center_y, signature):
+        """Dessine un drone stylisé (Cercle + Hélices) depuis les caches"""
+        drone_id, priority, bar, low = signature
+        self.screen.blit(self.glyph(priority, bar, low), (center_x - 17, center_y - 17))
+        # ID du Drone
+        text = self.text(self.font_small, drone_id)
         self.screen.blit(text, (center_x - text.get_width()//2, center_y - 25))
 
-    def draw_section(self, title, x, y, w, h, items, layout="grid"):
-        """Dessine un conteneur (File d'attente, Pads ou Garage)"""
-        # Bordure Cadre
-        pygame.draw.rect(self.screen, COLOR_ACCENT, (x, y, w, h), 1, border_radius=8)
-        
-        # Titre avec fond
-        pygame.draw.rect(self.screen, (20, 30, 40), (x+10, y-12, 220, 24))
-        count = len([i for i in items if i]) # Compte les slots occupés
-        total = len(items)
-        title_surf = self.font_label.render(f"{title} ({count}/{total})", True, COLOR_ACCENT)
-        self.screen.blit(title_surf, (x+20, y-10))
-
-        # Dessin des emplacements
-        padding = 10
-        
-        if layout == "vertical": # Pour la file d'attente (Queue)
-            slot_h = 60
-            for i, drone in enumerate(items):
-                slot_y = y + 40 + i * slot_h
-                # Si la file est trop longue pour l'écran, on arrête d'afficher
-                if slot_y + 50 > y + h: break 
-                
-                # Cadre du slot
-                pygame.draw.rect(self.screen, COLOR_GRID, (x+padding, slot_y, w-2*padding, 50), 1, border_radius=4)
-                if drone:
-                    self.draw_drone_icon(x + w//2, slot_y + 25, drone)
-        
-        elif layout == "grid": # Pour Pads et Garage
-            # Calcul automatique des colonnes
-            # MODIFICATION ICI : On passe à 10 colonnes pour le Garage pour qu'il soit plus large que haut
-            cols = 10 if title == "PARKING / GARAGE" else 6
-            
-            slot_w = (w - (cols+1)*padding) // cols
-            slot_h = 60
-            
-            for i, drone in enumerate(items):
-                r = i // cols
-                c = i % cols
-                slot_x = x + padding + c*(slot_w + padding)
-                slot_y = y + 40 + r*(slot_h + padding)
-                
-                # Si ça dépasse du cadre, on arrête
-                if slot_y + slot_h > y + h: break
-
-                # Slot vide (fond gris foncé)
-                pygame.draw.rect(self.screen, (25, 30, 40), (slot_x, slot_y, slot_w, slot_h), border_radius=4)
-                pygame.draw.rect(self.screen, COLOR_GRID, (slot_x, slot_y, slot_w, slot_h), 1, border_radius=4)
-                
-                # Numéro du slot (P1, G1...)
-                prefix = "P" if title == "CHARGING PADS" else "G"
-                label = self.font_small.render(f"{prefix}{i+1}", True, (60, 70, 80))
-                self.screen.blit(label, (slot_x+5, slot_y+5))
-
-                if drone:
-                    self.draw_drone_icon(slot_x + slot_w//2, slot_y + slot_h//2, drone)
-
-    def draw(self, vertiport: Vertiport, time_step: int):
-        # Gestion des événements (Pour ne pas que la fenêtre plante)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+    def restore(self, rect) -> pygame.Rect:
+        """ Recopie le fond sur une zone et la renvoie comme zone à rafraîchir """
+        rect = pygame.Rect(rect)
+        self.screen.blit(self.background, rect, rect)
+        return rect
 
-        # 1. Arrière-plan
-        self.screen.fill(COLOR_BG)
-        self.draw_grid()
+    def draw_section(self, section, items, count: int, dirty: list):
+        """Met à jour un conteneur (File d'attente, Pads ou Garage) : titre et emplacements modifiés"""
+        title, x, y, w, h, layout, _ = section
 
-        # 2. Calcul du temps (Conversion Minute -> Heure:Minute)
+        # Titre avec fond (compte des slots occupés)
+        title_text = f"{title} ({count}/{len(items)})"
+        if self.shown.get((section, "title")) != title_text:
+            self.shown[(section, "title")] = title_text
+            dirty.append(self.restore((x+10, y-12, 220, 24)))
+            self.screen.blit(self.text(self.font_label, title_text, COLOR_ACCENT), (x+20, y-10))
+
+        for i, (rect, (cx, cy)) in enumerate(self.slots[section]):
+            signature = self.drone_signature(items[i]) if i < len(items) else None
+            key = (section, i)
+            if self.shown.get(key) == signature:
+                continue
+            self.shown[key] = signature
+            dirty.append(self.restore(rect))
+            if signature is not None:
+                if layout == "vertical":
+                    # Cadre du slot
+                    pygame.draw.rect(self.screen, COLOR_GRID, rect, 1, border_radius=4)
+                self.draw_drone_icon(cx, cy, signature)
+
+    def draw_timeline(self, progress: float, dirty: list):
+        """ Barre de lecture : position dans la trace (0 à 1) """
+        x, y, w, h = TIMELINE_RECT
+        filled = int(w * min(max(progress, 0.0), 1.0))
+        if self.shown.get("timeline") == filled:
+            return
+        self.shown["timeline"] = filled
+        dirty.append(self.restore(TIMELINE_RECT))
+        pygame.draw.rect(self.screen, COLOR_GRID, TIMELINE_RECT)
+        pygame.draw.rect(self.screen, COLOR_ACCENT, (x, y, filled, h))
+
+    def draw(self, vertiport: Vertiport, time_step: int, warp: float = None, speed: float = None,
+             progress: float = None):
+        """
+        Dessine l'état courant ; time_step = minutes écoulées depuis le début de la simulation.
+        warp : vitesse demandée (minutes simulées par seconde, négative en lecture arrière),
+        speed : vitesse mesurée, progress : position dans une trace rejouée (barre de lecture).
+        """
+        full = (vertiport.num_charging_pads, vertiport.num_parking_spots) != self.layout_key
+        if full:
+            self.build_background(vertiport)
+            self.screen.blit(self.background, (0, 0))
+        dirty = []
+
+        # 1. Calcul du temps (Conversion Minute -> Jour, Heure:Minute)
+        day = time_step // 1440
         hour = (time_step // 60) % 24
         minute = time_step % 60
-        time_str = f"{hour:02d}:{minute:02d}"
-
-        # 3. Récupération des profils de trafic (si disponible dans config)
-        try:
-            pct_arr = config.PROFILE_ARRIVAL_WEEKDAY[hour] * 100
-            pct_dep = config.PROFILE_DEPARTURE_WEEKDAY[hour] * 100
-            traffic_text = f"IN: {pct_arr:.0f}% | OUT: {pct_dep:.0f}%"
-        except:
-            traffic_text = "TRAFFIC: N/A"
-
-        # 4. En-tête (Header)
-        header_text = f"SKYHUB OPTIMIZER | TIME: {time_str} | {traffic_text}"
-        self.screen.blit(self.font_title.render(header_text, True, COLOR_TEXT), (20, 20))
-
-        # 5. Dessin des Sections (LAYOUT REVU)
-        
-        # --- GAUCHE : File d'attente (Airspace) ---
-        # x=20, Largeur=250, Hauteur=850 (Toute la hauteur dispo)
-        self.draw_section("APPROACH QUEUE", 20, 80, 250, 850, vertiport.approach_queue, layout="vertical")
-        
-        # --- CENTRE HAUT : Pads de charge ---
-        # x=290, Largeur=900, Hauteur=300
-        self.draw_section("CHARGING PADS", 290, 80, 900, 300, vertiport.charging_pads, layout="grid")
-        
-        # --- CENTRE BAS : Garage (Beaucoup plus large) ---
-        # x=290, y=400, Largeur=900, Hauteur=530
-        self.draw_section("PARKING / GARAGE", 290, 400, 900, 530, vertiport.parking_spots, layout="grid")
-        
-        # --- DROITE : Statistiques en temps réel ---
-        # x=1210, Largeur=370
-        pygame.draw.rect(self.screen, COLOR_GRID, (1210, 80, 370, 300), 1)
-        stat_title = self.font_label.render("LIVE STATISTICS", True, COLOR_ACCENT)
-        self.screen.blit(stat_title, (1220, 90))
-        
-        # Données dynamiques
+
+        # 2. Profils de trafic du jour (semaine ou week-end)
+        prof_arr, prof_dep = self.scenario.day_profiles(day)
+        traffic_text = f"IN: {prof_arr[hour] * 100:.0f}% | OUT: {prof_dep[hour] * 100:.0f}%"
+
+        # 3. En-tête (Header) : change à chaque minute simulée
+        header_text = f"SKYHUB OPTIMIZER | DAY {day + 1} | TIME: {hour:02d}:{minute:02d} | {traffic_text}"
+        if self.shown.get("header") != header_text:
+            self.shown["header"] = header_text
+            dirty.append(self.restore(HEADER_RECT))
+            self.screen.blit(self.font_title.render(header_text, True, COLOR_TEXT), HEADER_RECT[:2])
+
+        # 4. Sections
+        self.draw_section(SECTION_QUEUE, vertiport.approach_queue, len(vertiport.approach_queue), dirty)
+        self.draw_section(SECTION_PADS, vertiport.charging_pads, vertiport.occupied_pads, dirty)
+        self.draw_section(SECTION_GARAGE, vertiport.parking_spots, vertiport.occupied_spots, dirty)
+
+        # 5. Statistiques en temps réel
         waiting = len(vertiport.approach_queue)
-        charging = sum(1 for d in vertiport.charging_pads if d)
-        parked = sum(1 for d in vertiport.parking_spots if d)
-        
-        stats = [
+        charging = vertiport.occupied_pads
+        parked = vertiport.occupied_spots
+        stats = (
             f"Drones in Airspace : {waiting}",
             f"Active Charging    : {charging} / {vertiport.num_charging_pads}",
             f"Garage Occupancy   : {parked} / {vertiport.num_parking_spots}",
             f"Total Fleet        : {waiting + charging + parked}",
-            f"Simulation Speed   : 20 min/sec" 
-        ]
-        
-        for i, line in enumerate(stats):
-            s = self.font_label.render(f"> {line}", True, COLOR_TEXT)
-            self.screen.blit(s, (1220, 130 + i*30))
-
-        pygame.display.flip()
\ No newline at end of file
+            f"Crashes            : {vertiport.crashes}",
+            f"Simulation Speed   : {20 if warp is None else warp:g} min/sec",
+            f"Measured Speed     : {speed:.0f} min/sec" if speed is not None else "",
+        )
+        if progress is not None:
+            self.draw_timeline(progress, dirty)
+
+        if self.shown.get("stats") != stats:
+            self.shown["stats"] = stats
+            dirty.append(self.restore((STATS_RECT[0] + 1, 125, STATS_RECT[2] - 2, STATS_RECT[3] - 46)))
+            for i, line in enumerate(stats):
+                if line:
+                    self.screen.blit(self.text(self.font_label, f"> {line}"), (1220, 130 + i*30))
+
+        if full:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
+
+    def poll_events(self) -> list:
+        """
+        Événements clavier, souris et fenêtre, traduits en commandes :
+        "quit", "pause" (Espace), "faster" (Haut / +), "slower" (Bas / -),
+        et pour le rejeu d'une trace : "reverse" (R), ("jump", minutes) (Gauche / Droite : 1 h,
+        Page préc. / suiv. : 1 jour), ("seek", position de 0 à 1) (Début / Fin, clic sur la barre de lecture)
+        """
+        commands = []
+        timeline = pygame.Rect(TIMELINE_RECT).inflate(0, 12)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                commands.append("quit")
+            elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+                pressed = event.type == pygame.MOUSEBUTTONDOWN or event.buttons[0]
+                if pressed and timeline.collidepoint(event.pos):
+                    commands.append(("seek", (event.pos[0] - TIMELINE_RECT[0]) / TIMELINE_RECT[2]))
+            elif event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_ESCAPE, pygame.K_q):
+                    commands.append("quit")
+                elif event.key == pygame.K_SPACE:
+                    commands.append("pause")
+                elif event.key in (pygame.K_UP, pygame.K_PLUS, pygame.K_KP_PLUS, pygame.K_EQUALS):
+                    commands.append("faster")
+                elif event.key in (pygame.K_DOWN, pygame.K_MINUS, pygame.K_KP_MINUS):
+                    commands.append("slower")
+                elif event.key == pygame.K_r:
+                    commands.append("reverse")
+                elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    commands.append(("jump", 60 if event.key == pygame.K_RIGHT else -60))
+                elif event.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                    commands.append(("jump", 1440 if event.key == pygame.K_PAGEDOWN else -1440))
+                elif event.key in (pygame.K_HOME, pygame.K_END):
+                    commands.append(("seek", 0.0 if event.key == pygame.K_HOME else 1.0))
+        return commands
+
+    def close(self):
+        pygame.quit()
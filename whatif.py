@@ -0,0 +1,184 @@
+"""
+SCÉNARIOS « ET SI ? » - SKYHUB PROJECT
+Un tronc (MonthSimulation) est simulé une seule fois jusqu'à la minute de bifurcation, puis figé :
+hub, flotte, générateur aléatoire et compteurs sont sérialisés (pickle + zlib, quelques dizaines
+de Ko). Chaque branche repart de cet instantané avec ses interventions (pic de trafic urgent,
+pads en maintenance...) et finit le mois en parallèle des autres. Le tronc prolongé sans
+intervention est la branche de référence : au même état et avec le même générateur, les écarts
+ne viennent que des interventions.
+
+Une intervention est permanente, (minute, paramètre, valeur), ou temporaire, (début, fin, paramètre,
+valeur) : à la fin, le paramètre reprend la valeur en vigueur sans elle (réglage permanent courant,
+ou la plus récente des autres interventions temporaires encore actives). Deux interventions qui se
+chevauchent ne s'annulent donc pas. Paramètres :
+  "arrival_scale"   multiplicateur des probabilités d'arrivée (1.0 : profil du scénario)
+  "urgent_share"    part des arrivées prioritaires (0.2 par défaut)
+  "pads_offline"    nombre de pads en maintenance (0 : tous en service)
+Une intervention datée d'avant la bifurcation est une erreur (ValueError).
+"""
+import zlib
+import pickle
+import dataclasses
+import config
+from optimizer import MonthSimulation, run_tasks
+from scenario import default_scenario
+
+TRUNK = "tronc"
+ACTIONS = ("arrival_scale", "urgent_share", "pads_offline")
+
+@dataclasses.dataclass(frozen=True)
+class Branch:
+    name: str
+    events: tuple = ()      # (minute, paramètre, valeur) ou (début, fin, paramètre, valeur), dans n'importe quel ordre
+
+    def __post_init__(self):
+        for event in self.events:
+            if len(event) not in (3, 4):
+                raise ValueError(f"Intervention mal formée : {event}")
+            action = event[-2]
+            if action not in ACTIONS:
+                raise ValueError(f"Intervention inconnue : {action} (attendu : {', '.join(ACTIONS)})")
+            if len(event) == 4 and event[1] < event[0]:
+                raise ValueError(f"Intervention terminée avant son début : {event}")
+        object.__setattr__(self, "events", tuple(sorted(self.events, key=lambda event: event[0])))
+
+def minute_of(day: int, clock_time: str = "00:00") -> int:
+    """ Jour (à partir de 1) et heure "HH:MM" -> minute du mois """
+    hours, minutes = (int(part) for part in clock_time.split(":"))
+    return (day - 1) * 1440 + hours * 60 + minutes
+
+def surge(start: int, end: int, scale: float, urgent_share: float = None) -> tuple:
+    """ Pic de trafic entre deux minutes, éventuellement plus urgent """
+    events = [(start, end, "arrival_scale", scale)]
+    if urgent_share is not None:
+        events.append((start, end, "urgent_share", urgent_share))
+    return tuple(events)
+
+def maintenance(start: int, end: int, pads: int) -> tuple:
+    """ 'pads' pads hors service entre deux minutes """
+    return ((start, end, "pads_offline", pads),)
+
+def snapshot(simulation: MonthSimulation) -> bytes:
+    """ État complet de la simulation (sans observateur : hub.metrics doit être sérialisable ou None) """
+    return zlib.compress(pickle.dumps(simulation, pickle.HIGHEST_PROTOCOL))
+
+def restore(data: bytes) -> MonthSimulation:
+    """ Copie indépendante de la simulation figée """
+    return pickle.loads(zlib.decompress(data))
+
+def current_value(simulation: MonthSimulation, action: str):
+    """ Valeur du paramètre en vigueur dans la simulation """
+    if action == "pads_offline":
+        return len(simulation.hub.offline_pads)
+    return getattr(simulation, action)
+
+def apply_event(simulation: MonthSimulation, action: str, value):
+    if action == "pads_offline":
+        simulation.hub.set_pads_offline(int(value))
+    else:
+        setattr(simulation, action, value)
+
+def run_branch(simulation: MonthSimulation, branch: Branch) -> tuple:
+    """ Finit le mois avec les interventions de la branche ; ValueError si l'une précède la bifurcation """
+    if branch.events and branch.events[0][0] < simulation.minute:
+        raise ValueError(f"{branch.name} : intervention à la minute {branch.events[0][0]}, "
+                         f"avant la bifurcation (minute {simulation.minute})")
+    # Chronologie des changements : (minute, rang, fin ?, paramètre, valeur)
+    steps = []
+    for rank, event in enumerate(branch.events):
+        if len(event) == 3:
+            minute, action, value = event
+            steps.append((minute, rank, False, action, value))
+        else:
+            start, end, action, value = event
+            steps += [(start, rank, False, action, value), (end, rank, True, action, value)]
+    steps.sort(key=lambda step: step[:3])
+
+    base = {action: current_value(simulation, action) for action in ACTIONS}   # Réglages permanents
+    active = {action: [] for action in ACTIONS}     # Interventions temporaires en cours, par ordre de début
+    for minute, rank, ending, action, value in steps:
+        simulation.run(minute)
+        if len(branch.events[rank]) == 3:
+            base[action] = value
+        elif ending:
+            active[action].remove((rank, value))
+        else:
+            active[action].append((rank, value))
+        apply_event(simulation, action, active[action][-1][1] if active[action] else base[action])
+    simulation.run()
+    return simulation.result()
+
+def evaluate_branch(task):
+    """ Point d'entrée d'un worker : (nom, résultat) d'une branche partie de l'instantané """
+    name, data, branch = task
+    return name, run_branch(restore(data), branch)
+
+def fork(data: bytes, branches, workers=1) -> dict:
+    """
+    Branches lancées depuis un même instantané (plus la référence : le tronc sans intervention) ;
+    renvoie {nom: (profit, vols, refus, crashs)}, dans l'ordre des branches.
+    """
+    branches = [Branch(TRUNK)] + [branch for branch in branches if branch.name != TRUNK]
+    tasks = [(branch.name, data, branch) for branch in branches]
+    results = dict(run_tasks(tasks, workers, evaluate_branch))
+    return {branch.name: results[branch.name] for branch in branches}
+
+def what_if(num_pads: int, num_garage: int, fork_minute: int, branches, seed: int = None, scenario=None,
+            workers=1) -> dict:
+    """ Tronc simulé jusqu'à fork_minute puis branches ; voir fork() """
+    simulation = MonthSimulation(num_pads, num_garage, seed, scenario)
+    simulation.run(fork_minute)
+    return fork(snapshot(simulation), branches, workers)
+
+def print_branches(results: dict):
+    """ Résultat de chaque branche et écart au tronc """
+    trunk = results[TRUNK]
+    print(f"{'BRANCHE':<36} | {'PROFIT NET':>12} | {'Δ PROFIT':>11} | {'Δ VOLS':>7} | {'Δ REFUS':>7} | {'Δ CRASHS':>8}")
+    print("-" * 96)
+    for name, (profit, flights, refusals, crashes) in results.items():
+        if name == TRUNK:
+            print(f"{name:<36} | {profit:>11,.0f}€ | {'':>11} | {flights:>7} | {refusals:>7} | {crashes:>8}")
+        else:
+            print(f"{name:<36} | {profit:>11,.0f}€ | {profit - trunk[0]:>+10,.0f}€ | {flights - trunk[1]:>+7} | "
+                  f"{refusals - trunk[2]:>+7} | {crashes - trunk[3]:>+8}")
+
+if __name__ == "__main__":
+    import time
+    import argparse
+    from optimizer import run_month_simulation
+    parser = argparse.ArgumentParser(description="SkyHub - Branches « et si ? » depuis un instantané")
+    parser.add_argument("--pads", type=int, default=8)
+    parser.add_argument("--garage", type=int, default=57)
+    parser.add_argument("--seed", type=int, default=None, help="Graine (défaut : config.OPTIMIZER_SEED)")
+    parser.add_argument("--fork-day", type=int, default=22, help="Jour de bifurcation (à partir de 1), à minuit")
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut : config.OPTIMIZER_WORKERS)")
+    args = parser.parse_args()
+
+    seed = config.OPTIMIZER_SEED if args.seed is None else args.seed
+    workers = config.OPTIMIZER_WORKERS if args.workers is None else args.workers
+    scenario = default_scenario()
+    day = args.fork_day
+    branches = [
+        Branch(f"Pic urgent J{day} 07h-10h x2", surge(minute_of(day, "07:00"), minute_of(day, "10:00"), 2.0, 0.6)),
+        Branch(f"2 pads en maintenance J{day} 08h-16h", maintenance(minute_of(day, "08:00"), minute_of(day, "16:00"), 2)),
+        Branch("Pic + maintenance", surge(minute_of(day, "07:00"), minute_of(day, "10:00"), 2.0, 0.6)
+               + maintenance(minute_of(day, "08:00"), minute_of(day, "16:00"), 2)),
+        Branch(f"Trafic +30% à partir de J{day}", ((minute_of(day), "arrival_scale", 1.3),)),
+    ]
+
+    # Le tronc prolongé sans intervention doit retrouver exactement le mois d'une seule traite
+    start = time.perf_counter()
+    trunk = MonthSimulation(args.pads, args.garage, seed, scenario)
+    trunk.run(minute_of(day))
+    data = snapshot(trunk)
+    trunk_time = time.perf_counter() - start
+    start = time.perf_counter()
+    results = fork(data, branches, workers)
+    branch_time = time.perf_counter() - start
+
+    print(f"--- Pads={args.pads} Garage={args.garage} | bifurcation J{day} 00:00 | instantané {len(data) / 1024:.0f} Ko ---")
+    print_branches(results)
+    same = results[TRUNK] == run_month_simulation(args.pads, args.garage, seed, scenario)
+    print(f"Tronc prolongé = mois d'une traite : {'✅ identique' if same else '❌ DIFFÉRENT'}")
+    print(f"⏱️ Tronc {trunk_time:.2f}s (une fois) | {len(results)} branches {branch_time:.2f}s "
+          f"(au lieu de ~{len(results) * trunk_time + branch_time:.1f}s en repartant du jour 1)")
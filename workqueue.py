@@ -0,0 +1,256 @@
+"""
+FILE DE TRAVAIL DURABLE - SKYHUB PROJECT
+Une exécution de l'optimiseur (grille x réplications) devient un dossier de run : une base SQLite
+y tient une tâche par (cellule, réplication) et son résultat physique (vols, refus, crashs),
+enregistré dès que la simulation se termine.
+
+  - reprise : une exécution interrompue est relancée avec le même dossier et ne refait que les
+    tâches non terminées (celles réclamées par un processus mort sur cette machine sont libérées) ;
+  - partage : plusieurs processus indépendants (optimizer.py --run-dir lancé plusieurs fois)
+    réclament des lots de tâches dans une transaction exclusive, sans double travail ; une tâche
+    réclamée depuis plus de WORKQUEUE_LEASE_SECONDS est considérée abandonnée et redistribuée ;
+  - fusion : le tableau classé, ranking.json et best_params.json sont produits quand toutes les
+    tâches sont terminées (ou à la demande, --merge), profit re-chiffré aux prix du scénario du run.
+
+Graines et flux communs sont ceux d'une exécution classique : mêmes résultats qu'optimizer.py
+sans --run-dir, et même cache de résultats.
+"""
+import os
+import json
+import time
+import socket
+import sqlite3
+import dataclasses
+import config
+from economics import rescore
+from montecarlo import CellStats
+from scenario import Scenario
+from optimizer import derive_seed, evaluate_jobs, make_job, save_best_params
+
+PENDING, CLAIMED, DONE = "pending", "claimed", "done"
+LOCK_TIMEOUT = 600      # Secondes d'attente du verrou (la création génère les flux communs sous verrou)
+
+def worker_id() -> str:
+    """ Identité d'un processus de calcul : machine et pid """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class WorkQueue:
+    """ Tâches (cellule, réplication) d'une exécution et leurs résultats, dans <dossier>/queue.sqlite """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # Autocommit : chaque réclamation et chaque résultat est une transaction, visible des autres processus
+        self.db = sqlite3.connect(os.path.join(directory, "queue.sqlite"), timeout=LOCK_TIMEOUT, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS tasks (
+                               id INTEGER PRIMARY KEY, pads INTEGER, garage INTEGER, rep INTEGER,
+                               status TEXT, worker TEXT, claimed REAL,
+                               flights INTEGER, refusals INTEGER, crashes INTEGER, finished REAL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status)")
+
+    def stream_dirs(self, spec: dict) -> list:
+        """ Flux de demande communs du run (--crn), conservés dans son dossier ; None sinon """
+        if not spec["crn"]:
+            return None
+        return [os.path.join(self.directory, "streams", f"rep_{rep}") for rep in range(spec["replications"])]
+
+    def open_run(self, spec: dict) -> dict:
+        """
+        Crée l'exécution décrite par spec (scénario, graine, réplications, moteur, demande commune) ou
+        rejoint celle du dossier. Une spécification différente de celle enregistrée est refusée (ValueError).
+        """
+        spec = json.loads(json.dumps(spec))
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'spec'").fetchone()
+            stored = spec if row is None else json.loads(row[0])
+            if row is None:
+                scenario = Scenario(**spec["scenario"])
+                if spec["crn"]:
+                    from demand import generate_demand_stream
+                    for rep, path in enumerate(self.stream_dirs(spec)):
+                        generate_demand_stream(derive_seed(spec["seed"], "demand", rep), scenario=scenario).save(path)
+                self.db.executemany("INSERT INTO tasks (pads, garage, rep, status) VALUES (?, ?, ?, ?)",
+                                    [(pads, garage, rep, PENDING)
+                                     for pads, garage in scenario.grid() for rep in range(spec["replications"])])
+                self.db.execute("INSERT INTO meta VALUES ('spec', ?)", (json.dumps(spec),))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        differing = [key for key in stored if stored[key] != spec.get(key)]
+        if differing:
+            raise ValueError(f"{self.directory} appartient à une exécution aux paramètres différents "
+                             f"({', '.join(differing)}) : autre dossier, ou mêmes options que sa création")
+        return stored
+
+    def release_orphans(self) -> int:
+        """ Remet dans la file les tâches réclamées par un processus de cette machine qui n'existe plus """
+        host = socket.gethostname()
+        workers = [worker for (worker,) in
+                   self.db.execute("SELECT DISTINCT worker FROM tasks WHERE status = ?", (CLAIMED,))]
+        dead = [worker for worker in workers
+                if worker.rsplit(":", 1)[0] == host and not process_alive(int(worker.rsplit(":", 1)[1]))]
+        released = 0
+        for worker in dead:
+            released += self.db.execute("UPDATE tasks SET status = ?, worker = NULL WHERE status = ? AND worker = ?",
+                                        (PENDING, CLAIMED, worker)).rowcount
+        return released
+
+    def claim(self, worker: str, count: int) -> list:
+        """ Réserve jusqu'à 'count' tâches libres ou abandonnées : [(id, pads, garage, réplication)] """
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.db.execute(
+                "SELECT id, pads, garage, rep FROM tasks WHERE status = ? OR (status = ? AND claimed < ?) "
+                "ORDER BY id LIMIT ?", (PENDING, CLAIMED, now - config.WORKQUEUE_LEASE_SECONDS, count)).fetchall()
+            self.db.executemany("UPDATE tasks SET status = ?, worker = ?, claimed = ? WHERE id = ?",
+                                [(CLAIMED, worker, now, row[0]) for row in rows])
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return rows
+
+    def complete(self, task_id: int, outcome: tuple):
+        """ Enregistre (vols, refus, crashs) d'une tâche ; une tâche redistribuée puis finie deux fois garde son premier résultat """
+        flights, refusals, crashes = outcome
+        self.db.execute("UPDATE tasks SET status = ?, flights = ?, refusals = ?, crashes = ?, finished = ? "
+                        "WHERE id = ? AND status != ?", (DONE, flights, refusals, crashes, time.time(), task_id, DONE))
+
+    def progress(self) -> dict:
+        """ {statut: nombre de tâches} """
+        counts = dict(self.db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in (PENDING, CLAIMED, DONE)}
+
+    def outcomes(self) -> dict:
+        """ {(pads, garage, réplication): (vols, refus, crashs)} des tâches terminées """
+        return {(pads, garage, rep): (flights, refusals, crashes) for pads, garage, rep, flights, refusals, crashes in
+                self.db.execute("SELECT pads, garage, rep, flights, refusals, crashes FROM tasks WHERE status = ?",
+                                (DONE,))}
+
+    def close(self):
+        self.db.close()
+
+def task_seed(spec: dict, pads: int, garage: int, rep: int) -> int:
+    """ Graine d'une tâche : celle de run_round (réplications) ou de iter_grid_results (une par cellule) """
+    if spec["replications"] > 1:
+        return derive_seed(spec["seed"], pads, garage, rep)
+    return derive_seed(spec["seed"], pads, garage)
+
+def work(queue: WorkQueue, spec: dict, workers=1, cache=None, samples=None) -> int:
+    """ Réclame et simule des lots de tâches jusqu'à épuisement de la file ; renvoie le nombre terminé ici """
+    scenario = Scenario(**spec["scenario"])
+    demand_dirs = queue.stream_dirs(spec)
+    me = worker_id()
+    batch = config.WORKQUEUE_CLAIM * max(getattr(workers, "workers", workers), 1)
+    done = 0
+    while True:
+        tasks = queue.claim(me, batch)
+        if not tasks:
+            return done
+        jobs = [make_job(task_id, spec["seed"], pads, garage, task_seed(spec, pads, garage, rep), rep, demand_dirs,
+                         scenario)
+                for task_id, pads, garage, rep in tasks]
+        for task_id, result in evaluate_jobs(jobs, workers, spec["engine"], cache, samples):
+            queue.complete(task_id, result[1:])
+            done += 1
+        progress = queue.progress()
+        total = sum(progress.values())
+        print(f"📥 {progress[DONE]} / {total} tâches terminées ({done} par ce processus, "
+              f"{progress[CLAIMED]} en cours ailleurs)", flush=True)
+
+def merge(queue: WorkQueue, spec: dict, params_path: str = "best_params.json"):
+    """
+    Tableau classé des cellules (profit moyen re-chiffré, crash, IC) à partir des résultats enregistrés ;
+    ranking.json et best_params.json ne sont écrits que si toutes les tâches sont terminées.
+    """
+    scenario = Scenario(**spec["scenario"])
+    replications = spec["replications"]
+    outcomes = queue.outcomes()
+    stats = {}
+    for pads, garage in scenario.grid():
+        stats[(pads, garage)] = CellStats(pads, garage, config.CONFIDENCE_LEVEL)
+        # Ordre des réplications : même agrégation qu'une exécution d'un seul tenant
+        for rep in range(replications):
+            outcome = outcomes.get((pads, garage, rep))
+            if outcome is not None:
+                stats[(pads, garage)].add(rescore(pads, garage, outcome, None, scenario))
+    missing = len(stats) * replications - len(outcomes)
+
+    # Classement : configurations sans crash par profit moyen décroissant, puis celles qui ont crashé
+    ranked = sorted((s for s in stats.values() if s.n), key=lambda s: (s.crashed_runs > 0, -s.mean_profit))
+    print("-" * 115)
+    print(f"{'RANG':<5} | {'CONFIG':<18} | {'PROFIT MOYEN (± IC)':<24} | {'P(CRASH) [IC]':<18} | {'REFUS':<8} | "
+          f"{'N':<4} | {'ANALYSE'}")
+    print("-" * 115)
+    for rank, s in enumerate(ranked, 1):
+        status = "💀 ÉCHEC SÉCU" if s.crashed_runs else "⭐ OPTIMUM" if rank == 1 else ""
+        if s.n < replications:
+            status += f" ⏳ {s.n}/{replications}"
+        half = s.profit_half_width
+        half_str = f"{half:,.0f}" if half != float('inf') else "∞"
+        crash_lo, crash_hi = s.crash_ci
+        print(f"{rank:<5} | Pads={s.num_pads} Garage={s.num_garage:<2} | {s.mean_profit:>10,.0f} ± {half_str:<9}€ | "
+              f"{s.crash_probability:.2f} [{crash_lo:.2f}-{crash_hi:.2f}] | {s.mean_refusals:<8.0f} | {s.n:<4} | {status}")
+    print("-" * 115)
+
+    if missing:
+        claimed = queue.progress()[CLAIMED]
+        hint = (f"{claimed} en cours dans d'autres processus : le dernier à terminer écrit best_params.json"
+                if claimed else "relancer avec le même --run-dir pour les terminer")
+        print(f"⏳ {missing} tâche(s) non terminée(s) : classement provisoire, best_params.json non écrit ({hint})")
+        return None
+    with open(os.path.join(queue.directory, "ranking.json"), "w") as f:
+        json.dump([{"num_pads": s.num_pads, "num_garage": s.num_garage, "mean_profit": s.mean_profit,
+                    "crash_probability": s.crash_probability, "mean_refusals": s.mean_refusals, "n": s.n}
+                   for s in ranked], f, indent=2)
+    best = ranked[0] if ranked and not ranked[0].crashed_runs and ranked[0].mean_profit > 0 else None
+    if best is None:
+        print("❌ Aucune configuration rentable.")
+        return None
+    best_config = (best.num_pads, best.num_garage)
+    print(f"🏆 INFRASTRUCTURE OPTIMALE : {best_config[0]} Pads + {best_config[1]} Garage")
+    save_best_params(best_config, params_path)
+    return best_config
+
+def main_queue(workers, seed: int, replications: int, engine: str, crn: bool, cache=None, scenario=None,
+               run_dir: str = "runs", params_path: str = "best_params.json", merge_only: bool = False, samples=None):
+    """ Crée ou reprend le run de run_dir, travaille sa file (sauf merge_only) puis fusionne les résultats """
+    spec = {"scenario": dataclasses.asdict(scenario), "seed": seed, "replications": replications,
+            "engine": engine, "crn": crn}
+    queue = WorkQueue(run_dir)
+    try:
+        spec = queue.open_run(spec)
+    except ValueError as error:
+        print(f"❌ {error}")
+        queue.close()
+        return None
+    print(f"--- 🛡️ SKYHUB OPTIMIZER (File durable) | Scénario : {scenario.name} | Dossier : {run_dir} ---")
+    print(f"Simulation sur {scenario.sim_duration_days} jours | {replications} réplication(s)/config | "
+          f"Graine maître : {seed} | Workers : {workers} | Moteur : {engine} | Demande commune : {'OUI' if crn else 'NON'}")
+    released = queue.release_orphans()
+    if released:
+        print(f"♻️ {released} tâche(s) d'un processus interrompu remise(s) dans la file")
+    progress = queue.progress()
+    print(f"📂 {progress[DONE]} / {sum(progress.values())} tâches déjà terminées | {progress[CLAIMED]} en cours ailleurs "
+          f"| processus {worker_id()}", flush=True)
+    try:
+        if not merge_only:
+            start = time.perf_counter()
+            done = work(queue, spec, workers, cache, samples)
+            print(f"⚙️ {done} tâche(s) simulée(s) par ce processus en {time.perf_counter() - start:.1f}s")
+        return merge(queue, spec, params_path)
+    finally:
+        queue.close()